@@ -0,0 +1,65 @@
+"""
+Time from MIDI message to request sent, media actions vs scene switches.
+
+Usage: python -m benchmarks.media_actions
+"""
+
+import statistics
+import time
+
+import mido
+
+from obs_midi.core.obs_actions import ObsActions
+from obs_midi.core.obs_client import ObsClient
+
+
+class FakeConnection:
+    def __init__(self) -> None:
+        self.sent: list[str] = []
+
+    def send(self, msg: str) -> None:
+        self.sent.append(msg)
+
+
+def bench(
+    obs_actions: ObsActions, client: ObsClient, programs: list[int], rounds: int
+) -> float:
+    messages = [
+        mido.Message("program_change", channel=0, program=program)
+        for program in programs
+    ]
+    durations = []
+
+    for i in range(rounds):
+        msg = messages[i % len(messages)]
+        start = time.perf_counter()
+        obs_actions.process(msg, client=client)
+        durations.append(time.perf_counter() - start)
+
+    return statistics.median(durations)
+
+
+def main(rounds: int = 10000) -> None:
+    obs_actions = ObsActions()
+    obs_actions.on_scene_found("Verse :: PC1@1")
+    obs_actions.on_scene_found("Chorus :: PC2@1")
+    obs_actions.on_scene_item_found(
+        scene_name="Verse", source_name="Clip :: PC3@1 restart", scene_item_id=1
+    )
+    obs_actions.on_scene_item_found(
+        scene_name="Verse", source_name="Intro :: PC4@1 seek=10s play", scene_item_id=2
+    )
+    client = ObsClient(port=0, password="")
+    client._ws = FakeConnection()  # type: ignore[assignment]
+
+    for name, programs in [
+        ("Scene switch", [1, 2]),
+        ("Media restart", [3]),
+        ("Media seek and play", [4]),
+    ]:
+        median = bench(obs_actions, client, programs, rounds)
+        print(f"{name}: {median * 1e6:.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
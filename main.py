@@ -1,7 +1,18 @@
+import multiprocessing
+import sys
+
+from obs_midi.ctl import run_ctl
 from obs_midi.gui.main import run_gui
 from obs_midi.utils.pyinstaller import pyinstaller_hints
 
 pyinstaller_hints()
 
 if __name__ == "__main__":
-    run_gui()
+    # Engine processes start from this executable once packaged
+    multiprocessing.freeze_support()
+
+    if sys.argv[1:2] == ["ctl"]:
+        # Manage a daemon from the installed program, e.g. `obs-midi ctl status`
+        run_ctl(sys.argv[2:])
+    else:
+        run_gui()
@@ -1,9 +1,14 @@
 import argparse
 import logging
 import logging.config
+import signal
+import sys
+import threading
 
-from .core.main import run
+from .core.control_socket import get_default_socket_path
+from .core.main import INFO_CONTROL, run
 from .core.midi_in import mido_input_opener
+from .ctl import run_ctl
 from .logging import LOGGING_CONFIG
 from .utils.argparse import EnvDefault
 
@@ -11,6 +16,10 @@ logger = logging.getLogger("obs_midi.cli")
 
 
 def run_cli() -> None:
+    if sys.argv[1:2] == ["ctl"]:
+        run_ctl(sys.argv[2:])
+        return
+
     parser = argparse.ArgumentParser(
         description="Control OBS with MIDI via obs-websocket",
     )
@@ -35,17 +44,69 @@ def run_cli() -> None:
         env_var="OBS_PASSWORD",
         help="obs-websocket password",
     )
+    parser.add_argument(
+        "--multi-match",
+        action="store_true",
+        help="Perform all actions bound to a MIDI message, as a single request batch",
+    )
+
+    parser.add_argument(
+        "--obs-command-connection",
+        action="store_true",
+        help="Send actions over a separate obs-websocket connection, without events",
+    )
+    parser.add_argument(
+        "--obs-stats-interval",
+        type=float,
+        help="Poll OBS stats every N seconds, and back off when OBS lags",
+    )
+
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Run headless, managed over a control socket (see: obs-midi ctl)",
+    )
+    parser.add_argument(
+        "--socket",
+        action=EnvDefault,
+        env_var="OBS_MIDI_SOCKET",
+        required=False,
+        default=get_default_socket_path(),
+        help="Control socket path, with --daemon",
+    )
 
     args = parser.parse_args()
 
     logging.config.dictConfig(LOGGING_CONFIG)
 
+    info: dict = {}
+    close_event = threading.Event()
+
+    if args.daemon:
+        # Stopped by service managers, exit cleanly
+        signal.signal(signal.SIGTERM, lambda signum, frame: close_event.set())
+
+    if hasattr(signal, "SIGHUP"):
+        # Not on Windows
+        def on_sighup(signum: int, frame: object) -> None:
+            if (control := info.get(INFO_CONTROL)) is not None:
+                logger.info("SIGHUP received, reloading triggers")
+                control.reload()
+
+        signal.signal(signal.SIGHUP, on_sighup)
+
     try:
         logger.info("Starting")
         run(
             midi_input_opener=mido_input_opener(port=args.midi_port),
             obs_port=args.obs_port,
             obs_password=args.obs_password,
+            on_ready=info.update,
+            multi_match=args.multi_match,
+            obs_command_connection=args.obs_command_connection,
+            obs_stats_interval=args.obs_stats_interval,
+            control_socket_path=args.socket if args.daemon else None,
+            close_event=close_event,
         )
     except Exception as exc:
         logger.error(exc)
@@ -0,0 +1,202 @@
+import contextlib
+import json
+import logging
+import os
+import queue
+import socket
+import tempfile
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Iterator
+
+import mido
+
+from .midi_in import mido_input_opener
+
+if TYPE_CHECKING:
+    from .main import Control
+
+logger = logging.getLogger(__name__)
+
+
+def get_default_socket_path() -> str:
+    if runtime_dir := os.environ.get("XDG_RUNTIME_DIR"):
+        return os.path.join(runtime_dir, "obs-midi.sock")
+
+    # Per user, where there are users
+    name = f"obs-midi-{os.getuid()}.sock" if hasattr(os, "getuid") else "obs-midi.sock"
+    return os.path.join(tempfile.gettempdir(), name)
+
+
+class ControlError(Exception):
+    pass
+
+
+def send_command(path: str, command: str, **arguments: Any) -> Any:
+    """
+    Send a command to a running application, and return its result.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        sock.sendall(json.dumps({"command": command, **arguments}).encode() + b"\n")
+
+        with sock.makefile("rb") as reader:
+            line = reader.readline()
+
+    if not line:
+        raise ControlError("Connection closed")
+
+    response = json.loads(line)
+
+    if not response["ok"]:
+        raise ControlError(response["error"])
+
+    return response["result"]
+
+
+@contextlib.contextmanager
+def _listen(path: str) -> Iterator[socket.socket]:
+    if os.path.exists(path):
+        # Left over by a previous run, unless that one is still running
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            try:
+                sock.connect(path)
+            except ConnectionRefusedError:
+                os.unlink(path)
+            else:
+                raise RuntimeError(f"Already running: {path}")
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        # Only the current user may send commands
+        old_umask = os.umask(0o177)
+
+        try:
+            server.bind(path)
+        finally:
+            os.umask(old_umask)
+
+        try:
+            server.listen()
+            yield server
+        finally:
+            os.unlink(path)
+
+
+class ControlServerThread(threading.Thread):
+    """
+    Serves commands over a Unix domain socket, as JSON lines.
+
+    Each request is an object with a "command" and its arguments, e.g.
+    {"command": "switch_input", "port": "..."}. Each response is either
+    {"ok": true, "result": ...} or {"ok": false, "error": "..."}.
+
+    Connections are served on threads of their own, so that commands never
+    delay MIDI messages.
+    """
+
+    # Upper bound on waits, so that the thread notices when it should stop
+    POLL_INTERVAL = 0.2
+
+    def __init__(
+        self,
+        *,
+        path: str,
+        control: "Control",
+        close_event: threading.Event,
+        error_bucket: queue.Queue[Exception],
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(**kwargs)
+        self._path = path
+        self._control = control
+        self._close_event = close_event
+        self._error_bucket = error_bucket
+        self._connections: set[socket.socket] = set()
+        self._lock = threading.Lock()
+        self._commands: dict[str, Callable[[dict], Any]] = {
+            "status": lambda request: control.get_status(),
+            "stats": lambda request: control.get_stats(),
+            "triggers": lambda request: [
+                str(trigger) for trigger in control.get_triggers()
+            ],
+            "rescan": lambda request: control.reload(),
+            "pause": lambda request: control.pause(),
+            "resume": lambda request: control.resume(),
+            "switch_input": lambda request: control.set_midi_input(
+                # No port means a virtual port
+                mido_input_opener(port=request.get("port"))
+            ),
+            "inject": lambda request: control.inject(
+                # e.g. "control_change channel=0 control=9 value=1"
+                mido.Message.from_str(request["message"])
+            ),
+            "shutdown": lambda request: control.shutdown(),
+        }
+
+    def handle_request(self, line: bytes) -> dict:
+        try:
+            request = json.loads(line)
+            command = request["command"]
+        except (ValueError, TypeError, KeyError):
+            return {"ok": False, "error": "Invalid request"}
+
+        if (handler := self._commands.get(command)) is None:
+            return {"ok": False, "error": f"Unknown command: {command}"}
+
+        logger.info("Command: %s", command)
+
+        try:
+            result = handler(request)
+        except (ValueError, TypeError, LookupError) as exc:
+            return {"ok": False, "error": f"Invalid arguments: {exc}"}
+        except Exception as exc:
+            logger.exception("Command failed: %s", command)
+            return {"ok": False, "error": str(exc)}
+
+        return {"ok": True, "result": result}
+
+    def _serve(self, conn: socket.socket) -> None:
+        try:
+            with conn, conn.makefile("rb") as reader:
+                for line in reader:
+                    response = self.handle_request(line)
+                    conn.sendall(json.dumps(response).encode() + b"\n")
+        except OSError:
+            # Closed by the client, or on stop
+            pass
+        finally:
+            with self._lock:
+                self._connections.discard(conn)
+
+    def run(self) -> None:
+        try:
+            with _listen(self._path) as server:
+                server.settimeout(self.POLL_INTERVAL)
+                logger.info("Listening for commands on %s", self._path)
+
+                while not self._close_event.is_set():
+                    try:
+                        conn, _ = server.accept()
+                    except TimeoutError:
+                        continue
+
+                    conn.settimeout(None)
+
+                    with self._lock:
+                        self._connections.add(conn)
+
+                    threading.Thread(
+                        target=self._serve, args=(conn,), daemon=True
+                    ).start()
+
+                logger.info("Stopping...")
+        except Exception as exc:
+            logger.exception(exc)
+            self._close_event.set()
+            self._error_bucket.put_nowait(exc)
+        finally:
+            with self._lock:
+                for conn in self._connections:
+                    with contextlib.suppress(OSError):
+                        conn.shutdown(socket.SHUT_RDWR)
+
+            logger.info("Stopped")
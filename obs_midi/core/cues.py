@@ -0,0 +1,62 @@
+import bisect
+from typing import Generic, Sequence, TypeVar
+
+from .midi_in import Timecode, timecode_to_frames
+
+T = TypeVar("T")
+
+
+class CueList(Generic[T]):
+    """
+    Items to fire when MTC reaches their timecode.
+
+    Cues are compiled into a sorted index, swapped in as a whole when cues are
+    added. A cursor points at the next cue, so following the timecode costs
+    O(1) per position update, and jumps (locate, loop) reposition the cursor
+    with a binary search.
+    """
+
+    def __init__(self) -> None:
+        self._cues: list[tuple[Timecode, T]] = []
+        # Compiled index: (fps, positions in quarter frames, items)
+        self._index: tuple[int, list[int], list[T]] | None = None
+        self._cursor = 0
+        self._generation = -1
+
+    def __len__(self) -> int:
+        return len(self._cues)
+
+    def add(self, timecode: Timecode, item: T) -> None:
+        self._cues.append((timecode, item))
+        self._index = None
+
+    def _compile(self, fps: int) -> tuple[int, list[int], list[T]]:
+        cues = sorted(self._cues, key=lambda cue: cue[0])
+        positions = [timecode_to_frames(timecode, fps) * 4 for timecode, _ in cues]
+        return (fps, positions, [item for _, item in cues])
+
+    def due(self, position: int, *, fps: int, generation: int) -> Sequence[T]:
+        """
+        Return cues reached since the last call, up to `position` (in quarter
+        frames). After a jump (new `generation`), cues in between are skipped.
+        """
+        index = self._index
+
+        if index is None or index[0] != fps:
+            self._index = index = self._compile(fps)
+            self._generation = -1
+
+        _, positions, items = index
+
+        if generation != self._generation:
+            self._generation = generation
+            self._cursor = bisect.bisect_left(positions, position)
+
+        start = self._cursor
+
+        if start == len(positions) or positions[start] > position:
+            return ()
+
+        end = bisect.bisect_right(positions, position, lo=start)
+        self._cursor = end
+        return items[start:end]
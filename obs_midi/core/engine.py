@@ -0,0 +1,183 @@
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Callable
+
+from .main import INFO_CONTROL, Control, run
+from .midi_in import mido_input_opener
+from .obs_actions import MIDITrigger
+from .obs_init import DiscoveryProgress
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, kw_only=True)
+class EngineConfig:
+    midi_port: str | None
+    obs_port: int
+    obs_password: str
+
+
+class Engine:
+    """
+    Long-lived application, paused and resumed rather than stopped.
+
+    The OBS connection, MIDI input and trigger index stay warm while paused.
+    Reconfiguring only changes what the new config affects: switching MIDI
+    ports keeps OBS connected, and the reverse.
+    """
+
+    def __init__(self) -> None:
+        self.config: EngineConfig | None = None
+        self.info: dict | None = None
+        self._thread: threading.Thread | None = None
+        self._close_event = threading.Event()
+        # Paused before being ready, applied once it is
+        self._paused = False
+        self._lock = threading.Lock()
+        self._on_closed: list[Callable[[], None]] = []
+
+    def start(
+        self,
+        config: EngineConfig,
+        *,
+        on_ready: Callable[[dict], None] = lambda info: None,
+        on_obs_disconnect: Callable[[], None] = lambda: None,
+        on_obs_reconnect: Callable[[], None] = lambda: None,
+        on_discovery_progress: Callable[[DiscoveryProgress], None] = (
+            lambda progress: None
+        ),
+        on_error: Callable[[Exception], None] = lambda exc: None,
+        on_stopped: Callable[[], None] = lambda: None,
+    ) -> None:
+        assert not self.is_running(), "Engine is already running"
+        self.config = config
+        self.info = None
+        self._paused = False
+        self._close_event.clear()
+
+        def _on_ready(info: dict) -> None:
+            with self._lock:
+                self.info = info
+                paused = self._paused
+
+            if paused:
+                info[INFO_CONTROL].pause()
+
+            on_ready(info)
+
+        def _run() -> None:
+            logger.info("Engine thread has started")
+
+            try:
+                run(
+                    midi_input_opener=mido_input_opener(port=config.midi_port),
+                    obs_port=config.obs_port,
+                    obs_password=config.obs_password,
+                    on_ready=_on_ready,
+                    on_obs_disconnect=on_obs_disconnect,
+                    on_obs_reconnect=on_obs_reconnect,
+                    on_discovery_progress=on_discovery_progress,
+                    close_event=self._close_event,
+                )
+            except Exception as exc:
+                logger.exception("Engine returned an error: %s", repr(exc))
+                on_error(exc)
+            else:
+                logger.info("Engine has stopped")
+                on_stopped()
+            finally:
+                with self._lock:
+                    on_closed, self._on_closed = self._on_closed, []
+
+                    if self._thread is threading.current_thread():
+                        self._thread = None
+
+                for cb in on_closed:
+                    cb()
+
+        logger.info("Starting engine thread")
+        t = threading.Thread(target=_run)
+        t.daemon = True
+
+        with self._lock:
+            self._thread = t
+
+        t.start()
+
+    def is_running(self) -> bool:
+        return (thread := self._thread) is not None and thread.is_alive()
+
+    def is_ready(self) -> bool:
+        return self.is_running() and self._get_control() is not None
+
+    def _get_control(self) -> Control | None:
+        return None if self.info is None else self.info.get(INFO_CONTROL)
+
+    def is_paused(self) -> bool:
+        control = self._get_control()
+        return control is not None and control.is_paused()
+
+    def get_triggers(self) -> list[MIDITrigger]:
+        control = self._get_control()
+        return [] if control is None else control.get_triggers()
+
+    def pause(self) -> None:
+        with self._lock:
+            self._paused = True
+            control = self._get_control()
+
+        if control is not None:
+            control.pause()
+
+    def resume(self) -> None:
+        with self._lock:
+            self._paused = False
+            control = self._get_control()
+
+        if control is not None:
+            control.resume()
+
+    def reload(self) -> None:
+        if (control := self._get_control()) is not None:
+            control.reload()
+
+    def reconfigure(self, config: EngineConfig) -> None:
+        """
+        Apply a new config to the running engine, then resume it. Raise if
+        the MIDI input can't be switched, the engine then stays paused.
+        """
+        control = self._get_control()
+        assert control is not None and self.config is not None, "Engine is not ready"
+
+        if config.midi_port != self.config.midi_port:
+            logger.info("Switching MIDI port")
+            control.set_midi_input(mido_input_opener(port=config.midi_port))
+
+        if (config.obs_port, config.obs_password) != (
+            self.config.obs_port,
+            self.config.obs_password,
+        ):
+            logger.info("Switching OBS connection")
+            control.set_obs_connection(config.obs_port, config.obs_password)
+
+        self.config = config
+        self.resume()
+
+    def close(self, on_closed: Callable[[], None] = lambda: None) -> None:
+        """
+        Stop the engine, without waiting. `on_closed` is called once stopped,
+        from the engine thread (or at once if it isn't running).
+        """
+        self._close_event.set()
+
+        with self._lock:
+            if self._thread is not None:
+                self._on_closed.append(on_closed)
+                return
+
+        on_closed()
+
+    def join(self, timeout: float | None = None) -> None:
+        if (thread := self._thread) is not None:
+            thread.join(timeout)
@@ -0,0 +1,332 @@
+import logging
+import logging.config
+import multiprocessing
+import queue
+import threading
+from multiprocessing.connection import Connection
+from typing import Any, Callable
+
+from ..logging import LOGGING_CONFIG
+from .engine import EngineConfig
+from .main import (
+    INFO_CONTROL,
+    INFO_MIDI_INPUT_PORT_NAME,
+    INFO_MIDI_TRIGGERS,
+    INFO_MONITOR,
+    Control,
+    run,
+)
+from .midi_in import mido_input_opener
+from .monitor import SharedMonitor
+from .obs_actions import MIDITrigger
+from .obs_init import DiscoveryProgress
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on waits, so that threads notice when they should stop
+POLL_INTERVAL = 0.2
+# Seconds to wait for the engine process to switch MIDI inputs
+SWITCH_TIMEOUT = 2 * Control.SWITCH_TIMEOUT
+
+
+def _run_child(config: EngineConfig, conn: Connection, monitor_buffer: Any) -> None:
+    """
+    Engine process: run the application, report lifecycle events over the
+    pipe, and apply commands received from it.
+    """
+    logging.config.dictConfig(LOGGING_CONFIG)
+    close_event = threading.Event()
+    send_lock = threading.Lock()
+    info: dict = {}
+
+    def send(*event: Any) -> None:
+        with send_lock:
+            conn.send(event)
+
+    def on_ready(ready_info: dict) -> None:
+        info.update(ready_info)
+        send(
+            "ready",
+            ready_info[INFO_MIDI_INPUT_PORT_NAME],
+            ready_info[INFO_MIDI_TRIGGERS],
+        )
+
+    def on_discovery_progress(progress: DiscoveryProgress) -> None:
+        # Triggers are only sent once complete, there may be many of them
+        control: Control | None = info.get(INFO_CONTROL)
+        triggers = (
+            control.get_triggers() if progress.done and control is not None else None
+        )
+        send("progress", progress, triggers)
+
+    def apply(control: Control, command: str, *args: Any) -> None:
+        match command:
+            case "pause":
+                control.pause()
+            case "resume":
+                control.resume()
+            case "reload":
+                control.reload()
+            case "set_midi_input":
+                # Answered, the GUI waits for the switch
+                try:
+                    control.set_midi_input(mido_input_opener(port=args[0]))
+                except Exception as exc:
+                    send("midi_input_switched", str(exc) or repr(exc))
+                else:
+                    send("midi_input_switched", None)
+            case "set_obs_connection":
+                control.set_obs_connection(*args)
+
+    def apply_commands() -> None:
+        # Commands received before the engine is ready (e.g. pause) are
+        # applied once it is, in order, so that the GUI and the engine agree
+        pending: list[tuple] = []
+
+        while not close_event.is_set():
+            control: Control | None = info.get(INFO_CONTROL)
+
+            if control is not None:
+                for command in pending:
+                    apply(control, *command)
+
+                pending.clear()
+
+            try:
+                if not conn.poll(POLL_INTERVAL):
+                    continue
+
+                command = conn.recv()
+            except EOFError:
+                logger.error("GUI is gone, stopping")
+                close_event.set()
+                return
+
+            if command[0] == "close":
+                close_event.set()
+                return
+
+            pending.append(command)
+
+    threading.Thread(target=apply_commands, daemon=True).start()
+
+    try:
+        run(
+            midi_input_opener=mido_input_opener(port=config.midi_port),
+            obs_port=config.obs_port,
+            obs_password=config.obs_password,
+            on_ready=on_ready,
+            on_obs_disconnect=lambda: send("obs_disconnect"),
+            on_obs_reconnect=lambda: send("obs_reconnect"),
+            on_discovery_progress=on_discovery_progress,
+            monitor=SharedMonitor(monitor_buffer),
+            close_event=close_event,
+        )
+    except Exception as exc:
+        logger.exception("Engine returned an error: %s", repr(exc))
+        # Exceptions may not be picklable, their message is
+        send("error", repr(exc), str(exc))
+    else:
+        send("stopped")
+
+
+class EngineProcessError(Exception):
+    pass
+
+
+class ProcessEngine:
+    """
+    Same as Engine, but runs the application in a child process.
+
+    The GUI and the MIDI to OBS path then don't share an interpreter (nor its
+    GIL), so that GUI work can't delay dispatch. Commands and lifecycle
+    events go through a pipe, monitor entries through shared memory.
+    """
+
+    def __init__(self) -> None:
+        self.config: EngineConfig | None = None
+        self.info: dict | None = None
+        self._process: multiprocessing.process.BaseProcess | None = None
+        self._conn: Connection | None = None
+        self._paused = False
+        # As of the last report from the engine process
+        self._triggers: list[MIDITrigger] = []
+        self._lock = threading.Lock()
+        self._on_closed: list[Callable[[], None]] = []
+        # Errors of MIDI input switches, None on success
+        self._switch_results: queue.SimpleQueue[str | None] = queue.SimpleQueue()
+
+    def start(
+        self,
+        config: EngineConfig,
+        *,
+        on_ready: Callable[[dict], None] = lambda info: None,
+        on_obs_disconnect: Callable[[], None] = lambda: None,
+        on_obs_reconnect: Callable[[], None] = lambda: None,
+        on_discovery_progress: Callable[[DiscoveryProgress], None] = (
+            lambda progress: None
+        ),
+        on_error: Callable[[Exception], None] = lambda exc: None,
+        on_stopped: Callable[[], None] = lambda: None,
+    ) -> None:
+        assert not self.is_running(), "Engine is already running"
+        self.config = config
+        self.info = None
+        self._paused = False
+        monitor = SharedMonitor.allocate()
+        # Same start method on all platforms, and no Tk state in the child
+        context = multiprocessing.get_context("spawn")
+        conn, child_conn = context.Pipe()
+        process = context.Process(
+            target=_run_child,
+            args=(config, child_conn, monitor.buffer),
+            name="engine",
+            daemon=True,
+        )
+
+        def _receive_events() -> None:
+            # Lifecycle events, passed on to callbacks from this thread
+            try:
+                while True:
+                    try:
+                        event, *args = conn.recv()
+                    except (EOFError, OSError):
+                        break
+
+                    match event:
+                        case "ready":
+                            port_name, triggers = args
+                            self._triggers = triggers
+                            self.info = {
+                                INFO_MIDI_INPUT_PORT_NAME: port_name,
+                                INFO_MIDI_TRIGGERS: triggers,
+                                INFO_MONITOR: monitor,
+                            }
+                            on_ready(self.info)
+                        case "progress":
+                            progress, triggers = args
+
+                            if progress.done and triggers is not None:
+                                self._triggers = triggers
+
+                            on_discovery_progress(progress)
+                        case "midi_input_switched":
+                            self._switch_results.put(args[0])
+                        case "obs_disconnect":
+                            on_obs_disconnect()
+                        case "obs_reconnect":
+                            on_obs_reconnect()
+                        case "error":
+                            on_error(EngineProcessError(args[1] or args[0]))
+                        case "stopped":
+                            on_stopped()
+            finally:
+                process.join()
+                logger.info("Engine process has stopped")
+
+                with self._lock:
+                    on_closed, self._on_closed = self._on_closed, []
+
+                    if self._process is process:
+                        self._process = None
+                        self._conn = None
+
+                for cb in on_closed:
+                    cb()
+
+        logger.info("Starting engine process")
+        process.start()
+        # Only the child uses its end
+        child_conn.close()
+
+        with self._lock:
+            self._process = process
+            self._conn = conn
+
+        threading.Thread(target=_receive_events, daemon=True).start()
+
+    def _send(self, *command: Any) -> None:
+        if (conn := self._conn) is None:
+            return
+
+        try:
+            conn.send(command)
+        except OSError:
+            # Stopped meanwhile
+            pass
+
+    def is_running(self) -> bool:
+        return (process := self._process) is not None and process.is_alive()
+
+    def is_ready(self) -> bool:
+        return self.is_running() and self.info is not None
+
+    def is_paused(self) -> bool:
+        return self.is_ready() and self._paused
+
+    def get_triggers(self) -> list[MIDITrigger]:
+        return self._triggers if self.is_ready() else []
+
+    def pause(self) -> None:
+        self._paused = True
+        self._send("pause")
+
+    def resume(self) -> None:
+        self._paused = False
+        self._send("resume")
+
+    def reload(self) -> None:
+        self._send("reload")
+
+    def reconfigure(self, config: EngineConfig) -> None:
+        """
+        Apply a new config to the running engine, then resume it. Raise if
+        the MIDI input can't be switched, the engine then stays paused.
+        """
+        assert self.is_ready() and self.config is not None, "Engine is not ready"
+
+        if config.midi_port != self.config.midi_port:
+            logger.info("Switching MIDI port")
+            self._switch_midi_input(config.midi_port)
+
+        if (config.obs_port, config.obs_password) != (
+            self.config.obs_port,
+            self.config.obs_password,
+        ):
+            logger.info("Switching OBS connection")
+            self._send("set_obs_connection", config.obs_port, config.obs_password)
+
+        self.config = config
+        self.resume()
+
+    def _switch_midi_input(self, port: str | None) -> None:
+        # Answers to switches that timed out are stale
+        while not self._switch_results.empty():
+            self._switch_results.get_nowait()
+
+        self._send("set_midi_input", port)
+
+        try:
+            error = self._switch_results.get(timeout=SWITCH_TIMEOUT)
+        except queue.Empty:
+            raise EngineProcessError("Timed out switching MIDI input") from None
+
+        if error is not None:
+            raise EngineProcessError(error)
+
+    def close(self, on_closed: Callable[[], None] = lambda: None) -> None:
+        """
+        Stop the engine, without waiting. `on_closed` is called once stopped,
+        from a background thread (or at once if it isn't running).
+        """
+        with self._lock:
+            if self._process is not None:
+                self._on_closed.append(on_closed)
+                self._send("close")
+                return
+
+        on_closed()
+
+    def join(self, timeout: float | None = None) -> None:
+        if (process := self._process) is not None:
+            process.join(timeout)
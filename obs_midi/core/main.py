@@ -1,19 +1,151 @@
+import dataclasses
+import functools
 import logging
 import logging.config
 import queue
 import threading
-from typing import Callable
+from typing import Callable, Iterable
 
-from .midi_in import MIDInputOpener, MIDInputThread
-from .obs_actions import ObsActions
+import mido
+
+from .control_socket import ControlServerThread
+from .midi_in import (
+    HANDLER_INLINE,
+    MIDInputOpener,
+    MIDInputThread,
+    ParameterDecoder,
+)
+from .monitor import Monitor, SharedMonitor
+from .obs_actions import MIDITrigger, ObsActions
 from .obs_client import ObsClient
 from .obs_events import ObsEventsThread
-from .obs_init import ObsInitThread
+from .obs_init import DiscoveryProgress, ObsInitThread
+from .obs_stats import ObsStatsMonitor, ObsStatsThread
+from .obs_updates import ObsUpdatesThread
+from .scene_collections import get_scene_collections_dir
+from .scheduler import SchedulerThread
 
 logger = logging.getLogger(__name__)
 
 INFO_MIDI_INPUT_PORT_NAME = "midi_input_port_name"
 INFO_MIDI_TRIGGERS = "midi_triggers"
+INFO_OBS_CONNECTION_STATS = "obs_connection_stats"
+INFO_OBS_THROTTLE = "obs_throttle"
+INFO_CONTROL = "control"
+INFO_MONITOR = "monitor"
+
+
+class Control:
+    """
+    Changes applied to the application while it runs, without restarting it.
+    """
+
+    # Seconds to wait for another MIDI input to open
+    SWITCH_TIMEOUT = 5.0
+
+    def __init__(
+        self,
+        *,
+        midi_input_thread: MIDInputThread,
+        clients: Iterable[ObsClient],
+        obs_actions: ObsActions,
+        obs_init_thread: ObsInitThread,
+        rediscover_event: threading.Event,
+        close_event: threading.Event,
+    ) -> None:
+        self._midi_input_thread = midi_input_thread
+        self._obs_init_thread = obs_init_thread
+        self._obs_actions = obs_actions
+        self._clients = list(clients)
+        self._rediscover_event = rediscover_event
+        self._close_event = close_event
+
+    def pause(self) -> None:
+        # OBS stays connected, and its state mirrored
+        self._midi_input_thread.pause()
+        logger.info("Paused")
+
+    def resume(self) -> None:
+        self._midi_input_thread.resume()
+        logger.info("Resumed")
+
+    def is_paused(self) -> bool:
+        return self._midi_input_thread.is_paused()
+
+    def reload(self) -> None:
+        # Triggers are read from names in OBS again
+        self._obs_init_thread.reload()
+
+    def set_midi_input(self, input_opener: MIDInputOpener) -> str:
+        """
+        Switch MIDI inputs, and return the name of the port once open. If it
+        can't be opened, the error is raised and the previous input is kept.
+        """
+        switched = self._midi_input_thread.reopen(input_opener)
+        return switched.result(timeout=self.SWITCH_TIMEOUT)
+
+    def set_obs_connection(self, port: int, password: str) -> None:
+        # May be another OBS: actions are reset, and discovered again once
+        # reconnected
+        self._rediscover_event.set()
+
+        for client in self._clients:
+            client.configure(port=port, password=password)
+
+    def inject(self, msg: mido.Message) -> None:
+        self._midi_input_thread.inject(msg)
+
+    def shutdown(self) -> None:
+        self._close_event.set()
+
+    def get_triggers(self) -> list[MIDITrigger]:
+        # Current ones, as filters are found and triggers reloaded
+        return self._obs_actions.get_triggers()
+
+    def get_status(self) -> dict:
+        return {
+            "ready": self._obs_init_thread.progress.scenes_ready,
+            "paused": self.is_paused(),
+            "midi_input_port": self._midi_input_thread.get_port_name(),
+            "obs_connected": {c.name: c.is_connected() for c in self._clients},
+            "discovery": str(self._obs_init_thread.progress),
+            "scene_collection": (
+                self._obs_actions.state.get_current_scene_collection()
+            ),
+            "timecode_running": self._obs_actions.timecode.running,
+        }
+
+    def get_stats(self) -> dict:
+        obs_actions = self._obs_actions
+        scheduler = obs_actions.scheduler
+        buffer = obs_actions.buffer
+        return {
+            "obs_connections": {
+                c.name: {**dataclasses.asdict(c.stats), "latency": c.latency}
+                for c in self._clients
+            },
+            "throttle": {
+                "level": obs_actions.throttle.level,
+                "throttled_actions": obs_actions.throttle.throttled_actions,
+            },
+            "scheduler": {
+                "pending": scheduler.pending(),
+                "fired": scheduler.fired,
+                "mean_lateness": scheduler.mean_lateness,
+                "max_lateness": scheduler.max_lateness,
+            },
+            "buffer": {
+                "size": len(buffer),
+                "buffered": buffer.buffered,
+                "dropped": buffer.dropped,
+                "replayed": buffer.replayed,
+            },
+            "elided_requests": dict(obs_actions.state.elided),
+            "midi_handlers": {
+                stats.name: {**dataclasses.asdict(stats), "mean_time": stats.mean_time}
+                for stats in self._midi_input_thread.get_handler_stats()
+            },
+        }
 
 
 def run(
@@ -24,57 +156,206 @@ def run(
     on_ready: Callable[[dict], None] = lambda info: None,
     on_obs_disconnect: Callable[[], None] = lambda: None,
     on_obs_reconnect: Callable[[], None] = lambda: None,
+    on_discovery_progress: Callable[[DiscoveryProgress], None] = lambda progress: None,
     obs_reconnect_delay: float = 2,
+    obs_heartbeat_interval: float | None = 1,
+    obs_heartbeat_timeout: float = 3,
+    obs_update_rate: float = 60,
+    obs_stats_interval: float | None = None,
+    multi_match: bool = False,
+    obs_command_connection: bool = False,
+    control_socket_path: str | None = None,
+    monitor: Monitor | SharedMonitor | None = None,
     close_event: threading.Event | None = None,
 ) -> None:
     if close_event is None:
         close_event = threading.Event()
 
     error_bucket: queue.Queue[Exception] = queue.Queue()
-    client = ObsClient(port=obs_port, password=obs_password)
-    obs_actions = ObsActions()
-    start_barrier = threading.Barrier(3)
+    client = ObsClient(
+        port=obs_port,
+        password=obs_password,
+        heartbeat_interval=obs_heartbeat_interval,
+        heartbeat_timeout=obs_heartbeat_timeout,
+    )
+
+    if obs_command_connection:
+        # Actions get a lean connection of their own, so they are never
+        # queued behind discovery responses or event bursts.
+        command_client = ObsClient(
+            port=obs_port,
+            password=obs_password,
+            name="commands",
+            event_subscriptions=0,
+            heartbeat_interval=obs_heartbeat_interval,
+            heartbeat_timeout=obs_heartbeat_timeout,
+        )
+        client.name = "events"
+    else:
+        command_client = client
+
+    obs_actions = ObsActions(multi_match=multi_match)
+    info: dict = {}
+    start_barrier = threading.Barrier(4 if obs_command_connection else 3)
 
     midi_input_thread = MIDInputThread(
         input_opener=midi_input_opener,
         start_barrier=start_barrier,
         close_event=close_event,
         error_bucket=error_bucket,
+        clock=obs_actions.clock,
+        timecode=obs_actions.timecode,
+        decoder=ParameterDecoder(is_high_res=obs_actions.has_high_res_trigger),
+        on_open=functools.partial(info.__setitem__, INFO_MIDI_INPUT_PORT_NAME),
         daemon=True,
     )
+    if monitor is None:
+        monitor = Monitor()
+
+    def _dispatch(msg: mido.Message) -> None:
+        matched = obs_actions.process(msg, client=command_client)
+
+        if msg.type != "quarter_frame":
+            # Timecode is too frequent to be worth monitoring
+            monitor.record(msg, matched)
+
+    # Triggers are matched in the MIDI callback, for the lowest latency. It is
+    # also the only writer of the monitor.
     midi_input_thread.add_message_handler(
-        lambda msg: obs_actions.process(msg, client=client)
+        _dispatch, policy=HANDLER_INLINE, name="dispatch"
     )
 
     ws_open_event = threading.Event()
+    obs_rediscover_event = threading.Event()
 
     obs_init_thread = ObsInitThread(
         client,
         obs_actions=obs_actions,
         ws_open_event=ws_open_event,
         close_event=close_event,
+        on_progress=on_discovery_progress,
+        scene_collections_dir=get_scene_collections_dir(),
         daemon=True,
     )
 
+    def _on_obs_disconnect() -> None:
+        obs_actions.state.clear()
+        on_obs_disconnect()
+
+    def _on_obs_reconnect() -> None:
+        # The state mirror follows the events connection, see below
+        obs_actions.replay(command_client)
+        on_obs_reconnect()
+
+    def _on_obs_events_reconnect() -> None:
+        # Events were missed while disconnected, and responses to discovery
+        # requests are lost with the connection: discover again, which seeds
+        # the state mirror anew. Item IDs are kept until then.
+        if obs_rediscover_event.is_set():
+            # Connected to another OBS, nothing found before applies
+            obs_rediscover_event.clear()
+            obs_actions.reset()
+        else:
+            obs_actions.state.clear()
+
+        obs_init_thread.rediscover()
+
+        # With a command connection, buffered actions are replayed over it
+        if obs_command_connection:
+            on_obs_reconnect()
+        else:
+            _on_obs_reconnect()
+
     obs_events_thread = ObsEventsThread(
         client=client,
         open_event=ws_open_event,
         start_barrier=start_barrier,
         close_event=close_event,
         error_bucket=error_bucket,
-        on_disconnect=on_obs_disconnect,
-        on_reconnect=on_obs_reconnect,
+        on_disconnect=_on_obs_disconnect,
+        on_reconnect=_on_obs_events_reconnect,
         reconnect_delay=obs_reconnect_delay,
         daemon=True,
     )
     obs_events_thread.add_event_handler(obs_init_thread.handle_event)
+    obs_events_thread.add_event_handler(obs_actions.state.handle_event)
+    obs_events_thread.add_event_handler(client.track_latency)
+
+    threads: list[threading.Thread] = [obs_events_thread]
+
+    if obs_command_connection:
+        # Only receives responses to actions
+        obs_commands_thread = ObsEventsThread(
+            client=command_client,
+            open_event=threading.Event(),
+            start_barrier=start_barrier,
+            close_event=close_event,
+            error_bucket=error_bucket,
+            on_disconnect=on_obs_disconnect,
+            on_reconnect=_on_obs_reconnect,
+            reconnect_delay=obs_reconnect_delay,
+            daemon=True,
+        )
+        obs_commands_thread.add_event_handler(command_client.track_latency)
+        threads.append(obs_commands_thread)
+
+    obs_updates_thread = ObsUpdatesThread(
+        client=command_client,
+        pending_updates=obs_actions.pending_updates,
+        rate=obs_update_rate,
+        throttle=obs_actions.throttle,
+        close_event=close_event,
+        error_bucket=error_bucket,
+        daemon=True,
+    )
+
+    if obs_stats_interval is not None:
+        # Throttles outbound traffic when OBS lags
+        obs_stats_monitor = ObsStatsMonitor(obs_actions.throttle)
+        obs_events_thread.add_event_handler(obs_stats_monitor.handle_event)
+        obs_stats_thread = ObsStatsThread(
+            client=client,
+            interval=obs_stats_interval,
+            close_event=close_event,
+            error_bucket=error_bucket,
+            daemon=True,
+        )
+        threads.append(obs_stats_thread)
+
+    scheduler_thread = SchedulerThread(
+        scheduler=obs_actions.scheduler,
+        close_event=close_event,
+        error_bucket=error_bucket,
+        daemon=True,
+    )
 
-    threads = [
+    threads += [
         midi_input_thread,
-        obs_events_thread,
         obs_init_thread,
+        obs_updates_thread,
+        scheduler_thread,
     ]
 
+    control = Control(
+        midi_input_thread=midi_input_thread,
+        clients={client, command_client},
+        obs_actions=obs_actions,
+        obs_init_thread=obs_init_thread,
+        rediscover_event=obs_rediscover_event,
+        close_event=close_event,
+    )
+
+    if control_socket_path is not None:
+        # Commands are handled on threads of their own, off the MIDI callback
+        control_server_thread = ControlServerThread(
+            path=control_socket_path,
+            control=control,
+            close_event=close_event,
+            error_bucket=error_bucket,
+            daemon=True,
+        )
+        threads.append(control_server_thread)
+
     for thread in threads:
         thread.start()
 
@@ -84,13 +365,19 @@ def run(
         except threading.BrokenBarrierError:
             logger.error("Aborting...")
         else:
-            obs_init_thread.join()
-            info = {
-                INFO_MIDI_INPUT_PORT_NAME: midi_input_thread.get_port_name(),
-                INFO_MIDI_TRIGGERS: obs_actions.get_triggers(),
-            }
-            on_ready(info)
-            logger.info("Ready")
+            # Scene triggers are live, filter triggers are armed as they come
+            if obs_init_thread.wait_scenes_ready():
+                # As of now, see Control.get_triggers() afterwards
+                info[INFO_MIDI_TRIGGERS] = obs_actions.get_triggers()
+                # Live counters, by connection name
+                info[INFO_OBS_CONNECTION_STATS] = {
+                    c.name: c.stats for c in {client, command_client}
+                }
+                info[INFO_OBS_THROTTLE] = obs_actions.throttle
+                info[INFO_MONITOR] = monitor
+                info[INFO_CONTROL] = control
+                on_ready(info)
+                logger.info("Ready")
 
             close_event.wait()
             logger.info("Stopping...")
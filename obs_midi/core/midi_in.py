@@ -1,7 +1,11 @@
+import collections
 import contextlib
 import logging
 import queue
 import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
 from typing import Any, Callable, ContextManager, Iterator
 
 import mido
@@ -34,7 +38,520 @@ def mido_input_opener(*, port: str | None) -> MIDInputOpener:
     return _open_midi_input
 
 
+class MIDIClock:
+    """
+    Position and tempo tracking from incoming MIDI clock.
+
+    Per the MIDI spec, clock ticks are sent 24 times per beat, and the first
+    tick after Start is the first beat.
+    """
+
+    TICKS_PER_BEAT = 24
+    BEATS_PER_BAR = 4
+    # Weight of the latest tick interval in the tempo estimate
+    SMOOTHING = 0.05
+    # Longer gaps between ticks mean the clock was interrupted
+    MAX_TICK_INTERVAL = 0.25
+
+    def __init__(self) -> None:
+        self.running = False
+        # Ticks since Start, -1 before the first tick
+        self.ticks = -1
+        self._last_tick_at: float | None = None
+        self._tick_interval: float | None = None
+
+    @property
+    def bpm(self) -> float | None:
+        if self._tick_interval is None:
+            return None
+
+        return 60 / (self._tick_interval * self.TICKS_PER_BEAT)
+
+    def process(self, msg: mido.Message) -> bool:
+        """
+        Update the clock from a message. Return whether it was a clock tick,
+        which are too frequent to be worth logging or dispatching.
+        """
+        match msg.type:
+            case "clock":
+                self._tick()
+                return True
+
+            case "start":
+                self.running = True
+                self.ticks = -1
+
+            case "continue":
+                self.running = True
+
+            case "stop":
+                self.running = False
+
+            case "songpos":
+                # Song position is counted in 16th notes
+                self.ticks = msg.pos * self.TICKS_PER_BEAT // 4 - 1
+
+        return False
+
+    def _tick(self) -> None:
+        now = time.monotonic()
+
+        if (
+            self._last_tick_at is not None
+            and (interval := now - self._last_tick_at) <= self.MAX_TICK_INTERVAL
+        ):
+            if self._tick_interval is None:
+                self._tick_interval = interval
+            else:
+                self._tick_interval += self.SMOOTHING * (interval - self._tick_interval)
+
+        self._last_tick_at = now
+
+        if self.running:
+            self.ticks += 1
+
+    def time_to_boundary(self, ticks: int, *, after: float = 0) -> float | None:
+        """
+        Seconds until the next multiple of `ticks` (e.g. next beat or bar) that
+        is at least `after` seconds from now, or None if the clock isn't running.
+        """
+        if (
+            not self.running
+            or self.ticks < 0
+            or self._tick_interval is None
+            or self._last_tick_at is None
+        ):
+            return None
+
+        since_last_tick = time.monotonic() - self._last_tick_at
+        position = self.ticks + (since_last_tick + after) / self._tick_interval
+        boundary = (int(position) // ticks + 1) * ticks
+        return (boundary - self.ticks) * self._tick_interval - since_last_tick
+
+
+# MTC frame rates, by rate code. Drop-frame 29.97 is counted as 30 frames
+# per second: timecodes are labels, and cue positions are computed the same way.
+MTC_FRAME_RATES = (24, 25, 30, 30)
+
+Timecode = tuple[int, int, int, int]  # Hours, minutes, seconds, frames
+
+
+def timecode_to_frames(timecode: Timecode, fps: int) -> int:
+    hours, minutes, seconds, frames = timecode
+    return ((hours * 60 + minutes) * 60 + seconds) * fps + frames
+
+
+class MIDITimecode:
+    """
+    Running position decoded from MIDI Time Code (MTC).
+
+    Positions are counted in quarter frames. Quarter frame messages advance it
+    by one, and every 8 messages (2 frames) the full timecode they carry
+    resynchronizes it. Full frame messages (sent on locate) set it directly.
+    """
+
+    # No quarter frame for this long means playback stopped or the cable
+    # was unplugged. The position holds until quarter frames resume.
+    DROPOUT_TIMEOUT = 0.2
+    # Resynchronizations further than this from the running position are
+    # jumps (e.g. locate or loop), in quarter frames
+    MAX_DRIFT = 8
+
+    def __init__(self) -> None:
+        self.fps = 30
+        self.position = -1
+        # Incremented on every discontinuity
+        self.generation = 0
+        self._pieces = [0] * 8
+        self._next_piece = 0
+        self._last_quarter_frame_at = 0.0
+
+    @property
+    def running(self) -> bool:
+        return (
+            self.position >= 0
+            and time.monotonic() - self._last_quarter_frame_at <= self.DROPOUT_TIMEOUT
+        )
+
+    def process(self, msg: mido.Message) -> bool:
+        """
+        Update the position from a message. Return whether it was MTC.
+        """
+        if msg.type == "quarter_frame":
+            self._quarter_frame(msg.frame_type, msg.frame_value)
+            return True
+
+        if msg.type == "sysex" and self._full_frame(msg.data):
+            return True
+
+        return False
+
+    def skip(self) -> None:
+        """
+        Make the current position a discontinuity, e.g. after ignoring MTC for
+        a while: cues up to it are skipped rather than fired at once.
+        """
+        self.generation += 1
+
+    def _quarter_frame(self, piece: int, value: int) -> None:
+        now = time.monotonic()
+
+        if now - self._last_quarter_frame_at > self.DROPOUT_TIMEOUT:
+            # Resuming after a dropout, the piece sequence starts over, and
+            # cues passed while stopped are skipped
+            self._next_piece = 0
+
+            if self.position >= 0:
+                self.skip()
+
+        self._last_quarter_frame_at = now
+
+        if self.position >= 0:
+            self.position += 1
+
+        if piece != self._next_piece:
+            # Out of sequence (e.g. reverse playback), wait for a new sequence
+            self._next_piece = 0
+            return
+
+        self._pieces[piece] = value
+        self._next_piece = (piece + 1) % 8
+
+        if piece != 7:
+            return
+
+        p = self._pieces
+        self.fps = MTC_FRAME_RATES[(p[7] >> 1) & 0b11]
+        timecode = (
+            p[6] | (p[7] & 0b1) << 4,
+            p[4] | p[5] << 4,
+            p[2] | p[3] << 4,
+            p[0] | p[1] << 4,
+        )
+        # The timecode is the one of the frame where piece 0 was sent
+        self._set_position(timecode_to_frames(timecode, self.fps) * 4 + 7)
+
+    def _full_frame(self, data: Any) -> bool:
+        # F0 7F <device> 01 01 hh mm ss ff F7
+        if len(data) != 8 or data[0] != 0x7F or data[2] != 0x01 or data[3] != 0x01:
+            return False
+
+        self.fps = MTC_FRAME_RATES[(data[4] >> 5) & 0b11]
+        timecode = (data[4] & 0b11111, data[5], data[6], data[7])
+        self._next_piece = 0
+        self.position = -1  # Always a jump
+        self._set_position(timecode_to_frames(timecode, self.fps) * 4)
+        return True
+
+    def _set_position(self, position: int) -> None:
+        if self.position < 0 or abs(position - self.position) > self.MAX_DRIFT:
+            self.generation += 1
+
+        self.position = position
+
+
+class ParameterEvent:
+    """
+    A logical event assembled from several CC messages: a 14-bit CC value
+    (MSB/LSB pair) or an NRPN/RPN value.
+
+    Looks like a mido message to message handlers. Instances are reused by
+    the decoder, so they are only valid while being dispatched.
+    """
+
+    __slots__ = ("type", "channel", "number", "value")
+
+    TYPE_HIGH_RES_CONTROL_CHANGE = "hr_control_change"
+    TYPE_NRPN = "nrpn"
+    TYPE_RPN = "rpn"
+
+    def __init__(self, type: str, channel: int) -> None:
+        self.type = type
+        self.channel = channel  # 0-based, as in mido
+        self.number = 0
+        self.value = 0
+
+    def dict(self) -> dict:
+        return {
+            "type": self.type,
+            "channel": self.channel,
+            "number": self.number,
+            "value": self.value,
+        }
+
+    def copy(self) -> "ParameterEvent":
+        event = ParameterEvent(self.type, self.channel)
+        event.number = self.number
+        event.value = self.value
+        return event
+
+    def __str__(self) -> str:
+        return (
+            f"{self.type} channel={self.channel} number={self.number} "
+            f"value={self.value}"
+        )
+
+
+# Controller numbers
+_CC_DATA_ENTRY_MSB = 6
+_CC_DATA_ENTRY_LSB = 38
+_CC_NRPN_LSB = 98
+_CC_NRPN_MSB = 99
+_CC_RPN_LSB = 100
+_CC_RPN_MSB = 101
+
+# Parameter number selected on a channel
+_PARAM_NONE = 0
+_PARAM_NRPN = 1
+_PARAM_RPN = 2
+
+
+class ParameterDecoder:
+    """
+    Assembles 14-bit CC pairs and NRPN/RPN sequences, with fixed-size state
+    per channel.
+
+    * 14-bit CC: CC 0-31 set the MSB, the matching CC 32-63 set the LSB and
+    complete the value. Controllers that never sent an LSB emit a value on the
+    MSB alone, as some only send the MSB. Values are only emitted for
+    controllers `is_high_res(channel, control)` accepts, e.g. those with a
+    14-bit trigger, so that plain controllers aren't seen twice.
+    * NRPN/RPN: CC 99/98 (NRPN) or CC 101/100 (RPN) select the parameter, then
+    CC 6 sets the value MSB, and CC 38 the LSB. A value is emitted on both,
+    unless the LSB leaves the value unchanged. Selecting parameter 127/127
+    (the null parameter) deselects.
+    """
+
+    def __init__(
+        self, is_high_res: Callable[[int, int], bool] = lambda channel, control: True
+    ) -> None:
+        self._is_high_res = is_high_res
+        self._msb = bytearray(16 * 32)
+        self._lsb_seen = bytearray(16 * 32)
+        self._param_kind = bytearray(16)
+        self._param_msb = bytearray(16)
+        self._param_lsb = bytearray(16)
+        self._data_msb = bytearray(16)
+        # Value emitted on the last data entry MSB, if not followed by the LSB yet
+        self._msb_value = [-1] * 16
+        self._high_res_events = [
+            ParameterEvent(ParameterEvent.TYPE_HIGH_RES_CONTROL_CHANGE, channel)
+            for channel in range(16)
+        ]
+        self._nrpn_events = [
+            ParameterEvent(ParameterEvent.TYPE_NRPN, channel) for channel in range(16)
+        ]
+        self._rpn_events = [
+            ParameterEvent(ParameterEvent.TYPE_RPN, channel) for channel in range(16)
+        ]
+
+    def process(self, msg: mido.Message) -> ParameterEvent | None:
+        if msg.type != "control_change":
+            return None
+
+        channel = msg.channel
+        control = msg.control
+        value = msg.value
+        kind = self._param_kind[channel]
+
+        if kind != _PARAM_NONE and control == _CC_DATA_ENTRY_MSB:
+            self._data_msb[channel] = value
+            self._msb_value[channel] = value << 7
+            return self._param_event(channel, value << 7)
+
+        if kind != _PARAM_NONE and control == _CC_DATA_ENTRY_LSB:
+            value = self._data_msb[channel] << 7 | value
+
+            if value == self._msb_value[channel]:
+                # Already emitted on the MSB
+                self._msb_value[channel] = -1
+                return None
+
+            self._msb_value[channel] = -1
+            return self._param_event(channel, value)
+
+        if control < 32:
+            self._msb[channel * 32 + control] = value
+
+            if self._lsb_seen[channel * 32 + control] or not self._is_high_res(
+                channel, control
+            ):
+                # Completed by the LSB, or a plain controller
+                return None
+
+            event = self._high_res_events[channel]
+            event.number = control
+            event.value = value << 7
+            return event
+
+        if control < 64:
+            control -= 32
+            self._lsb_seen[channel * 32 + control] = 1
+
+            if not self._is_high_res(channel, control):
+                return None
+
+            event = self._high_res_events[channel]
+            event.number = control
+            event.value = self._msb[channel * 32 + control] << 7 | value
+            return event
+
+        if control in (_CC_NRPN_MSB, _CC_NRPN_LSB, _CC_RPN_MSB, _CC_RPN_LSB):
+            if control in (_CC_NRPN_MSB, _CC_RPN_MSB):
+                self._param_msb[channel] = value
+            else:
+                self._param_lsb[channel] = value
+
+            is_rpn = control in (_CC_RPN_MSB, _CC_RPN_LSB)
+            # For RPN as for NRPN
+            is_null = (
+                self._param_msb[channel] == 127 and self._param_lsb[channel] == 127
+            )
+            self._param_kind[channel] = (
+                _PARAM_NONE if is_null else _PARAM_RPN if is_rpn else _PARAM_NRPN
+            )
+
+        return None
+
+    def _param_event(self, channel: int, value: int) -> ParameterEvent:
+        event = (
+            self._rpn_events[channel]
+            if self._param_kind[channel] == _PARAM_RPN
+            else self._nrpn_events[channel]
+        )
+        event.number = self._param_msb[channel] << 7 | self._param_lsb[channel]
+        event.value = value
+        return event
+
+
+# Message handler execution policies
+# In the MIDI callback: for fast handlers, such as trigger dispatch
+HANDLER_INLINE = "inline"
+# On a thread of its own
+HANDLER_THREAD = "thread"
+# On a pool of threads shared by handlers
+HANDLER_POOL = "pool"
+
+
+@dataclass
+class HandlerStats:
+    name: str
+    policy: str
+    calls: int = 0
+    # Oldest pending messages are dropped when a handler can't keep up
+    dropped: int = 0
+    errors: int = 0
+    # In seconds
+    total_time: float = 0.0
+    max_time: float = 0.0
+
+    @property
+    def mean_time(self) -> float:
+        return self.total_time / self.calls if self.calls else 0.0
+
+
+class _Handler:
+    """
+    A message handler and its execution policy.
+
+    Handlers off the MIDI callback get a bounded queue of pending messages,
+    drained by one worker at a time, so that they see messages in order.
+    """
+
+    # Messages handled before giving the worker back to the pool
+    DRAIN_BATCH = 32
+
+    def __init__(
+        self,
+        cb: Callable[[mido.Message], None],
+        *,
+        stats: HandlerStats,
+        executor: ThreadPoolExecutor | None,
+        max_pending: int,
+    ) -> None:
+        self._cb = cb
+        self.stats = stats
+        self._executor = executor
+        self._max_pending = max_pending
+        self._pending: collections.deque[mido.Message] = collections.deque()
+        self._lock = threading.Lock()
+        self._draining = False
+
+    def __call__(self, msg: mido.Message) -> None:
+        if self._executor is None:
+            self._call(msg)
+            return
+
+        if isinstance(msg, ParameterEvent):
+            # Reused by the decoder
+            msg = msg.copy()
+
+        with self._lock:
+            if len(self._pending) >= self._max_pending:
+                self._pending.popleft()
+                self.stats.dropped += 1
+
+            self._pending.append(msg)
+
+            if self._draining:
+                return
+
+            self._draining = True
+
+        self._submit()
+
+    def _submit(self) -> None:
+        assert self._executor is not None
+
+        try:
+            self._executor.submit(self._drain)
+        except RuntimeError:
+            # Stopped
+            self.clear()
+
+    def _call(self, msg: mido.Message) -> None:
+        start = time.perf_counter()
+
+        try:
+            self._cb(msg)
+        finally:
+            elapsed = time.perf_counter() - start
+            stats = self.stats
+            stats.calls += 1
+            stats.total_time += elapsed
+
+            if elapsed > stats.max_time:
+                stats.max_time = elapsed
+
+    def _drain(self) -> None:
+        for _ in range(self.DRAIN_BATCH):
+            with self._lock:
+                if not self._pending:
+                    self._draining = False
+                    return
+
+                msg = self._pending.popleft()
+
+            try:
+                self._call(msg)
+            except Exception:
+                self.stats.errors += 1
+                logger.exception("Message handler %s failed", self.stats.name)
+
+        # Let other handlers of the pool run, still draining
+        self._submit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self.stats.dropped += len(self._pending)
+            self._pending.clear()
+            self._draining = False
+
+
 class MIDInputThread(threading.Thread):
+    # Threads of the pool shared by HANDLER_POOL handlers
+    POOL_WORKERS = 4
+
     def __init__(
         self,
         *,
@@ -42,54 +559,245 @@ class MIDInputThread(threading.Thread):
         start_barrier: threading.Barrier,
         close_event: threading.Event,
         error_bucket: queue.Queue[Exception],
+        clock: MIDIClock | None = None,
+        timecode: MIDITimecode | None = None,
+        decoder: ParameterDecoder | None = None,
         on_error: Callable[[Exception], None] = lambda exc: None,
+        on_open: Callable[[str], None] = lambda port_name: None,
         **kwargs: Any,
     ) -> None:
         super().__init__(**kwargs)
         self._input_opener = input_opener
+        self._clock = clock
+        self._timecode = timecode
+        self._decoder = decoder
         self._start_barrier = start_barrier
         self._close_event = close_event
         self._error_bucket = error_bucket
-        self._message_handlers: list[Callable[[mido.Message], None]] = []
+        self._on_open = on_open
+        self._message_handlers: list[_Handler] = []
+        self._executors: list[ThreadPoolExecutor] = []
+        self._pool: ThreadPoolExecutor | None = None
+        # Logging I/O never delays other handlers
+        self.add_message_handler(self._log_message, policy=HANDLER_THREAD, name="log")
+        # Messages are dropped while paused, the port stays open
+        self._paused = False
+        self._reopen_event = threading.Event()
+        # Input to switch to, and the result of opening it
+        self._switch: tuple[MIDInputOpener, Future[str]] | None = None
+        self._switch_lock = threading.Lock()
+        self._dispatch_lock = threading.Lock()
+        self._info: dict | None = None
 
-    def get_port_name(self) -> str:
-        assert self._info is not None
-        return self._info[INFO_PORT_NAME]
+    def get_port_name(self) -> str | None:
+        return None if self._info is None else self._info[INFO_PORT_NAME]
 
-    def add_message_handler(self, cb: Callable[[mido.Message], None]) -> None:
-        self._message_handlers.append(cb)
+    def pause(self) -> None:
+        self._paused = True
 
-    def run(
+    def resume(self) -> None:
+        with self._dispatch_lock:
+            self._paused = False
+
+            if self._timecode is not None:
+                # Followed while paused, without firing cues
+                self._timecode.skip()
+
+    def is_paused(self) -> bool:
+        return self._paused
+
+    def reopen(self, input_opener: MIDInputOpener) -> "Future[str]":
+        """
+        Switch to another MIDI input, without stopping the thread.
+
+        Return a future resolved with the name of the port once open. If it
+        can't be opened, the previous input is opened again, and the future
+        holds the error.
+        """
+        future: Future[str] = Future()
+
+        with self._switch_lock:
+            if self._switch is not None:
+                # Superseded before being opened
+                self._switch[1].cancel()
+
+            self._switch = (input_opener, future)
+
+        self._reopen_event.set()
+        return future
+
+    def add_message_handler(
         self,
-    ) -> None:
-        def midi_callback(msg: mido.Message) -> None:
-            logger.info("Incoming MIDI message: %s", msg)
+        cb: Callable[[mido.Message], None],
+        *,
+        policy: str = HANDLER_INLINE,
+        max_pending: int = 256,
+        name: str | None = None,
+    ) -> HandlerStats:
+        """
+        Add a handler, run in the MIDI callback or off it depending on the
+        policy (see HANDLER_*), and return its live counters.
+
+        Handlers run off the MIDI callback can be slow without delaying other
+        handlers, and get at most `max_pending` messages queued.
+        """
+        executor: ThreadPoolExecutor | None
+
+        if policy == HANDLER_INLINE:
+            executor = None
+        elif policy == HANDLER_THREAD:
+            executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="MIDIHandler"
+            )
+            self._executors.append(executor)
+        elif policy == HANDLER_POOL:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.POOL_WORKERS, thread_name_prefix="MIDIPool"
+                )
+                self._executors.append(self._pool)
+
+            executor = self._pool
+        else:
+            raise ValueError(f"Unknown handler policy: {policy}")
+
+        stats = HandlerStats(name=name or repr(cb), policy=policy)
+        handler = _Handler(cb, stats=stats, executor=executor, max_pending=max_pending)
+        self._message_handlers.append(handler)
+        return stats
+
+    def get_handler_stats(self) -> list[HandlerStats]:
+        return [handler.stats for handler in self._message_handlers]
+
+    def stop_handlers(self) -> None:
+        """
+        Drop pending messages, and stop the threads of handlers.
+        """
+        for handler in self._message_handlers:
+            handler.clear()
+
+        for executor in self._executors:
+            executor.shutdown(cancel_futures=True)
+
+    def inject(self, msg: mido.Message) -> None:
+        """
+        Process a message as if it was received on the MIDI input.
+        """
+        self._midi_callback(msg)
+
+    def _midi_callback(self, msg: mido.Message) -> None:
+        # Injected messages may come from other threads, handlers see one
+        # message at a time. Uncontended, the lock is cheap.
+        with self._dispatch_lock:
+            self._dispatch(msg)
+
+    def _dispatch(self, msg: mido.Message) -> None:
+        if self._clock is not None and self._clock.process(msg):
+            return
+
+        if self._timecode is not None:
+            self._timecode.process(msg)
+
+        if self._paused:
+            # Clock and timecode are still followed, so sync is kept
+            return
+
+        for handler in self._message_handlers:
+            handler(msg)
 
+        if self._decoder is None:
+            return
+
+        if (event := self._decoder.process(msg)) is not None:
             for handler in self._message_handlers:
-                handler(msg)
+                handler(event)
+
+    def _log_message(self, msg: mido.Message) -> None:
+        if isinstance(msg, ParameterEvent):
+            logger.info("Decoded MIDI event: %s", msg)
+        elif msg.type != "quarter_frame":
+            # Timecode is too frequent to be logged, but handlers follow it
+            logger.info("Incoming MIDI message: %s", msg)
 
+    def run(
+        self,
+    ) -> None:
         try:
-            with self._input_opener(midi_callback) as info:
-                self._info = info
-                logger.info("MIDI input is open")
-
-                try:
-                    self._start_barrier.wait()
-                except threading.BrokenBarrierError:
-                    logger.error("Aborting...")
-                    return
+            started = False
+            # Input to open again if switching fails
+            fallback: MIDInputOpener | None = None
+            switched: Future[str] | None = None
+
+            while True:
+                self._reopen_event.clear()
+
+                with self._switch_lock:
+                    if self._switch is not None:
+                        fallback = self._input_opener
+                        self._input_opener, switched = self._switch
+                        self._switch = None
+
+                with contextlib.ExitStack() as stack:
+                    try:
+                        info = stack.enter_context(
+                            self._input_opener(self._midi_callback)
+                        )
+                    except Exception as exc:
+                        if fallback is None:
+                            raise
 
-                logger.info("Listening for messages...")
+                        # Not fatal, the previous input is opened again
+                        logger.error("Could not switch MIDI input: %s", exc)
+                        self._input_opener, fallback = fallback, None
 
-                try:
-                    self._close_event.wait()
+                        if switched is not None:
+                            switched.set_exception(exc)
+                            switched = None
+
+                        continue
+
+                    fallback = None
+                    self._info = info
+                    logger.info("MIDI input is open: %s", info[INFO_PORT_NAME])
+                    self._on_open(info[INFO_PORT_NAME])
+
+                    if switched is not None:
+                        switched.set_result(info[INFO_PORT_NAME])
+                        switched = None
+
+                    if not started:
+                        started = True
+
+                        try:
+                            self._start_barrier.wait()
+                        except threading.BrokenBarrierError:
+                            logger.error("Aborting...")
+                            return
+
+                    logger.info("Listening for messages...")
+
+                    try:
+                        while not self._close_event.wait(0.2):
+                            if self._reopen_event.is_set():
+                                break
+                    except KeyboardInterrupt:
+                        pass
+
+                if self._close_event.is_set() or not self._reopen_event.is_set():
                     logger.info("Stopping...")
-                except KeyboardInterrupt:
-                    pass
+                    break
+
+                logger.info("Switching MIDI input...")
         except Exception as exc:
             logger.error(exc)
             self._start_barrier.abort()
             self._close_event.set()
             self._error_bucket.put_nowait(exc)
         finally:
+            with self._switch_lock:
+                if self._switch is not None:
+                    self._switch[1].cancel()
+                    self._switch = None
+
+            self.stop_handlers()
             logger.info("Stopped")
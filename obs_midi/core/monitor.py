@@ -0,0 +1,182 @@
+import multiprocessing
+import struct
+import time
+from typing import Any
+
+import mido
+
+from .midi_in import ParameterEvent
+
+# Received at (wall clock), message, names of what it matched (none on a miss)
+MonitorEntry = tuple[float, mido.Message, list[str]]
+
+
+class Monitor:
+    """
+    Recent MIDI messages and what they matched, in a fixed-size ring.
+
+    There is a single writer, trigger dispatch, which never takes a lock or
+    waits on readers: it stores the entry, then publishes it by bumping the
+    write count. Readers (e.g. the GUI) poll at their own pace, and entries
+    overwritten before they were read are reported as skipped.
+    """
+
+    SIZE = 1024
+
+    def __init__(self, size: int = SIZE) -> None:
+        self._size = size
+        self._entries: list[MonitorEntry | None] = [None] * size
+        # Entries ever written, the next one goes at this position modulo size
+        self.written = 0
+        self.matches = 0
+        self.misses = 0
+
+    def record(self, msg: mido.Message, matched: list[str]) -> None:
+        if isinstance(msg, ParameterEvent):
+            # Reused by the decoder
+            msg = msg.copy()
+
+        written = self.written
+        self._entries[written % self._size] = (time.time(), msg, matched)
+
+        if matched:
+            self.matches += 1
+        else:
+            self.misses += 1
+
+        self.written = written + 1
+
+    def read(self, since: int) -> tuple[int, list[MonitorEntry], int]:
+        """
+        Return the write count, entries written since the given count, and
+        how many of them were skipped.
+        """
+        written = self.written
+        start = max(since, written - self._size)
+        entries = [self._entries[i % self._size] for i in range(start, written)]
+
+        # Entries overwritten while copying are dropped. The writer stores
+        # the next entry before publishing it, so that one may be too.
+        overwritten = min(self.written + 1 - self._size - start, written - start)
+
+        if overwritten > 0:
+            entries = entries[overwritten:]
+            start += overwritten
+
+        return written, [e for e in entries if e is not None], start - since
+
+
+class SharedMonitor:
+    """
+    A monitor ring in shared memory, written by the engine process and read
+    by the GUI process (see ProcessEngine).
+
+    Entries are stored as text, truncated to fixed-size slots. Each slot is
+    stamped with a sequence number before and after being written, so that
+    readers skip slots being overwritten rather than read them torn.
+    """
+
+    SIZE = 1024
+    MESSAGE_SIZE = 64
+    MATCHED_SIZE = 128
+
+    # Write count, matches, misses
+    _HEADER = struct.Struct("<QQQ")
+    # Sequence number, received at, message and matched lengths, then text
+    _SLOT = struct.Struct(f"<QdHH{MESSAGE_SIZE}s{MATCHED_SIZE}s")
+    _SEQ = struct.Struct("<Q")
+
+    def __init__(self, buffer: Any) -> None:
+        # Passed to the engine process, which writes into the same memory
+        self.buffer = buffer
+        self._view = memoryview(buffer).cast("B")
+        self._size = (len(self._view) - self._HEADER.size) // self._SLOT.size
+        # Only used by the writer
+        self._written, self._matches, self._misses = self._HEADER.unpack_from(
+            self._view
+        )
+
+    @classmethod
+    def allocate(cls, size: int = SIZE) -> "SharedMonitor":
+        return cls(
+            multiprocessing.RawArray("B", cls._HEADER.size + size * cls._SLOT.size)
+        )
+
+    @property
+    def written(self) -> int:
+        return self._HEADER.unpack_from(self._view)[0]
+
+    @property
+    def matches(self) -> int:
+        return self._HEADER.unpack_from(self._view)[1]
+
+    @property
+    def misses(self) -> int:
+        return self._HEADER.unpack_from(self._view)[2]
+
+    def _offset(self, index: int) -> int:
+        return self._HEADER.size + (index % self._size) * self._SLOT.size
+
+    def record(self, msg: mido.Message, matched: list[str]) -> None:
+        index = self._written
+        offset = self._offset(index)
+        text = str(msg).encode()[: self.MESSAGE_SIZE]
+        matched_text = "\n".join(matched).encode()[: self.MATCHED_SIZE]
+
+        self._SEQ.pack_into(self._view, offset, 2 * index + 1)
+        self._SLOT.pack_into(
+            self._view,
+            offset,
+            2 * index + 1,
+            time.time(),
+            len(text),
+            len(matched_text),
+            text,
+            matched_text,
+        )
+        self._SEQ.pack_into(self._view, offset, 2 * index + 2)
+
+        if matched:
+            self._matches += 1
+        else:
+            self._misses += 1
+
+        self._written = index + 1
+        self._HEADER.pack_into(
+            self._view, 0, self._written, self._matches, self._misses
+        )
+
+    def read(self, since: int) -> tuple[int, list[tuple[float, str, list[str]]], int]:
+        """
+        Return the write count, entries written since the given count, and
+        how many of them were skipped.
+        """
+        written = self.written
+        start = max(since, written - self._size)
+        entries = []
+        skipped = start - since
+
+        for index in range(start, written):
+            offset = self._offset(index)
+            seq, received_at, length, matched_length, text, matched_text = (
+                self._SLOT.unpack_from(self._view, offset)
+            )
+
+            if (
+                seq != 2 * index + 2
+                or self._SEQ.unpack_from(self._view, offset)[0] != seq
+            ):
+                # Being overwritten
+                skipped += 1
+                continue
+
+            matched = matched_text[:matched_length].decode(errors="ignore")
+            entries.append(
+                (
+                    received_at,
+                    text[:length].decode(errors="ignore"),
+                    matched.split("\n") if matched else [],
+                )
+            )
+
+        return written, entries, skipped
@@ -1,11 +1,23 @@
+import contextlib
+import functools
+import itertools
 import logging
 import re
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field, replace
+from operator import methodcaller
+from typing import Callable, Iterable, Iterator, Optional, Sequence, TypeVar
 
 import mido
 
-from .obs_client import ObsClient
+from .cues import CueList
+from .midi_in import MIDIClock, MIDITimecode, ParameterEvent, Timecode
+from .obs_buffer import OutboundBuffer, is_replayable
+from .obs_client import ObsClient, ObsDisconnect, ObsRequest, PreparedRequest
+from .obs_state import ObsState
+from .obs_stats import Throttle
+from .obs_updates import PendingUpdates
+from .scheduler import Scheduler
+from .sysex_trie import SysexPattern, SysexTrie
 
 logger = logging.getLogger(__name__)
 
@@ -43,6 +55,9 @@ class ControlChangeTrigger:
     def get_message(self) -> mido.Message:
         return self.message
 
+    def get_messages(self) -> list[mido.Message]:
+        return [self.get_message()]
+
     def matches(self, msg: mido.Message) -> bool:
         return _compare_msg(msg, self.message, ["type", "channel", "control", "value"])
 
@@ -93,6 +108,9 @@ class ProgramChangeTrigger:
     def get_message(self) -> mido.Message:
         return self.message
 
+    def get_messages(self) -> list[mido.Message]:
+        return [self.get_message()]
+
     def matches(self, msg: mido.Message) -> bool:
         return _compare_msg(msg, self.message, ["type", "channel", "program"])
 
@@ -143,6 +161,9 @@ class NoteOnTrigger:
             velocity=127 if self.velocity is None else self.velocity
         )
 
+    def get_messages(self) -> list[mido.Message]:
+        return [self.get_message()]
+
     def matches(self, msg: mido.Message) -> bool:
         return _compare_msg(msg, self.message, ["type", "channel", "note"]) and (
             msg.velocity >= 64
@@ -184,7 +205,463 @@ class NoteOnTrigger:
         )
 
 
-MIDITrigger = ProgramChangeTrigger | ControlChangeTrigger | NoteOnTrigger
+@dataclass(frozen=True, kw_only=True)
+class ControlChangeThresholdTrigger:
+    text: str
+    message: mido.Message
+    rising: bool
+    hysteresis: int
+    # Index into the dispatcher's arming state, assigned on registration.
+    slot: int = field(default=-1, compare=False, repr=False)
+
+    DEFAULT_HYSTERESIS = 8
+
+    @property
+    def channel(self) -> int:
+        return self.message.channel + 1
+
+    @property
+    def number(self) -> int:
+        return self.message.control
+
+    @property
+    def threshold(self) -> int:
+        return self.message.value
+
+    def get_message(self) -> mido.Message:
+        return self.message
+
+    def get_messages(self) -> list[mido.Message]:
+        return [self.get_message()]
+
+    def matches(self, msg: mido.Message) -> bool:
+        # Whether the value is inside the band. Firing once per crossing is
+        # handled by the dispatcher, see ObsActions._update_thresholds().
+        if not _compare_msg(msg, self.message, ["type", "channel", "control"]):
+            return False
+
+        if self.rising:
+            return msg.value >= self.threshold
+
+        return msg.value <= self.threshold
+
+    def rearms(self, msg: mido.Message) -> bool:
+        # Bounded to the value range, so that thresholds near its ends (e.g.
+        # CC4>4) re-arm at 0 or 127 rather than never
+        if self.rising:
+            return msg.value < max(1, self.threshold - self.hysteresis)
+
+        return msg.value > min(126, self.threshold + self.hysteresis)
+
+    def __str__(self) -> str:
+        op = ">" if self.rising else "<"
+        return f"CC{self.number}{op}{self.threshold}~{self.hysteresis}@{self.channel}"
+
+    def sort_key(self) -> tuple:
+        return (self.channel, 2, self.number, self.threshold)
+
+    @classmethod
+    def parse(cls, s: str) -> Optional["ControlChangeThresholdTrigger"]:
+        text, sep, encoded = s.rpartition("::")
+
+        if not sep:
+            return None
+
+        # Example: CC4>100@1, CC4<20~4@1
+        m = re.match(
+            r"CC(?P<number>\d+)(?P<op>[<>])(?P<threshold>\d+)(~(?P<hysteresis>\d+))?"
+            r"@(?P<channel>\d+)",
+            encoded.strip(),
+        )
+
+        if m is None:
+            return None
+
+        message = mido.Message(
+            "control_change",
+            channel=int(m.group("channel")) - 1,
+            control=int(m.group("number")),
+            value=int(m.group("threshold")),
+        )
+
+        return cls(
+            text=text.strip(),
+            message=message,
+            rising=m.group("op") == ">",
+            hysteresis=(
+                int(h)
+                if (h := m.group("hysteresis")) is not None
+                else cls.DEFAULT_HYSTERESIS
+            ),
+        )
+
+
+@dataclass(frozen=True, kw_only=True)
+class ControlChangeMapping:
+    text: str
+    message: mido.Message
+    param: str
+    setting: str | None
+    minimum: float
+    maximum: float
+    db: bool
+
+    PARAM_VOLUME = "VOL"
+    PARAM_OPACITY = "OPACITY"
+    PARAM_SETTING = "SET"
+
+    # Values are interpolated in this range of decibels, then converted to a
+    # multiplier, which maps the travel of a fader to perceived loudness.
+    DEFAULT_DB_RANGE = (-60.0, 0.0)
+    DEFAULT_RANGE = (0.0, 1.0)
+
+    @property
+    def channel(self) -> int:
+        return self.message.channel + 1
+
+    @property
+    def number(self) -> int:
+        return self.message.control
+
+    @property
+    def setting_name(self) -> str:
+        # Opacity is provided by the Color Correction filter
+        return "opacity" if self.setting is None else self.setting
+
+    def get_message(self) -> mido.Message:
+        return self.message
+
+    def get_messages(self) -> list[mido.Message]:
+        return [self.get_message()]
+
+    def matches(self, msg: mido.Message) -> bool:
+        return _compare_msg(msg, self.message, ["type", "channel", "control"])
+
+    def scale(self, value: int) -> float:
+        if self.db:
+            if value == 0:
+                return 0.0
+            db = self.minimum + (self.maximum - self.minimum) * value / 127
+            return 10 ** (db / 20)
+
+        return self.minimum + (self.maximum - self.minimum) * value / 127
+
+    def __str__(self) -> str:
+        param = self.param if self.setting is None else f"{self.param} {self.setting}"
+        return f"{param} CC{self.number}@{self.channel}"
+
+    def sort_key(self) -> tuple:
+        return (self.channel, 2, self.number, -1)
+
+    @classmethod
+    def parse(cls, s: str) -> Optional["ControlChangeMapping"]:
+        text, sep, encoded = s.rpartition("::")
+
+        if not sep:
+            return None
+
+        # Example: VOL CC7@1, VOL CC7@1 -40..6 db, SET size CC8@1 0..20 lin
+        m = re.match(
+            r"(?P<param>VOL|OPACITY|SET\s+(?P<setting>\w+))\s+"
+            r"CC(?P<number>\d+)@(?P<channel>\d+)"
+            r"(\s+(?P<minimum>-?\d+(\.\d+)?)\.\.(?P<maximum>-?\d+(\.\d+)?))?"
+            r"(\s+(?P<scale>lin|db))?",
+            encoded.strip(),
+        )
+
+        if m is None:
+            return None
+
+        param = m.group("param").split()[0]
+        db = (
+            m.group("scale") == "db"
+            if m.group("scale") is not None
+            else param == cls.PARAM_VOLUME
+        )
+        minimum, maximum = (
+            (float(m.group("minimum")), float(m.group("maximum")))
+            if m.group("minimum") is not None
+            else cls.DEFAULT_DB_RANGE
+            if db
+            else cls.DEFAULT_RANGE
+        )
+
+        message = mido.Message(
+            "control_change",
+            channel=int(m.group("channel")) - 1,
+            control=int(m.group("number")),
+            value=127,
+        )
+
+        return cls(
+            text=text.strip(),
+            message=message,
+            param=param,
+            setting=m.group("setting"),
+            minimum=minimum,
+            maximum=maximum,
+            db=db,
+        )
+
+
+@dataclass(frozen=True, kw_only=True)
+class HighResControlChangeTrigger:
+    text: str
+    channel: int
+    number: int
+    value: int
+
+    def get_messages(self) -> list[mido.Message]:
+        return [
+            mido.Message(
+                "control_change",
+                channel=self.channel - 1,
+                control=self.number,
+                value=self.value >> 7,
+            ),
+            mido.Message(
+                "control_change",
+                channel=self.channel - 1,
+                control=self.number + 32,
+                value=self.value & 0x7F,
+            ),
+        ]
+
+    def get_message(self) -> mido.Message:
+        return self.get_messages()[-1]
+
+    def matches(self, msg: mido.Message) -> bool:
+        return (
+            msg.type == ParameterEvent.TYPE_HIGH_RES_CONTROL_CHANGE
+            and msg.channel == self.channel - 1
+            and msg.number == self.number
+            and msg.value == self.value
+        )
+
+    def __str__(self) -> str:
+        return f"HRCC{self.number}#{self.value}@{self.channel}"
+
+    def sort_key(self) -> tuple:
+        return (self.channel, 3, self.number, self.value)
+
+    @classmethod
+    def parse(cls, s: str) -> Optional["HighResControlChangeTrigger"]:
+        text, sep, encoded = s.rpartition("::")
+
+        if not sep:
+            return None
+
+        # Example: HRCC7#8192@1
+        m = re.match(
+            r"HRCC(?P<number>\d+)#(?P<value>\d+)@(?P<channel>\d+)", encoded.strip()
+        )
+
+        if m is None or int(m.group("number")) >= 32:
+            return None
+
+        return cls(
+            text=text.strip(),
+            channel=int(m.group("channel")),
+            number=int(m.group("number")),
+            value=int(m.group("value")),
+        )
+
+
+@dataclass(frozen=True, kw_only=True)
+class ParameterNumberTrigger:
+    text: str
+    registered: bool
+    channel: int
+    number: int
+    value: int
+
+    @property
+    def event_type(self) -> str:
+        return ParameterEvent.TYPE_RPN if self.registered else ParameterEvent.TYPE_NRPN
+
+    def get_messages(self) -> list[mido.Message]:
+        msb, lsb = (101, 100) if self.registered else (99, 98)
+        return [
+            mido.Message("control_change", channel=self.channel - 1, control=c, value=v)
+            for c, v in [
+                (msb, self.number >> 7),
+                (lsb, self.number & 0x7F),
+                (6, self.value >> 7),
+                (38, self.value & 0x7F),
+            ]
+        ]
+
+    def get_message(self) -> mido.Message:
+        return self.get_messages()[-1]
+
+    def matches(self, msg: mido.Message) -> bool:
+        return (
+            msg.type == self.event_type
+            and msg.channel == self.channel - 1
+            and msg.number == self.number
+            and msg.value == self.value
+        )
+
+    def __str__(self) -> str:
+        kind = "RPN" if self.registered else "NRPN"
+        return f"{kind}{self.number}#{self.value}@{self.channel}"
+
+    def sort_key(self) -> tuple:
+        return (self.channel, 4, self.number, self.value)
+
+    @classmethod
+    def parse(cls, s: str) -> Optional["ParameterNumberTrigger"]:
+        text, sep, encoded = s.rpartition("::")
+
+        if not sep:
+            return None
+
+        # Example: NRPN300#1@1, RPN0#2@1 (14-bit values)
+        m = re.match(
+            r"(?P<kind>NRPN|RPN)(?P<number>\d+)#(?P<value>\d+)@(?P<channel>\d+)",
+            encoded.strip(),
+        )
+
+        if m is None:
+            return None
+
+        return cls(
+            text=text.strip(),
+            registered=m.group("kind") == "RPN",
+            channel=int(m.group("channel")),
+            number=int(m.group("number")),
+            value=int(m.group("value")),
+        )
+
+
+@dataclass(frozen=True, kw_only=True)
+class SysexTrigger:
+    text: str
+    pattern: SysexPattern
+
+    def get_message(self) -> mido.Message:
+        return mido.Message(
+            "sysex", data=[0 if byte is None else byte for byte in self.pattern]
+        )
+
+    def get_messages(self) -> list[mido.Message]:
+        return [self.get_message()]
+
+    def matches(self, msg: mido.Message) -> bool:
+        # Dispatch goes through ActionIndex.sysex_trie instead
+        return (
+            msg.type == "sysex"
+            and len(msg.data) >= len(self.pattern)
+            and all(
+                byte is None or byte == msg.data[i]
+                for i, byte in enumerate(self.pattern)
+            )
+        )
+
+    def __str__(self) -> str:
+        return "SX" + "".join(
+            "??" if byte is None else f"{byte:02X}" for byte in self.pattern
+        )
+
+    def sort_key(self) -> tuple:
+        return (0, 5, str(self))
+
+    @classmethod
+    def parse(cls, s: str) -> Optional["SysexTrigger"]:
+        text, sep, encoded = s.rpartition("::")
+
+        if not sep:
+            return None
+
+        # Example: SX4310??7F (data bytes in hex, ?? for any byte)
+        m = re.match(r"SX(?P<pattern>([0-9A-Fa-f]{2}|\?\?)+)", encoded.strip())
+
+        if m is None:
+            return None
+
+        hex_pattern = m.group("pattern")
+        pattern = tuple(
+            None if (pair := hex_pattern[i : i + 2]) == "??" else int(pair, 16)
+            for i in range(0, len(hex_pattern), 2)
+        )
+
+        # Start and end of sysex bytes are not part of mido's data
+        if pattern and pattern[0] == 0xF0:
+            pattern = pattern[1:]
+        if pattern and pattern[-1] == 0xF7:
+            pattern = pattern[:-1]
+
+        if not pattern or any(byte is not None and byte > 0x7F for byte in pattern):
+            return None
+
+        return cls(text=text.strip(), pattern=pattern)
+
+
+@dataclass(frozen=True, kw_only=True)
+class MTCCue:
+    text: str
+    timecode: Timecode
+
+    def get_message(self) -> mido.Message:
+        # Full frame message, which locates MTC to the cue
+        hours, minutes, seconds, frames = self.timecode
+        rate = 3  # 30 fps
+        return mido.Message(
+            "sysex",
+            data=[0x7F, 0x7F, 0x01, 0x01, hours | rate << 5, minutes, seconds, frames],
+        )
+
+    def get_messages(self) -> list[mido.Message]:
+        return [self.get_message()]
+
+    def matches(self, msg: mido.Message) -> bool:
+        # Fired from the timecode, see ObsActions._process_cues()
+        return False
+
+    def __str__(self) -> str:
+        hours, minutes, seconds, frames = self.timecode
+        return f"MTC {hours:02}:{minutes:02}:{seconds:02}:{frames:02}"
+
+    def sort_key(self) -> tuple:
+        return (0, 0, *self.timecode)
+
+    @classmethod
+    def parse(cls, s: str) -> Optional["MTCCue"]:
+        text, sep, encoded = s.rpartition("::")
+
+        if not sep:
+            return None
+
+        # Example: MTC 00:01:23:12
+        m = re.match(
+            r"MTC\s+(?P<hours>\d+):(?P<minutes>\d+):(?P<seconds>\d+)[:;](?P<frames>\d+)",
+            encoded.strip(),
+        )
+
+        if m is None:
+            return None
+
+        timecode = (
+            int(m.group("hours")),
+            int(m.group("minutes")),
+            int(m.group("seconds")),
+            int(m.group("frames")),
+        )
+
+        return cls(text=text.strip(), timecode=timecode)
+
+
+MIDITrigger = (
+    ProgramChangeTrigger
+    | ControlChangeTrigger
+    | ControlChangeThresholdTrigger
+    | NoteOnTrigger
+    | ControlChangeMapping
+    | HighResControlChangeTrigger
+    | ParameterNumberTrigger
+    | SysexTrigger
+    | MTCCue
+)
 
 
 def _parse_midi_trigger(value: str) -> MIDITrigger | None:
@@ -194,47 +671,1214 @@ def _parse_midi_trigger(value: str) -> MIDITrigger | None:
     if (cc := ControlChangeTrigger.parse(value)) is not None:
         return cc
 
+    if (cc_threshold := ControlChangeThresholdTrigger.parse(value)) is not None:
+        return cc_threshold
+
     if (note_on := NoteOnTrigger.parse(value)) is not None:
         return note_on
 
+    if (high_res_cc := HighResControlChangeTrigger.parse(value)) is not None:
+        return high_res_cc
+
+    if (param := ParameterNumberTrigger.parse(value)) is not None:
+        return param
+
+    if (sysex := SysexTrigger.parse(value)) is not None:
+        return sysex
+
+    if (cue := MTCCue.parse(value)) is not None:
+        return cue
+
     return None
 
 
-class ObsActions:
-    def __init__(self) -> None:
-        self._scene_switches: list[tuple[str, MIDITrigger]] = []
-        self._source_filter_toggles: list[tuple[str, str, MIDITrigger]] = []
+def _parse_options(value: str) -> dict[str, str]:
+    # Options follow the trigger, e.g. "Flash :: CC8#10@7 toggle for=400ms"
+    _, _, encoded = value.rpartition("::")
+    options = {}
+
+    for token in encoded.split()[1:]:
+        key, _, option_value = token.partition("=")
+        options[key] = option_value
+
+    return options
+
+
+def _parse_duration(value: str) -> float | None:
+    # Example: 400ms, 30s, 1.5s
+    m = re.fullmatch(r"(?P<amount>\d+(\.\d+)?)(?P<unit>ms|s)", value)
+
+    if m is None:
+        return None
+
+    amount = float(m.group("amount"))
+    return amount / 1000 if m.group("unit") == "ms" else amount
+
+
+# Filter action modes
+FILTER_ON = "on"
+FILTER_OFF = "off"
+FILTER_TOGGLE = "toggle"
+
+
+# Quantization boundaries, in MIDI clock ticks
+QUANTIZE_TICKS = {
+    "beat": MIDIClock.TICKS_PER_BEAT,
+    "bar": MIDIClock.TICKS_PER_BEAT * MIDIClock.BEATS_PER_BAR,
+}
+
+
+@dataclass(frozen=True, kw_only=True)
+class ActionTiming:
+    # Wait before performing the action
+    delay: float = 0
+    # Revert the action after this duration
+    duration: float | None = None
+    # Hold the action until the next beat or bar of the incoming MIDI clock
+    quantize: int | None = None
+
+    @classmethod
+    def parse(cls, value: str) -> "ActionTiming":
+        options = _parse_options(value)
+        delay = _parse_duration(options.get("delay", ""))
+        duration = _parse_duration(options.get("for", ""))
+        quantize = QUANTIZE_TICKS.get(options.get("q", ""))
+        return cls(delay=delay or 0, duration=duration, quantize=quantize)
+
+
+@dataclass(frozen=True, kw_only=True)
+class SceneSwitch:
+    scene: str
+    trigger: MIDITrigger
+    timing: ActionTiming
+
+
+@dataclass(frozen=True, kw_only=True)
+class SourceFilterToggle:
+    source_name: str
+    filter_name: str
+    trigger: MIDITrigger
+    mode: str
+    timing: ActionTiming
+    # Showing a filter of an exclusive group hides the others
+    group: str | None = None
+
+    @staticmethod
+    def parse_mode(filter_name: str) -> str:
+        options = _parse_options(filter_name)
+
+        for mode in (FILTER_TOGGLE, FILTER_OFF):
+            if mode in options:
+                return mode
+
+        return FILTER_ON
+
+    @staticmethod
+    def parse_group(filter_name: str) -> str | None:
+        return _parse_options(filter_name).get("group") or None
+
+
+@dataclass(frozen=True, kw_only=True)
+class SceneItemToggle:
+    # Applies to the items showing the source, in every scene
+    source_name: str
+    trigger: MIDITrigger
+    mode: str
+    timing: ActionTiming
+
+
+# https://github.com/obsproject/obs-websocket/blob/master/docs/generated/protocol.md#triggermediainputaction
+MEDIA_ACTIONS = {
+    "play": "OBS_WEBSOCKET_MEDIA_INPUT_ACTION_PLAY",
+    "pause": "OBS_WEBSOCKET_MEDIA_INPUT_ACTION_PAUSE",
+    "stop": "OBS_WEBSOCKET_MEDIA_INPUT_ACTION_STOP",
+    "restart": "OBS_WEBSOCKET_MEDIA_INPUT_ACTION_RESTART",
+}
+
+
+@dataclass(frozen=True, kw_only=True)
+class MediaAction:
+    input_name: str
+    trigger: MIDITrigger
+    timing: ActionTiming
+    # Encoded when indexing, in order
+    requests: tuple[PreparedRequest, ...]
+
+    @staticmethod
+    def parse_requests(input_name: str) -> tuple[PreparedRequest, ...]:
+        # Example: "Clip :: PC5@1 seek=10s play"
+        options = _parse_options(input_name)
+        requests = []
+
+        if (seek := options.get("seek")) and (
+            cursor := _parse_duration(seek)
+        ) is not None:
+            # https://github.com/obsproject/obs-websocket/blob/master/docs/generated/protocol.md#setmediainputcursor
+            requests.append(
+                PreparedRequest(
+                    "SetMediaInputCursor",
+                    {"inputName": input_name, "mediaCursor": round(cursor * 1000)},
+                )
+            )
+
+        for name, media_action in MEDIA_ACTIONS.items():
+            if name in options:
+                requests.append(
+                    PreparedRequest(
+                        "TriggerMediaInputAction",
+                        {"inputName": input_name, "mediaAction": media_action},
+                    )
+                )
+
+        return tuple(requests)
+
+
+@dataclass(frozen=True, kw_only=True)
+class SceneCollectionSwitch:
+    collection: str
+    trigger: MIDITrigger
+    timing: ActionTiming
+
+
+Action = (
+    SceneSwitch
+    | SourceFilterToggle
+    | SceneItemToggle
+    | MediaAction
+    | SceneCollectionSwitch
+)
+
+
+# Arming state of threshold triggers
+_THRESHOLD_DISARMED = 0
+_THRESHOLD_ARMED = 1
+_THRESHOLD_FIRED = 2  # Fired on the last message received for its controller
+
+
+_A = TypeVar("_A", bound=Action)
+
+
+def _controller_key(channel: int, control: int) -> int:
+    # 0-based channel, as in mido
+    return channel * 128 + control
+
+
+def _action_target(action: Action) -> tuple[str, ...]:
+    # What an action applies to, the same across indexes
+    match action:
+        case SceneSwitch():
+            return ("scene", action.scene)
+        case SourceFilterToggle():
+            return ("filter", action.source_name, action.filter_name)
+        case SceneItemToggle():
+            return ("scene_item", action.source_name)
+        case MediaAction():
+            return ("media", action.input_name)
+        case SceneCollectionSwitch():
+            return ("collection", action.collection)
+
+
+class ActionIndex:
+    """
+    Compiled snapshot of the actions of a scene collection.
+
+    Actions of an index are never changed once built: changes are compiled
+    into a new index, published by swapping a single reference. This way,
+    the MIDI thread always reads a consistent index, without locking. Only
+    dispatch state changes in place (threshold arming, the cue list cursor),
+    and only from the MIDI thread.
+    """
+
+    def __init__(
+        self,
+        *,
+        scene_switches: Sequence[SceneSwitch] = (),
+        source_filter_toggles: Sequence[SourceFilterToggle] = (),
+        scene_item_toggles: Sequence[SceneItemToggle] = (),
+        media_actions: Sequence[MediaAction] = (),
+        collection_switches: Sequence[SceneCollectionSwitch] = (),
+        input_volume_mappings: Sequence[tuple[str, ControlChangeMapping]] = (),
+        source_filter_mappings: Sequence[tuple[str, str, ControlChangeMapping]] = (),
+    ) -> None:
+        # Threshold triggers by (channel, control), with one state byte per
+        # trigger. The state is the only part that changes, as messages come.
+        self.thresholds: dict[int, list[ControlChangeThresholdTrigger]] = {}
+        self.threshold_state = bytearray()
+        # Slots by action target and trigger, to carry the state over
+        self.threshold_slots: dict[tuple[tuple[str, ...], str], int] = {}
+        self.scene_switches = tuple(map(self._compile, scene_switches))
+        self.source_filter_toggles = tuple(map(self._compile, source_filter_toggles))
+        self.scene_item_toggles = tuple(map(self._compile, scene_item_toggles))
+        self.media_actions = tuple(map(self._compile, media_actions))
+        self.collection_switches = tuple(map(self._compile, collection_switches))
+        self.input_volume_mappings = tuple(input_volume_mappings)
+        self.source_filter_mappings = tuple(source_filter_mappings)
+        self.filter_groups: dict[str, list[SourceFilterToggle]] = {}
+
+        for filter_toggle in self.source_filter_toggles:
+            if filter_toggle.group is not None:
+                self.filter_groups.setdefault(filter_toggle.group, []).append(
+                    filter_toggle
+                )
+
+        self.cues: CueList[Action] = CueList()
+        # Actions by sysex pattern, with their priority: scenes first, then
+        # filters, scene items, media and collections, in the order they were found.
+        self.sysex_trie: SysexTrie[tuple[tuple[int, int], Action]] = SysexTrie()
+        categories: tuple[Sequence[Action], ...] = (
+            self.scene_switches,
+            self.source_filter_toggles,
+            self.scene_item_toggles,
+            self.media_actions,
+            self.collection_switches,
+        )
+
+        # Actions fired by decoded events (see ParameterEvent), in the same order
+        parameter_actions: list[Action] = []
+        high_res_controllers: set[int] = set()
+
+        for category, actions in enumerate(categories):
+            for position, action in enumerate(actions):
+                trigger = action.trigger
+
+                if isinstance(
+                    trigger, (HighResControlChangeTrigger, ParameterNumberTrigger)
+                ):
+                    parameter_actions.append(action)
+
+                if isinstance(trigger, HighResControlChangeTrigger):
+                    high_res_controllers.add(
+                        _controller_key(trigger.channel - 1, trigger.number)
+                    )
+
+                if isinstance(trigger, MTCCue):
+                    self.cues.add(trigger.timecode, action)
+
+                if isinstance(trigger, SysexTrigger):
+                    self.sysex_trie.insert(
+                        trigger.pattern, ((category, position), action)
+                    )
+
+        self.parameter_actions = tuple(parameter_actions)
+        # By (channel, control) key, to only decode 14-bit CC where needed
+        self.high_res_controllers = frozenset(high_res_controllers)
+
+    def _compile(self, action: _A) -> _A:
+        trigger = action.trigger
+
+        if not isinstance(trigger, ControlChangeThresholdTrigger):
+            return action
+
+        trigger = replace(trigger, slot=len(self.threshold_state))
+        self.threshold_state.append(_THRESHOLD_ARMED)
+        self.threshold_slots[(_action_target(action), str(trigger))] = trigger.slot
+        key = _controller_key(trigger.message.channel, trigger.number)
+        self.thresholds.setdefault(key, []).append(trigger)
+        return replace(action, trigger=trigger)
+
+    def carry_thresholds(self, previous: "ActionIndex") -> None:
+        """
+        Take over the arming state of the threshold triggers found in the
+        previous index, so that publishing doesn't re-arm them: a pedal held
+        inside its band must not fire again.
+        """
+        if previous is self:
+            return
+
+        for key, slot in self.threshold_slots.items():
+            if (previous_slot := previous.threshold_slots.get(key)) is not None:
+                self.threshold_state[slot] = previous.threshold_state[previous_slot]
 
     def get_triggers(self) -> list[MIDITrigger]:
-        triggers = []
+        triggers: list[MIDITrigger] = []
 
-        for _, trigger in self._scene_switches:
-            triggers.append(trigger)
+        for actions in (
+            self.scene_switches,
+            self.source_filter_toggles,
+            self.scene_item_toggles,
+            self.media_actions,
+            self.collection_switches,
+        ):
+            triggers.extend(action.trigger for action in actions)
 
-        for _, _, trigger in self._source_filter_toggles:
-            triggers.append(trigger)
+        for _, mapping in self.input_volume_mappings:
+            triggers.append(mapping)
+
+        for _, _, mapping in self.source_filter_mappings:
+            triggers.append(mapping)
 
         return triggers
 
-    def on_scene_found(self, scene: str) -> None:
+    def update_thresholds(self, msg: mido.Message) -> None:
+        # A threshold trigger fires once when the value enters its band, then
+        # stays disarmed until the value leaves the band by more than the
+        # hysteresis. This way, sweeping a pedal results in a single action.
+        triggers = self.thresholds.get(_controller_key(msg.channel, msg.control))
+
+        if triggers is None:
+            return
+
+        state = self.threshold_state
+
+        for trigger in triggers:
+            slot = trigger.slot
+
+            if state[slot] == _THRESHOLD_ARMED:
+                if trigger.matches(msg):
+                    state[slot] = _THRESHOLD_FIRED
+            elif trigger.rearms(msg):
+                state[slot] = _THRESHOLD_ARMED
+            else:
+                state[slot] = _THRESHOLD_DISARMED
+
+    def _matches(self, trigger: MIDITrigger, msg: mido.Message) -> bool:
+        if isinstance(trigger, ControlChangeThresholdTrigger):
+            return (
+                trigger.matches(msg)
+                and self.threshold_state[trigger.slot] == _THRESHOLD_FIRED
+            )
+
+        return trigger.matches(msg)
+
+    def candidates(self, msg: mido.Message) -> Iterator[Action]:
+        if isinstance(msg, ParameterEvent):
+            # Decoded events only look like mido messages, other triggers
+            # don't apply to them
+            for action in self.parameter_actions:
+                if action.trigger.matches(msg):
+                    yield action
+
+            return
+
+        for actions in (
+            self.scene_switches,
+            self.source_filter_toggles,
+            self.scene_item_toggles,
+            self.media_actions,
+            self.collection_switches,
+        ):
+            for action in actions:
+                if self._matches(action.trigger, msg):
+                    yield action
+
+
+class ActionIndexBuilder:
+    """
+    Actions of a scene collection, added as they are found, then compiled
+    into an ActionIndex.
+    """
+
+    def __init__(self) -> None:
+        # By name, in the order they were found
+        self._scene_switches: dict[str, SceneSwitch] = {}
+        self._source_filter_toggles: dict[tuple[str, str], SourceFilterToggle] = {}
+        self._scene_item_toggles: dict[str, SceneItemToggle] = {}
+        self._media_actions: dict[str, MediaAction] = {}
+        self._collection_switches: dict[str, SceneCollectionSwitch] = {}
+        self._input_volume_mappings: dict[str, ControlChangeMapping] = {}
+        self._source_filter_mappings: dict[tuple[str, str], ControlChangeMapping] = {}
+        # Scene item IDs by (scene name, source name), to seed the state with
+        # when the collection becomes current.
+        self.scene_items: dict[tuple[str, str], list[int]] = {}
+        # Compiled on demand, until the next change
+        self._index: ActionIndex | None = None
+
+    def build(self) -> ActionIndex:
+        if (index := self._index) is None:
+            self._index = index = ActionIndex(
+                scene_switches=list(self._scene_switches.values()),
+                source_filter_toggles=list(self._source_filter_toggles.values()),
+                scene_item_toggles=list(self._scene_item_toggles.values()),
+                media_actions=list(self._media_actions.values()),
+                collection_switches=list(self._collection_switches.values()),
+                input_volume_mappings=list(self._input_volume_mappings.items()),
+                source_filter_mappings=[
+                    (source_name, filter_name, mapping)
+                    for (
+                        source_name,
+                        filter_name,
+                    ), mapping in self._source_filter_mappings.items()
+                ],
+            )
+
+        return index
+
+    def add_scene(self, scene: str) -> None:
+        if scene in self._scene_switches:
+            # Indexed ahead of time, then discovered
+            return
+
         if (trigger := _parse_midi_trigger(scene)) is not None:
-            self._scene_switches.append((scene, trigger))
+            self._scene_switches[scene] = SceneSwitch(
+                scene=scene,
+                trigger=trigger,
+                timing=ActionTiming.parse(scene),
+            )
+            self._index = None
             logger.info("Added scene switch action: %s", scene)
 
-    def on_source_filter_found(self, *, source_name: str, filter_name: str) -> None:
-        if (trigger := _parse_midi_trigger(filter_name)) is not None:
-            self._source_filter_toggles.append((source_name, filter_name, trigger))
-            logger.info("Added filter toggle action: %s", filter_name)
-
-    def process(self, msg: mido.Message, client: ObsClient) -> None:
-        for scene, trigger in self._scene_switches:
-            if trigger.matches(msg):
-                logger.info("Switch scene: %s", scene)
-                client.set_current_program_scene(scene)
+    def add_scene_collection(self, collection: str) -> None:
+        if collection in self._collection_switches:
+            return
+
+        if (trigger := _parse_midi_trigger(collection)) is not None:
+            self._collection_switches[collection] = SceneCollectionSwitch(
+                collection=collection,
+                trigger=trigger,
+                timing=ActionTiming.parse(collection),
+            )
+            self._index = None
+            logger.info("Added scene collection switch action: %s", collection)
+
+    def add_source(self, source_name: str) -> None:
+        mapping = ControlChangeMapping.parse(source_name)
+
+        if mapping is None or mapping.param != ControlChangeMapping.PARAM_VOLUME:
+            return
+
+        if source_name in self._input_volume_mappings:
+            # Sources may be used in several scenes
+            return
+
+        self._input_volume_mappings[source_name] = mapping
+        self._index = None
+        logger.info("Added input volume mapping: %s", source_name)
+
+    def add_scene_item(
+        self,
+        *,
+        scene_name: str,
+        source_name: str,
+        scene_item_id: int,
+        is_scene: bool = False,
+    ) -> None:
+        item_ids = self.scene_items.setdefault((scene_name, source_name), [])
+
+        if scene_item_id not in item_ids:
+            item_ids.append(scene_item_id)
+
+        if is_scene:
+            # Nested scenes are switched to, see add_scene()
+            return
+
+        if (
+            source_name in self._scene_item_toggles
+            or source_name in self._media_actions
+        ):
+            # Sources may be used in several scenes
+            return
+
+        if ControlChangeMapping.parse(source_name) is not None:
+            return
+
+        if (trigger := _parse_midi_trigger(source_name)) is None:
+            return
+
+        self._index = None
+
+        if media_requests := MediaAction.parse_requests(source_name):
+            self._media_actions[source_name] = MediaAction(
+                input_name=source_name,
+                trigger=trigger,
+                timing=ActionTiming.parse(source_name),
+                requests=media_requests,
+            )
+            logger.info("Added media action: %s", source_name)
+        else:
+            item_toggle = SceneItemToggle(
+                source_name=source_name,
+                trigger=trigger,
+                mode=SourceFilterToggle.parse_mode(source_name),
+                timing=ActionTiming.parse(source_name),
+            )
+            self._scene_item_toggles[source_name] = item_toggle
+            logger.info("Added scene item %s action: %s", item_toggle.mode, source_name)
+
+    def add_source_filter(self, *, source_name: str, filter_name: str) -> None:
+        key = (source_name, filter_name)
+
+        if key in self._source_filter_mappings or key in self._source_filter_toggles:
+            # Sources may be used in several scenes
+            return
+
+        if (mapping := ControlChangeMapping.parse(filter_name)) is not None:
+            if mapping.param == ControlChangeMapping.PARAM_VOLUME:
                 return
 
-        for source_name, filter_name, trigger in self._source_filter_toggles:
-            if trigger.matches(msg):
-                logger.info("Show filter: %s on %s", filter_name, source_name)
-                client.enable_filter(source_name, filter_name)
+            self._source_filter_mappings[key] = mapping
+            self._index = None
+            logger.info("Added filter setting mapping: %s", filter_name)
+            return
+
+        if (trigger := _parse_midi_trigger(filter_name)) is not None:
+            filter_toggle = SourceFilterToggle(
+                source_name=source_name,
+                filter_name=filter_name,
+                trigger=trigger,
+                mode=SourceFilterToggle.parse_mode(filter_name),
+                timing=ActionTiming.parse(filter_name),
+                group=SourceFilterToggle.parse_group(filter_name),
+            )
+            self._source_filter_toggles[key] = filter_toggle
+            self._index = None
+            logger.info("Added filter %s action: %s", filter_toggle.mode, filter_name)
+
+
+class ObsActions:
+    def __init__(self, *, multi_match: bool = False) -> None:
+        # Perform all actions bound to a message, rather than the first one
+        self._multi_match = multi_match
+        # Actions of the current scene collection, as found
+        self._builder = ActionIndexBuilder()
+        # By scene collection name, including collections indexed ahead of time
+        self._builders: dict[str, ActionIndexBuilder] = {}
+        # Scene collection switches, available from every collection
+        self._shared_builder = ActionIndexBuilder()
+        # Published indexes, read once per message by the MIDI thread
+        self._index = ActionIndex()
+        self._shared_index = ActionIndex()
+        # Publishing is deferred in batches, and during reloads
+        self._batch_depth = 0
+        self._reloading = False
+        self.pending_updates = PendingUpdates()
+        self.buffer = OutboundBuffer()
+        self.throttle = Throttle()
+        self.state = ObsState()
+        self.scheduler = Scheduler()
+        self.clock = MIDIClock()
+        self.timecode = MIDITimecode()
+
+    def get_triggers(self) -> list[MIDITrigger]:
+        return [*self._index.get_triggers(), *self._shared_index.get_triggers()]
+
+    def has_high_res_trigger(self, channel: int, control: int) -> bool:
+        key = _controller_key(channel, control)
+        return (
+            key in self._index.high_res_controllers
+            or key in self._shared_index.high_res_controllers
+        )
+
+    def _publish(self) -> None:
+        if self._batch_depth or self._reloading:
+            return
+
+        index = self._builder.build()
+        shared_index = self._shared_builder.build()
+        index.carry_thresholds(self._index)
+        shared_index.carry_thresholds(self._shared_index)
+        # Single reference assignments, atomic for readers
+        self._index = index
+        self._shared_index = shared_index
+
+    @contextlib.contextmanager
+    def batch(self) -> Iterator[None]:
+        """
+        Publish actions found within at once, at the end.
+        """
+        self._batch_depth += 1
+
+        try:
+            yield
+        finally:
+            self._batch_depth -= 1
+            self._publish()
+
+    def begin_reload(self) -> None:
+        """
+        Start indexing the current collection anew. Current actions stay live
+        until end_reload() publishes the new ones.
+        """
+        self._reloading = True
+        self._builder = ActionIndexBuilder()
+        self._shared_builder = ActionIndexBuilder()
+
+        if (collection := self.state.get_current_scene_collection()) is not None:
+            self._builders[collection] = self._builder
+
+    def reset(self) -> None:
+        """
+        Forget all actions and mirrored state at once, e.g. when connecting
+        to another OBS. They are found again by discovery.
+        """
+        self._reloading = False
+        self._builder = ActionIndexBuilder()
+        self._builders = {}
+        self._shared_builder = ActionIndexBuilder()
+        self.state.reset()
+
+        if (collection := self.state.get_current_scene_collection()) is not None:
+            self._builders[collection] = self._builder
+
+        self._publish()
+        logger.info("Actions reset")
+
+    def end_reload(self) -> None:
+        self._reloading = False
+        self._publish()
+        logger.info("Actions reloaded (%d triggers)", len(self.get_triggers()))
+
+    def set_scene_collection(self, collection: str) -> None:
+        """
+        Make the actions of a scene collection current.
+
+        A collection indexed ahead of time is live at once, discovery then
+        completes its index. The first collection set is the one being
+        discovered.
+        """
+        previous = self.state.get_current_scene_collection()
+
+        if previous == collection:
+            return
+
+        builder = self._builders.get(collection)
+
+        if builder is None:
+            builder = self._builder if previous is None else ActionIndexBuilder()
+            self._builders[collection] = builder
+
+        self.state.set_current_scene_collection(collection)
+
+        if previous is not None:
+            self.state.reset()
+
+            # Scene item IDs are specific to a collection
+            for (scene_name, source_name), item_ids in builder.scene_items.items():
+                for scene_item_id in item_ids:
+                    self.state.add_scene_item(scene_name, source_name, scene_item_id)
+
+        self._builder = builder
+        self._publish()
+        logger.info(
+            "Scene collection: %s (%d triggers)",
+            collection,
+            len(builder.build().get_triggers()),
+        )
+
+    def add_scene_collection_index(
+        self, collection: str, builder: ActionIndexBuilder
+    ) -> bool:
+        """
+        Add the actions of a collection indexed ahead of time, e.g. from its
+        file, replacing those indexed before. Return False for the current
+        collection, which is left to discovery.
+        """
+        if self._builders.get(collection) is self._builder:
+            return False
+
+        self._builders[collection] = builder
+        return True
+
+    def on_scene_collection_found(self, collection: str) -> None:
+        self._shared_builder.add_scene_collection(collection)
+        self._publish()
+
+    def on_scene_found(self, scene: str) -> None:
+        self._builder.add_scene(scene)
+        self._publish()
+
+    def on_source_found(self, source_name: str) -> None:
+        self._builder.add_source(source_name)
+        self._publish()
+
+    def on_scene_item_found(
+        self,
+        *,
+        scene_name: str,
+        source_name: str,
+        scene_item_id: int,
+        scene_item_enabled: bool | None = None,
+        is_scene: bool = False,
+    ) -> None:
+        self.state.add_scene_item(scene_name, source_name, scene_item_id)
+
+        if scene_item_enabled is not None:
+            self.state.set_scene_item_enabled(
+                scene_name, scene_item_id, scene_item_enabled
+            )
+
+        self._builder.add_scene_item(
+            scene_name=scene_name,
+            source_name=source_name,
+            scene_item_id=scene_item_id,
+            is_scene=is_scene,
+        )
+        self._publish()
+
+    def on_source_filter_found(
+        self, *, source_name: str, filter_name: str, filter_enabled: bool | None = None
+    ) -> None:
+        if filter_enabled is not None:
+            self.state.set_filter_enabled(source_name, filter_name, filter_enabled)
+
+        self._builder.add_source_filter(
+            source_name=source_name, filter_name=filter_name
+        )
+        self._publish()
+
+    def _process_mappings(
+        self, index: ActionIndex, msg: mido.Message, matched: list[str]
+    ) -> None:
+        # Updates are coalesced per target and sent at a capped rate by the
+        # updates thread, so that fader sweeps don't flood the WebSocket.
+        for input_name, mapping in index.input_volume_mappings:
+            if mapping.matches(msg):
+                matched.append(input_name)
+                self.pending_updates.submit(
+                    ("input_volume", input_name),
+                    methodcaller(
+                        "set_input_volume",
+                        name=input_name,
+                        multiplier=mapping.scale(msg.value),
+                    ),
+                )
+
+        for source_name, filter_name, mapping in index.source_filter_mappings:
+            if mapping.matches(msg):
+                matched.append(filter_name)
+                setting = mapping.setting_name
+                self.pending_updates.submit(
+                    ("filter_settings", source_name, filter_name, setting),
+                    methodcaller(
+                        "set_filter_settings",
+                        source=source_name,
+                        filtername=filter_name,
+                        settings={setting: mapping.scale(msg.value)},
+                    ),
+                )
+
+    def process(self, msg: mido.Message, client: ObsClient) -> list[str]:
+        """
+        Perform the actions bound to a message. Return the names of what it
+        matched (scenes, filters, inputs...), e.g. for monitoring.
+        """
+        # The same indexes all along, even if the collection changes meanwhile
+        indexes = (self._index, self._shared_index)
+        matched: list[str] = []
+
+        if msg.type == "control_change":
+            for index in indexes:
+                self._process_mappings(index, msg, matched)
+                index.update_thresholds(msg)
+
+        elif msg.type == "quarter_frame":
+            self._process_cues(indexes, client)
+            return matched
+
+        elif msg.type == "sysex":
+            # May be an MTC full frame message
+            self._process_cues(indexes, client)
+
+            if matches := [
+                match for index in indexes for match in index.sysex_trie.match(msg.data)
+            ]:
+                matches.sort(key=lambda match: match[0])
+                candidates = (action for _, action in matches)
+
+                if actions := self._select(candidates):
+                    self._perform(actions, client, indexes[0])
+                    matched.extend(action.trigger.text for action in actions)
+
+            return matched
+
+        if actions := self._select(
+            itertools.chain.from_iterable(index.candidates(msg) for index in indexes)
+        ):
+            self._perform(actions, client, indexes[0])
+            matched.extend(action.trigger.text for action in actions)
+
+        return matched
+
+    def _select(self, candidates: Iterable[Action]) -> list[Action]:
+        # Candidates come scenes first, then filters, scene items, media and
+        # collections, in the order they were found. Without multi-match, only
+        # the first one is performed.
+        selected: list[Action] = []
+        switches: set[type] = set()
+
+        for action in candidates:
+            if not self._multi_match:
+                return [action]
+
+            if isinstance(action, (SceneSwitch, SceneCollectionSwitch)):
+                # Switching to several scenes (or collections) at once makes no sense
+                if type(action) in switches:
+                    continue
+                switches.add(type(action))
+
+            selected.append(action)
+
+        return selected
+
+    def _process_cues(self, indexes: Iterable[ActionIndex], client: ObsClient) -> None:
+        timecode = self.timecode
+
+        if timecode.position < 0:
+            return
+
+        # Fire early by the OBS latency, so that changes land on their frame
+        lead = round(client.latency * timecode.fps * 4)
+
+        for index in indexes:
+            due = index.cues.due(
+                timecode.position + lead,
+                fps=timecode.fps,
+                generation=timecode.generation,
+            )
+
+            if due:
+                # Unlike messages, cues at the same position are all performed
+                self._perform(due, client, index)
+
+    def _perform(
+        self, actions: Sequence[Action], client: ObsClient, index: ActionIndex
+    ) -> None:
+        # Actions with the same timing are sent together, as a single request
+        # or request batch. Filter groups are those of the index the actions
+        # were matched in, even if another one is published before they run.
+        by_timing: dict[ActionTiming, list[Action]] = {}
+
+        for action in actions:
+            by_timing.setdefault(action.timing, []).append(action)
+
+        for timing, timed_actions in by_timing.items():
+            self._run(
+                timing,
+                functools.partial(
+                    self._execute, timed_actions, client, index.filter_groups
+                ),
+                client,
+            )
+
+    def _run(
+        self, timing: ActionTiming, action: Callable[[], None], client: ObsClient
+    ) -> None:
+        delay = timing.delay
+
+        if timing.quantize is not None:
+            # Send early by the OBS latency, so that the change lands on the
+            # boundary rather than after it.
+            latency = client.latency
+            wait = self.clock.time_to_boundary(timing.quantize, after=delay + latency)
+
+            if wait is not None:
+                delay = wait - latency
+
+        if delay <= 0:
+            action()
+            return
+
+        # Never wait on the MIDI callback thread
+        self.scheduler.schedule(delay, action)
+
+    def _execute(
+        self,
+        actions: Sequence[Action],
+        client: ObsClient,
+        filter_groups: dict[str, list[SourceFilterToggle]],
+    ) -> None:
+        requests: list[ObsRequest] = []
+
+        for action in actions:
+            if isinstance(action, SceneSwitch):
+                self._plan_scene_switch(action, requests, client)
+            elif isinstance(action, SourceFilterToggle):
+                self._plan_filter_toggle(action, requests, client, filter_groups)
+            elif isinstance(action, SceneItemToggle):
+                self._plan_scene_item_toggle(action, requests, client)
+            elif isinstance(action, SceneCollectionSwitch):
+                self._plan_collection_switch(action, requests, client)
+            else:
+                logger.info("Media action: %s", action.input_name)
+                # Prepared when indexing, nothing to resolve
+                requests.extend(action.requests)
+
+        self._send(requests, client)
+
+    def _send(self, requests: list[ObsRequest], client: ObsClient) -> None:
+        if not requests:
+            return
+
+        if client.is_connected():
+            if wait := self.throttle.acquire_action():
+                # OBS is struggling: keep the end state, send it a bit later.
+                # Requests without an end state (e.g. media actions) can't be
+                # coalesced, nor dropped while connected: they go now.
+                deferred = [r for r in requests if is_replayable(r)]
+                requests = [r for r in requests if not is_replayable(r)]
+
+                if deferred:
+                    self.buffer.add(deferred)
+                    self.scheduler.schedule(
+                        wait, functools.partial(self.replay, client), key="replay"
+                    )
+
+                if not requests:
+                    return
+
+            try:
+                client.send_requests(requests)
                 return
+            except ObsDisconnect:
+                pass
+
+        # Reconnection is handled by the events thread
+        logger.warning("OBS WebSocket disconnected, action buffered")
+        self.buffer.add(requests)
+
+    def replay(self, client: ObsClient) -> None:
+        """
+        Send requests of actions performed while OBS was disconnected.
+        """
+        if requests := self.buffer.drain():
+            logger.info("Replaying %d buffered requests", len(requests))
+            self._send(requests, client)
+
+    def _plan_scene_switch(
+        self, scene_switch: SceneSwitch, requests: list[ObsRequest], client: ObsClient
+    ) -> None:
+        scene = scene_switch.scene
+        previous_scene = self.state.get_current_program_scene()
+
+        if not self._plan_scene(scene, requests):
+            return
+
+        if scene_switch.timing.duration is not None and previous_scene is not None:
+
+            def revert() -> None:
+                # Unless another scene was switched to in the meantime
+                if self.state.get_current_program_scene() != scene:
+                    return
+
+                revert_requests: list[ObsRequest] = []
+                self._plan_scene(previous_scene, revert_requests)
+                self._send(revert_requests, client)
+
+            # A pending revert is kept if the switch is triggered again
+            self.scheduler.schedule(
+                scene_switch.timing.duration, revert, key=("scene", scene)
+            )
+
+    def _plan_scene(self, scene: str, requests: list[ObsRequest]) -> bool:
+        if self.state.get_current_program_scene() == scene:
+            logger.info("Scene already live: %s", scene)
+            self.state.elided["SetCurrentProgramScene"] += 1
+            return False
+
+        logger.info("Switch scene: %s", scene)
+        requests.append(("SetCurrentProgramScene", {"sceneName": scene}))
+        # Optimistic, confirmed by the CurrentProgramSceneChanged event
+        self.state.set_current_program_scene(scene)
+        return True
+
+    def _plan_collection_switch(
+        self,
+        collection_switch: SceneCollectionSwitch,
+        requests: list[ObsRequest],
+        client: ObsClient,
+    ) -> None:
+        collection = collection_switch.collection
+        previous_collection = self.state.get_current_scene_collection()
+
+        if not self._plan_collection(collection, requests):
+            return
+
+        if (
+            collection_switch.timing.duration is not None
+            and previous_collection is not None
+        ):
+
+            def revert() -> None:
+                if self.state.get_current_scene_collection() != collection:
+                    return
+
+                revert_requests: list[ObsRequest] = []
+                self._plan_collection(previous_collection, revert_requests)
+                self._send(revert_requests, client)
+
+            self.scheduler.schedule(
+                collection_switch.timing.duration,
+                revert,
+                key=("collection", collection),
+            )
+
+    def _plan_collection(self, collection: str, requests: list[ObsRequest]) -> bool:
+        if self.state.get_current_scene_collection() == collection:
+            logger.info("Scene collection already current: %s", collection)
+            self.state.elided["SetCurrentSceneCollection"] += 1
+            return False
+
+        logger.info("Switch scene collection: %s", collection)
+        # https://github.com/obsproject/obs-websocket/blob/master/docs/generated/protocol.md#setcurrentscenecollection
+        # Actions are swapped on the CurrentSceneCollectionChanged event
+        requests.append(
+            ("SetCurrentSceneCollection", {"sceneCollectionName": collection})
+        )
+        return True
+
+    def _plan_filter_toggle(
+        self,
+        filter_toggle: SourceFilterToggle,
+        requests: list[ObsRequest],
+        client: ObsClient,
+        filter_groups: dict[str, list[SourceFilterToggle]],
+    ) -> None:
+        source_name = filter_toggle.source_name
+        filter_name = filter_toggle.filter_name
+        current = self.state.is_filter_enabled(source_name, filter_name)
+
+        if filter_toggle.mode == FILTER_TOGGLE:
+            # Enable if unknown
+            enabled = not current
+        else:
+            enabled = filter_toggle.mode == FILTER_ON
+
+        changed = self._plan_filter(source_name, filter_name, enabled, requests)
+
+        if enabled and filter_toggle.group is not None:
+            # Exclusive group: hide the other filters of the group
+            # Triggers are compiled anew on each publish, compare by filter
+            for sibling in filter_groups.get(filter_toggle.group, ()):
+                if (sibling.source_name, sibling.filter_name) != (
+                    source_name,
+                    filter_name,
+                ):
+                    self._plan_filter(
+                        sibling.source_name, sibling.filter_name, False, requests
+                    )
+
+        # Only reverted if changed, as for scene switches
+        if filter_toggle.timing.duration is not None and changed:
+
+            def revert() -> None:
+                revert_requests: list[ObsRequest] = []
+                self._plan_filter(
+                    source_name, filter_name, not enabled, revert_requests
+                )
+                self._send(revert_requests, client)
+
+            # A pending revert is kept if the filter is triggered again
+            self.scheduler.schedule(
+                filter_toggle.timing.duration,
+                revert,
+                key=("filter", source_name, filter_name),
+            )
+
+    def _plan_filter(
+        self,
+        source_name: str,
+        filter_name: str,
+        enabled: bool,
+        requests: list[ObsRequest],
+    ) -> bool:
+        if self.state.is_filter_enabled(source_name, filter_name) == enabled:
+            logger.info(
+                "Filter already %s: %s on %s",
+                "shown" if enabled else "hidden",
+                filter_name,
+                source_name,
+            )
+            self.state.elided["SetSourceFilterEnabled"] += 1
+            return False
+
+        logger.info(
+            "%s filter: %s on %s",
+            "Show" if enabled else "Hide",
+            filter_name,
+            source_name,
+        )
+        requests.append(
+            (
+                "SetSourceFilterEnabled",
+                {
+                    "sourceName": source_name,
+                    "filterName": filter_name,
+                    "filterEnabled": enabled,
+                },
+            )
+        )
+        # Optimistic, confirmed by the SourceFilterEnableStateChanged event
+        self.state.set_filter_enabled(source_name, filter_name, enabled)
+        return True
+
+    def _plan_scene_item_toggle(
+        self,
+        item_toggle: SceneItemToggle,
+        requests: list[ObsRequest],
+        client: ObsClient,
+    ) -> None:
+        source_name = item_toggle.source_name
+        # Resolved from the local index, no need to ask OBS for item IDs
+        items = self.state.get_scene_items(source_name)
+
+        if not items:
+            logger.warning("No scene item found for: %s", source_name)
+            return
+
+        changes: list[tuple[str, int, bool]] = []
+
+        for scene_name, scene_item_id in items:
+            if item_toggle.mode == FILTER_TOGGLE:
+                current = self.state.is_scene_item_enabled(scene_name, scene_item_id)
+                # Enable if unknown
+                enabled = not current
+            else:
+                enabled = item_toggle.mode == FILTER_ON
+
+            if self._plan_scene_item(scene_name, scene_item_id, enabled, requests):
+                changes.append((scene_name, scene_item_id, enabled))
+
+        if item_toggle.timing.duration is not None and changes:
+
+            def revert() -> None:
+                revert_requests: list[ObsRequest] = []
+
+                for scene_name, scene_item_id, enabled in changes:
+                    self._plan_scene_item(
+                        scene_name, scene_item_id, not enabled, revert_requests
+                    )
+
+                self._send(revert_requests, client)
+
+            # A pending revert is kept if the item is triggered again
+            self.scheduler.schedule(
+                item_toggle.timing.duration,
+                revert,
+                key=("scene_item", source_name),
+            )
+
+    def _plan_scene_item(
+        self,
+        scene_name: str,
+        scene_item_id: int,
+        enabled: bool,
+        requests: list[ObsRequest],
+    ) -> bool:
+        if self.state.is_scene_item_enabled(scene_name, scene_item_id) == enabled:
+            logger.info(
+                "Scene item already %s: %d in %s",
+                "shown" if enabled else "hidden",
+                scene_item_id,
+                scene_name,
+            )
+            self.state.elided["SetSceneItemEnabled"] += 1
+            return False
+
+        logger.info(
+            "%s scene item: %d in %s",
+            "Show" if enabled else "Hide",
+            scene_item_id,
+            scene_name,
+        )
+        requests.append(
+            (
+                "SetSceneItemEnabled",
+                {
+                    "sceneName": scene_name,
+                    "sceneItemId": scene_item_id,
+                    "sceneItemEnabled": enabled,
+                },
+            )
+        )
+        # Optimistic, confirmed by the SceneItemEnableStateChanged event
+        self.state.set_scene_item_enabled(scene_name, scene_item_id, enabled)
+        return True
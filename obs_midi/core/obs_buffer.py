@@ -0,0 +1,101 @@
+import logging
+import threading
+import time
+from typing import Hashable
+
+from .obs_client import ObsRequest
+
+logger = logging.getLogger(__name__)
+
+
+def _replay_key(request: ObsRequest) -> Hashable | None:
+    # Requests with the same key set the same thing, only the last one matters.
+    # Requests without a key are not replayed.
+    request_type, request_data = request
+
+    match request_type:
+        case "SetCurrentProgramScene" | "SetCurrentSceneCollection":
+            # Latest target scene (or collection)
+            return (request_type,)
+
+        case "SetSourceFilterEnabled":
+            # Final desired state of the filter
+            return (
+                request_type,
+                request_data["sourceName"],
+                request_data["filterName"],
+            )
+
+        case "SetSceneItemEnabled":
+            return (
+                request_type,
+                request_data["sceneName"],
+                request_data["sceneItemId"],
+            )
+
+        case _:
+            # E.g. media actions: restarting a clip late would be worse than not
+            return None
+
+
+def is_replayable(request: ObsRequest) -> bool:
+    return _replay_key(request) is not None
+
+
+class OutboundBuffer:
+    """
+    Requests of actions performed while OBS is disconnected, replayed on
+    reconnection.
+
+    Only the intended end state is kept, so that replaying converges at once
+    rather than going through every intermediate step. The buffer is bounded
+    in size (oldest requests are dropped first) and in age.
+    """
+
+    MAX_SIZE = 256
+    # Seconds, older requests are dropped on replay
+    MAX_AGE = 30.0
+
+    def __init__(self, *, max_size: int = MAX_SIZE, max_age: float = MAX_AGE) -> None:
+        self._lock = threading.Lock()
+        self._max_size = max_size
+        self._max_age = max_age
+        # By replay key, in insertion order
+        self._requests: dict[Hashable, tuple[float, ObsRequest]] = {}
+        self.buffered = 0
+        self.dropped = 0
+        self.replayed = 0
+
+    def __len__(self) -> int:
+        return len(self._requests)
+
+    def add(self, requests: list[ObsRequest]) -> None:
+        now = time.monotonic()
+
+        with self._lock:
+            for request in requests:
+                key = _replay_key(request)
+
+                if key is None:
+                    self.dropped += 1
+                    continue
+
+                self.buffered += 1
+                # Re-inserted, so that it is replayed after earlier requests
+                self._requests.pop(key, None)
+                self._requests[key] = (now, request)
+
+                if len(self._requests) > self._max_size:
+                    del self._requests[next(iter(self._requests))]
+                    self.dropped += 1
+
+    def drain(self) -> list[ObsRequest]:
+        with self._lock:
+            entries = list(self._requests.values())
+            self._requests.clear()
+
+        deadline = time.monotonic() - self._max_age
+        requests = [request for added_at, request in entries if added_at >= deadline]
+        self.dropped += len(entries) - len(requests)
+        self.replayed += len(requests)
+        return requests
@@ -3,8 +3,10 @@ import hashlib
 import json
 import logging
 import sys
+import time
 import uuid
 from contextlib import contextmanager
+from dataclasses import dataclass
 from typing import Iterator
 
 import websockets
@@ -12,6 +14,33 @@ from websockets.sync.client import Connection, connect
 
 logger = logging.getLogger(__name__)
 
+# Request type and data
+ObsRequest = tuple[str, dict]
+
+
+class PreparedRequest(tuple[str, dict]):
+    """
+    A request encoded ahead of time, e.g. when indexing actions, so that
+    sending it only costs inserting a request ID.
+    """
+
+    _head: str
+    _batch_item: str
+
+    def __new__(cls, request_type: str, request_data: dict) -> "PreparedRequest":
+        self = super().__new__(cls, (request_type, request_data))
+        msg = {"op": 6, "d": {"requestType": request_type, "requestData": request_data}}
+        # Without the closing braces
+        self._head = json.dumps(msg)[:-2]
+        self._batch_item = json.dumps(msg["d"])
+        return self
+
+    def encode(self, request_id: str) -> str:
+        return f'{self._head}, "requestId": "{request_id}"}}}}'
+
+    def encode_batch_item(self) -> str:
+        return self._batch_item
+
 
 class ObsDisconnect(Exception):
     def __init__(self, code: int) -> None:
@@ -33,6 +62,20 @@ class ObsDisconnect(Exception):
                 return "Unknown error"
 
 
+@dataclass
+class ConnectionStats:
+    messages_sent: int = 0
+    messages_received: int = 0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    disconnects: int = 0
+    reconnects: int = 0
+    # Of the last disconnection, in seconds: from the last message received to
+    # the disconnection being noticed, then to being connected again.
+    time_to_detect: float | None = None
+    time_to_recover: float | None = None
+
+
 @contextmanager
 def create_obs_client(port: int, password: str) -> Iterator["ObsClient"]:
     client = ObsClient(port=port, password=password)
@@ -49,27 +92,126 @@ class ObsClient:
 
     REQUEST_GET_SCENE_LIST = "GetSceneList"
 
-    def __init__(self, port: int, password: str) -> None:
+    # https://github.com/obsproject/obs-websocket/blob/master/docs/generated/protocol.md#eventsubscription
+    EVENT_SUBSCRIPTION_CONFIG = 1 << 1
+    EVENT_SUBSCRIPTION_SCENES = 1 << 2
+    EVENT_SUBSCRIPTION_INPUTS = 1 << 3
+    EVENT_SUBSCRIPTION_FILTERS = 1 << 5
+    EVENT_SUBSCRIPTION_SCENE_ITEMS = 1 << 7
+
+    DEFAULT_EVENT_SUBSCRIPTIONS = (
+        EVENT_SUBSCRIPTION_CONFIG
+        | EVENT_SUBSCRIPTION_SCENES
+        | EVENT_SUBSCRIPTION_INPUTS
+        | EVENT_SUBSCRIPTION_FILTERS
+        | EVENT_SUBSCRIPTION_SCENE_ITEMS
+    )
+
+    # Scene item lists of large collections exceed the 1 MiB default
+    MAX_MESSAGE_SIZE = 64 * 2**20
+
+    def __init__(
+        self,
+        port: int,
+        password: str,
+        *,
+        name: str = "main",
+        event_subscriptions: int = DEFAULT_EVENT_SUBSCRIPTIONS,
+        heartbeat_interval: float | None = None,
+        heartbeat_timeout: float = 0,
+    ) -> None:
         self._port = port
         self._password = password
+        # Used in logs, to tell connections apart
+        self.name = name
+        self._event_subscriptions = event_subscriptions
+        self.stats = ConnectionStats()
+        # Heartbeats are sent when the connection is quiet, and the connection
+        # is considered dead when nothing is received before the timeout.
+        self._heartbeat_interval = heartbeat_interval
+        self._heartbeat_timeout = heartbeat_timeout
+        self._last_received_at = 0.0
+        self._last_heartbeat_at = 0.0
+        self._disconnected_at: float | None = None
         self._ws: Connection | None = None
         self._request_data_entries: dict[str, dict] = {}
         self._request_ids_with_response: set[str] = set()
+        # Send time of action requests, to measure latency from their response
+        self._action_sent_at: dict[str, float] = {}
+        self.latency = 0.0
 
     def connect(self) -> None:
         assert self._ws is None, "Already connected"
-        self._ws = connect(f"ws://localhost:{self._port}")
+        self._ws = connect(
+            f"ws://localhost:{self._port}", max_size=self.MAX_MESSAGE_SIZE
+        )
+        self._last_received_at = time.monotonic()
+
         try:
             self._authenticate()
         except ObsDisconnect:
             raise
 
+        if self._disconnected_at is not None:
+            self.stats.time_to_recover = time.monotonic() - self._disconnected_at
+            self._disconnected_at = None
+
     def reconnect(self) -> None:
         if self._ws is not None:
             self._ws.close()
             self._ws = None
 
+        self._action_sent_at.clear()
+
         self.connect()
+        self.stats.reconnects += 1
+
+    def configure(self, *, port: int, password: str) -> None:
+        """
+        Change the OBS port or password. An open connection is dropped, and
+        the events thread reconnects with the new settings.
+        """
+        self._port = port
+        self._password = password
+
+        if (ws := self._ws) is not None:
+            ws.close_socket()
+
+    def is_connected(self) -> bool:
+        return self._ws is not None
+
+    def _disconnected(self, code: int) -> ObsDisconnect:
+        now = time.monotonic()
+        self._ws = None
+        self._disconnected_at = now
+        self.stats.disconnects += 1
+        self.stats.time_to_detect = now - self._last_received_at
+        return ObsDisconnect(code)
+
+    def check_liveness(self) -> None:
+        """
+        Send a heartbeat if the connection has been quiet, and raise
+        ObsDisconnect if nothing was received within the heartbeat timeout.
+
+        A half-open connection (e.g. after network loss to a remote OBS) is
+        otherwise only noticed when the OS gives up on it, minutes later.
+        """
+        if self._heartbeat_interval is None or self._ws is None:
+            return
+
+        now = time.monotonic()
+        quiet = now - self._last_received_at
+
+        if quiet > self._heartbeat_timeout:
+            logger.warning("No message from OBS for %.1fs", quiet)
+            # Closing handshake would wait for the dead peer
+            self._ws.close_socket()
+            raise self._disconnected(websockets.CloseCode.ABNORMAL_CLOSURE)
+
+        if min(quiet, now - self._last_heartbeat_at) > self._heartbeat_interval:
+            # https://github.com/obsproject/obs-websocket/blob/master/docs/generated/protocol.md#getversion
+            self._last_heartbeat_at = now
+            self.send_request("GetVersion")
 
     def close(self) -> None:
         if self._ws is None:
@@ -106,8 +248,8 @@ class ObsClient:
             "d": {
                 "rpcVersion": 1,
                 "authentication": auth,
-                # https://github.com/obsproject/obs-websocket/blob/master/docs/generated/protocol.md#eventsubscription
-                "eventSubscriptions": 0,  # None (we don't need to receive any events yet)
+                # Only what's needed to keep the local state mirror current
+                "eventSubscriptions": self._event_subscriptions,
             },
         }
 
@@ -122,26 +264,36 @@ class ObsClient:
         assert self._ws is not None, "Not connected"
 
         try:
-            return self._ws.recv(timeout)
+            msg = self._ws.recv(timeout)
         except TimeoutError:
             return ""
         except websockets.ConnectionClosed as exc:
-            self._ws = None
-            raise ObsDisconnect(
+            raise self._disconnected(
                 exc.rcvd.code if exc.rcvd else websockets.CloseCode.ABNORMAL_CLOSURE
             )
 
+        self._last_received_at = time.monotonic()
+        self.stats.messages_received += 1
+        self.stats.bytes_received += len(msg)
+        return msg
+
     def _send(self, msg: str) -> None:
-        assert self._ws is not None, "Not connected"
+        ws = self._ws
+
+        if ws is None:
+            # Lost from another thread since the caller checked
+            raise ObsDisconnect(websockets.CloseCode.ABNORMAL_CLOSURE)
 
         try:
-            self._ws.send(msg)
+            ws.send(msg)
         except websockets.ConnectionClosed as exc:
-            self._ws = None
-            raise ObsDisconnect(
+            raise self._disconnected(
                 exc.rcvd.code if exc.rcvd else websockets.CloseCode.ABNORMAL_CLOSURE
             )
 
+        self.stats.messages_sent += 1
+        self.stats.bytes_sent += len(msg)
+
     def iter_events(self, poll_interval: float | None) -> Iterator[dict | None]:
         while True:
             msg = self._recv(timeout=poll_interval)
@@ -163,6 +315,70 @@ class ObsClient:
     def is_request_response(self, event: dict) -> bool:
         return event["op"] == 7 and event["d"].get("requestStatus", {}).get("result")
 
+    # Weight of the latest measurement in the latency estimate
+    LATENCY_SMOOTHING = 0.2
+
+    def track_latency(self, event: dict) -> None:
+        # The one-way latency is estimated as half of the round trip time
+        if event["op"] not in (7, 9):  # RequestResponse, RequestBatchResponse
+            return
+
+        sent_at = self._action_sent_at.pop(event["d"]["requestId"], None)
+
+        if sent_at is None:
+            return
+
+        latency = (time.monotonic() - sent_at) / 2
+        self.latency += self.LATENCY_SMOOTHING * (latency - self.latency)
+
+    def _send_action(self, request_type: str, request_data: dict) -> None:
+        request_id = str(uuid.uuid4())
+
+        msg = {
+            "op": 6,
+            "d": {
+                "requestType": request_type,
+                "requestId": request_id,
+                "requestData": request_data,
+            },
+        }
+
+        self._action_sent_at[request_id] = time.monotonic()
+        self._send(json.dumps(msg))
+
+    def send_requests(self, requests: list[ObsRequest]) -> None:
+        # Several requests are sent as a batch, i.e. in a single round trip
+        if len(requests) == 1:
+            request = requests[0]
+
+            if isinstance(request, PreparedRequest):
+                request_id = str(uuid.uuid4())
+                self._action_sent_at[request_id] = time.monotonic()
+                self._send(request.encode(request_id))
+            else:
+                self._send_action(*request)
+
+            return
+
+        # https://github.com/obsproject/obs-websocket/blob/master/docs/generated/protocol.md#requestbatch-opcode-8
+        request_id = str(uuid.uuid4())
+
+        # Prepared requests are inserted as encoded, e.g. "seek=10s play"
+        items = ", ".join(
+            request.encode_batch_item()
+            if isinstance(request, PreparedRequest)
+            else json.dumps({"requestType": request[0], "requestData": request[1]})
+            for request in requests
+        )
+        # executionType 0 is SerialRealtime
+        msg = (
+            f'{{"op": 8, "d": {{"requestId": "{request_id}", "haltOnFailure": false, '
+            f'"executionType": 0, "requests": [{items}]}}}}'
+        )
+
+        self._action_sent_at[request_id] = time.monotonic()
+        self._send(msg)
+
     def send_request(self, request_type: str, request_data: dict | None = None) -> str:
         # https://github.com/obsproject/obs-websocket/blob/master/docs/generated/protocol.md#getscenelist
         request_id = str(uuid.uuid4())
@@ -184,31 +400,48 @@ class ObsClient:
         return request_id
 
     def set_current_program_scene(self, name: str) -> None:
-        # https://github.com/obsproject/obs-websocket/blob/master/docs/generated/protocol.md#setcurrentscenecollection
+        # https://github.com/obsproject/obs-websocket/blob/master/docs/generated/protocol.md#setcurrentprogramscene
+        self._send_action("SetCurrentProgramScene", {"sceneName": name})
+
+    def set_filter_enabled(self, source: str, filtername: str, enabled: bool) -> None:
+        # https://github.com/obsproject/obs-websocket/blob/master/docs/generated/protocol.md#setsourcefilterenabled
+        self._send_action(
+            "SetSourceFilterEnabled",
+            {
+                "sourceName": source,
+                "filterName": filtername,
+                "filterEnabled": enabled,
+            },
+        )
+
+    def set_input_volume(self, name: str, multiplier: float) -> None:
+        # https://github.com/obsproject/obs-websocket/blob/master/docs/generated/protocol.md#setinputvolume
         msg = {
             "op": 6,
             "d": {
-                "requestType": "SetCurrentProgramScene",
+                "requestType": "SetInputVolume",
                 "requestId": str(uuid.uuid4()),
                 "requestData": {
-                    "sceneName": name,
+                    "inputName": name,
+                    "inputVolumeMul": multiplier,
                 },
             },
         }
 
         self._send(json.dumps(msg))
 
-    def enable_filter(self, source: str, filtername: str) -> None:
-        # https://github.com/obsproject/obs-websocket/blob/master/docs/generated/protocol.md#setsourcefilterenabled
+    def set_filter_settings(self, source: str, filtername: str, settings: dict) -> None:
+        # https://github.com/obsproject/obs-websocket/blob/master/docs/generated/protocol.md#setsourcefiltersettings
         msg = {
             "op": 6,
             "d": {
-                "requestType": "SetSourceFilterEnabled",
+                "requestType": "SetSourceFilterSettings",
                 "requestId": str(uuid.uuid4()),
                 "requestData": {
                     "sourceName": source,
                     "filterName": filtername,
-                    "filterEnabled": True,
+                    "filterSettings": settings,
+                    "overlay": True,
                 },
             },
         }
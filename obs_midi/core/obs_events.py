@@ -1,8 +1,10 @@
 import logging
 import queue
+import random
 import threading
-import time
-from typing import Any, Callable
+from typing import Any, Callable, Iterator
+
+import websockets
 
 from .obs_client import ObsClient, ObsDisconnect
 
@@ -37,25 +39,44 @@ class ObsEventsThread(threading.Thread):
     def add_event_handler(self, cb: Callable[[dict], None]) -> None:
         self._event_handlers.append(cb)
 
-    def _reconnect(self) -> None:
+    # Disconnections are often transient, retry right away first
+    FIRST_RETRY_DELAY = 0.05
+    MAX_RECONNECT_DELAY = 30.0
+
+    def _reconnect_delays(self) -> Iterator[float]:
+        yield self.FIRST_RETRY_DELAY
+
+        delay = self._reconnect_delay
+
         while True:
-            logger.warning(
-                "Attempting new connection in %d seconds...",
-                self._reconnect_delay,
-            )
+            # Jitter spreads retries of several connections (or clients)
+            yield delay * random.uniform(0.5, 1)
+            delay = min(delay * 2, self.MAX_RECONNECT_DELAY)
 
-            time.sleep(self._reconnect_delay)
+    def _reconnect(self) -> None:
+        for delay in self._reconnect_delays():
+            logger.warning("Attempting new connection in %.2f seconds...", delay)
 
-            if self._close_event.is_set():
+            if self._close_event.wait(delay):
                 break
 
             try:
                 self._client.reconnect()
-            except ConnectionError:
-                logger.error("Reconnection failed")
+            except ObsDisconnect as exc:
+                if exc.is_session_invalidated_error:
+                    raise
+
+                # e.g. OBS restarting, not accepting connections yet
+                logger.error("Reconnection failed: %s", exc)
+                continue
+            except (OSError, websockets.InvalidHandshake) as exc:
+                logger.error("Reconnection failed: %s", exc)
                 continue
             else:
-                logger.info("Reconnection successful")
+                logger.info(
+                    "Reconnection successful, recovered in %.3fs",
+                    self._client.stats.time_to_recover,
+                )
                 break
 
     def run(
@@ -63,7 +84,7 @@ class ObsEventsThread(threading.Thread):
     ) -> None:
         try:
             self._client.connect()
-            logger.info("Connected to OBS WebSocket")
+            logger.info("Connected to OBS WebSocket (%s)", self._client.name)
 
             self._open_event.set()
 
@@ -82,6 +103,8 @@ class ObsEventsThread(threading.Thread):
                             logger.info("Stopping...")
                             break
 
+                        self._client.check_liveness()
+
                         if event is None:
                             continue
 
@@ -94,7 +117,11 @@ class ObsEventsThread(threading.Thread):
                         logger.warning("Session invalidated from OBS UI, aborting...")
                         raise
 
-                    logger.warning("OBS WebSocket disconnected")
+                    logger.warning(
+                        "OBS WebSocket disconnected (%s), noticed after %.3fs",
+                        self._client.name,
+                        self._client.stats.time_to_detect,
+                    )
                     self._on_disconnect()
 
                     if self._close_event.is_set():
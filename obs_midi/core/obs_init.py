@@ -1,14 +1,54 @@
 import logging
 import threading
 import time
-from typing import Any
+from pathlib import Path
+from typing import Any, Callable
 
 from .obs_actions import ObsActions
 from .obs_client import ObsClient
+from .scene_collections import index_scene_collection, read_scene_collections
 
 logger = logging.getLogger(__name__)
 
 
+class DiscoveryProgress:
+    """
+    Progress of discovery, by stage.
+
+    Scene triggers are live once scenes are ready. Filter triggers are armed
+    source by source, as filter lists arrive.
+    """
+
+    def __init__(self) -> None:
+        self.started_at = time.monotonic()
+        # Seconds since start
+        self.scenes_ready_after: float | None = None
+        self.filters_ready_after: float | None = None
+        # Sources whose filter list was requested, and received
+        self.sources_total = 0
+        self.sources_done = 0
+
+    @property
+    def scenes_ready(self) -> bool:
+        return self.scenes_ready_after is not None
+
+    @property
+    def done(self) -> bool:
+        return self.filters_ready_after is not None
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def __str__(self) -> str:
+        if not self.scenes_ready:
+            return "Discovering scenes"
+
+        if self.done:
+            return "Scenes ready / filters ready"
+
+        return f"Scenes ready / filters {self.sources_done}/{self.sources_total}"
+
+
 class ObsInitThread(threading.Thread):
     def __init__(
         self,
@@ -16,6 +56,8 @@ class ObsInitThread(threading.Thread):
         obs_actions: ObsActions,
         ws_open_event: threading.Event,
         close_event: threading.Event,
+        on_progress: Callable[[DiscoveryProgress], None] = lambda progress: None,
+        scene_collections_dir: Path | None = None,
         **kwargs: Any,
     ) -> None:
         super().__init__(**kwargs)
@@ -23,8 +65,30 @@ class ObsInitThread(threading.Thread):
         self._obs_actions = obs_actions
         self._ws_open_event = ws_open_event
         self._close_event = close_event
+        self._on_progress = on_progress
+        # Other scene collections are indexed from their files, if found
+        self._scene_collections_dir = scene_collections_dir
+        self._scene_collections: list[str] = []
+        self._scenes_ready_event = threading.Event()
         self._done_event = threading.Event()
+        # Set after each discovery, so that files are indexed anew
+        self._index_event = threading.Event()
         self._request_ids: set[str] = set()
+        # Responses may be handled before their request ID is recorded otherwise
+        self._lock = threading.Lock()
+        self._sources: set[str] = set()
+        self._reloading = False
+        self.progress = DiscoveryProgress()
+
+    def wait_scenes_ready(self) -> bool:
+        """
+        Wait until scene triggers are live. Return False if closed before.
+        """
+        while not self._scenes_ready_event.wait(0.2):
+            if self._close_event.is_set() or not self.is_alive():
+                return False
+
+        return True
 
     def run(self) -> None:
         logger.info("Waiting for WebSocket to be open...")
@@ -39,58 +103,230 @@ class ObsInitThread(threading.Thread):
 
             time.sleep(0.2)
 
+        with self._lock:
+            self._request_ids.add(self._client.send_request("GetSceneCollectionList"))
+            self._discover()
+
+        while not self._close_event.is_set():
+            # Once the current collection is live, files may have been saved
+            # since the previous discovery (e.g. on collection switches)
+            if self._index_event.wait(0.2):
+                self._index_event.clear()
+                self._index_scene_collections()
+
+        logger.info("Stopping...")
+
+    def _discover(self) -> None:
+        self.progress = DiscoveryProgress()
+        self._sources = set()
+        self._done_event.clear()
         self._request_ids.add(self._client.send_request("GetSceneList"))
         logger.info("Scene list request sent")
 
-        while True:
-            if self._done_event.is_set():
-                logger.info("Done")
-                break
+    def rediscover(self) -> None:
+        """
+        Discover scene collections and scenes again, e.g. after reconnecting.
+        Actions found before are kept, unless reset (see ObsActions.reset()).
+        """
+        with self._lock:
+            self._request_ids = {self._client.send_request("GetSceneCollectionList")}
+            self._discover()
 
-            if self._close_event.is_set():
-                logger.info("Stopping...")
-                break
+    def reload(self) -> None:
+        """
+        Discover the current collection anew, e.g. after renames in OBS. The
+        current actions stay live until the new ones are all found.
+        """
+        with self._lock:
+            logger.info("Reloading...")
+            self._reloading = True
+            self._obs_actions.begin_reload()
+            self._request_ids = {self._client.send_request("GetSceneCollectionList")}
+            self._discover()
 
-            time.sleep(0.2)
+    def is_discovering(self) -> bool:
+        return not self._done_event.is_set()
+
+    def _index_scene_collections(self) -> None:
+        if self._scene_collections_dir is None or not self._scene_collections:
+            return
+
+        started_at = time.monotonic()
+        saved = read_scene_collections(self._scene_collections_dir)
+
+        for name in self._scene_collections:
+            if (data := saved.get(name)) is None:
+                logger.warning("Scene collection file not found: %s", name)
+                continue
+
+            builder = index_scene_collection(data)
+
+            with self._lock:
+                self._obs_actions.add_scene_collection_index(name, builder)
+
+        logger.info("Scene collections indexed in %.3fs", time.monotonic() - started_at)
+
+    # Seconds to wait for more changes, e.g. while typing a name in OBS
+    RELOAD_DELAY = 0.5
+
+    # Changes that may add or remove triggers
+    # https://github.com/obsproject/obs-websocket/blob/master/docs/generated/protocol.md#events
+    RELOAD_EVENTS = {
+        "SceneCreated",
+        "SceneRemoved",
+        "SceneNameChanged",
+        "InputCreated",
+        "InputRemoved",
+        "InputNameChanged",
+        "SourceFilterCreated",
+        "SourceFilterRemoved",
+        "SourceFilterNameChanged",
+        "SceneItemCreated",
+        "SceneItemRemoved",
+    }
+
+    def _handle_obs_event(self, event_type: str, data: dict) -> None:
+        if event_type in self.RELOAD_EVENTS:
+            # Coalesced with the following changes
+            self._obs_actions.scheduler.schedule(
+                self.RELOAD_DELAY, self.reload, key="reload"
+            )
+            return
+
+        # https://github.com/obsproject/obs-websocket/blob/master/docs/generated/protocol.md#config-events
+        match event_type:
+            case "CurrentSceneCollectionChanged":
+                self._obs_actions.set_scene_collection(data["sceneCollectionName"])
+                # Rediscovered, in case the collection was not indexed yet
+                # or changed since. Responses to the previous discovery are ignored.
+                self._request_ids = set()
+                self._discover()
+
+            case "SceneCollectionListChanged":
+                for name in data["sceneCollections"]:
+                    self._obs_actions.on_scene_collection_found(name)
+
+                self._scene_collections = list(data["sceneCollections"])
 
     def handle_event(self, event: dict) -> None:
+        with self._lock:
+            self._handle_event(event)
+
+    def _handle_event(self, event: dict) -> None:
+        if event["op"] == 5:
+            self._handle_obs_event(
+                event["d"]["eventType"], event["d"].get("eventData", {})
+            )
+            return
+
         if self._done_event.is_set():
             return
 
         if not self._client.is_request_response(event):
             return
 
-        self._request_ids.remove(event["d"]["requestId"])
+        request_id = event["d"]["requestId"]
+
+        if request_id not in self._request_ids:
+            # Response to an action, sent while discovery goes on
+            return
+
+        self._request_ids.remove(request_id)
+        progress = self.progress
 
         match event["d"]["requestType"]:
+            case "GetSceneCollectionList":
+                response_data = event["d"]["responseData"]
+                current_collection = response_data["currentSceneCollectionName"]
+                self._obs_actions.set_scene_collection(current_collection)
+
+                with self._obs_actions.batch():
+                    for name in response_data["sceneCollections"]:
+                        self._obs_actions.on_scene_collection_found(name)
+
+                # The current one is discovered rather than indexed
+                self._scene_collections = list(response_data["sceneCollections"])
+
             case "GetSceneList":
-                for data in event["d"]["responseData"]["scenes"]:
-                    scene_name = data["sceneName"]
-                    self._obs_actions.on_scene_found(scene_name)
+                response_data = event["d"]["responseData"]
+
+                current_scene = response_data.get("currentProgramSceneName")
+
+                if current_scene is not None:
+                    self._obs_actions.state.set_current_program_scene(current_scene)
+
+                # Actions found in a response are published together
+                with self._obs_actions.batch():
+                    for data in response_data["scenes"]:
+                        self._obs_actions.on_scene_found(data["sceneName"])
+
+                for data in response_data["scenes"]:
                     self._request_ids.add(
                         self._client.send_request(
-                            "GetSceneItemList", {"sceneName": scene_name}
+                            "GetSceneItemList", {"sceneName": data["sceneName"]}
                         )
                     )
 
+                progress.scenes_ready_after = progress.elapsed()
+                logger.info("Scenes ready in %.3fs", progress.scenes_ready_after)
+                self._scenes_ready_event.set()
+                self._on_progress(progress)
+
             case "GetSceneItemList":
+                request_data = self._client.get_request_data(request_id)
+
+                with self._obs_actions.batch():
+                    for data in event["d"]["responseData"]["sceneItems"]:
+                        self._obs_actions.on_source_found(data["sourceName"])
+                        self._obs_actions.on_scene_item_found(
+                            scene_name=request_data["sceneName"],
+                            source_name=data["sourceName"],
+                            scene_item_id=data["sceneItemId"],
+                            scene_item_enabled=data.get("sceneItemEnabled"),
+                            # Groups are scenes too, but only shown or hidden
+                            is_scene=(
+                                data.get("sourceType") == "OBS_SOURCE_TYPE_SCENE"
+                                and not data.get("isGroup")
+                            ),
+                        )
+
                 for data in event["d"]["responseData"]["sceneItems"]:
+                    source_name = data["sourceName"]
+
+                    if source_name in self._sources:
+                        # Sources may be used in several scenes
+                        continue
+
+                    self._sources.add(source_name)
+                    progress.sources_total += 1
                     self._request_ids.add(
                         self._client.send_request(
-                            "GetSourceFilterList",
-                            {"sourceName": data["sourceName"]},
+                            "GetSourceFilterList", {"sourceName": source_name}
                         )
                     )
 
             case "GetSourceFilterList":
-                request_data = self._client.get_request_data(event["d"]["requestId"])
+                request_data = self._client.get_request_data(request_id)
 
-                for data in event["d"]["responseData"]["filters"]:
-                    source_name = request_data["sourceName"]
-                    filter_name = data["filterName"]
-                    self._obs_actions.on_source_filter_found(
-                        source_name=source_name, filter_name=filter_name
-                    )
+                with self._obs_actions.batch():
+                    for data in event["d"]["responseData"]["filters"]:
+                        self._obs_actions.on_source_filter_found(
+                            source_name=request_data["sourceName"],
+                            filter_name=data["filterName"],
+                            filter_enabled=data.get("filterEnabled"),
+                        )
+
+                progress.sources_done += 1
+                self._on_progress(progress)
 
         if not self._request_ids:
+            progress.filters_ready_after = progress.elapsed()
+            logger.info("Filters ready in %.3fs", progress.filters_ready_after)
+
+            if self._reloading:
+                self._reloading = False
+                self._obs_actions.end_reload()
+
             self._done_event.set()
+            self._index_event.set()
+            self._on_progress(progress)
@@ -0,0 +1,122 @@
+import collections
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ObsState:
+    """
+    Local mirror of the OBS state that actions depend on.
+
+    Seeded during discovery, then kept current from OBS events. This allows
+    skipping requests that would not change anything, and computing toggles
+    without asking OBS for the current state first.
+    """
+
+    def __init__(self) -> None:
+        self._current_scene_collection: str | None = None
+        self._current_program_scene: str | None = None
+        self._filters_enabled: dict[tuple[str, str], bool] = {}
+        # Scene items (scene name, item ID), by source: actions address
+        # sources by name, while OBS requests need the item ID. A scene may
+        # show a source several times.
+        self._scene_items: dict[str, list[tuple[str, int]]] = {}
+        self._scene_items_enabled: dict[tuple[str, int], bool] = {}
+        # Number of requests that were not sent because they would be no-ops,
+        # by request type.
+        self.elided: collections.Counter[str] = collections.Counter()
+
+    def clear(self) -> None:
+        # State may have changed while disconnected
+        self._current_program_scene = None
+        self._filters_enabled.clear()
+        # Item IDs are kept, they only change when items are re-created
+        self._scene_items_enabled.clear()
+
+    def reset(self) -> None:
+        # Another scene collection was loaded, nothing applies anymore
+        self.clear()
+        self._scene_items.clear()
+
+    def get_current_scene_collection(self) -> str | None:
+        return self._current_scene_collection
+
+    def set_current_scene_collection(self, collection: str) -> None:
+        self._current_scene_collection = collection
+
+    def get_current_program_scene(self) -> str | None:
+        return self._current_program_scene
+
+    def set_current_program_scene(self, scene: str) -> None:
+        self._current_program_scene = scene
+
+    def is_filter_enabled(self, source_name: str, filter_name: str) -> bool | None:
+        return self._filters_enabled.get((source_name, filter_name))
+
+    def set_filter_enabled(
+        self, source_name: str, filter_name: str, enabled: bool
+    ) -> None:
+        self._filters_enabled[(source_name, filter_name)] = enabled
+
+    def get_scene_items(self, source_name: str) -> list[tuple[str, int]]:
+        """
+        Return the scene name and ID of the items showing a source.
+        """
+        return self._scene_items.get(source_name, [])
+
+    def add_scene_item(
+        self, scene_name: str, source_name: str, scene_item_id: int
+    ) -> None:
+        items = self._scene_items.setdefault(source_name, [])
+
+        if (scene_name, scene_item_id) not in items:
+            items.append((scene_name, scene_item_id))
+
+    def remove_scene_item(
+        self, scene_name: str, source_name: str, scene_item_id: int
+    ) -> None:
+        items = self._scene_items.get(source_name, [])
+
+        if (scene_name, scene_item_id) in items:
+            items.remove((scene_name, scene_item_id))
+
+        self._scene_items_enabled.pop((scene_name, scene_item_id), None)
+
+    def is_scene_item_enabled(self, scene_name: str, scene_item_id: int) -> bool | None:
+        return self._scene_items_enabled.get((scene_name, scene_item_id))
+
+    def set_scene_item_enabled(
+        self, scene_name: str, scene_item_id: int, enabled: bool
+    ) -> None:
+        self._scene_items_enabled[(scene_name, scene_item_id)] = enabled
+
+    def handle_event(self, event: dict) -> None:
+        # https://github.com/obsproject/obs-websocket/blob/master/docs/generated/protocol.md#events
+        if event["op"] != 5:
+            return
+
+        data = event["d"].get("eventData", {})
+
+        match event["d"]["eventType"]:
+            case "CurrentProgramSceneChanged":
+                self.set_current_program_scene(data["sceneName"])
+
+            case "SourceFilterEnableStateChanged":
+                self.set_filter_enabled(
+                    data["sourceName"], data["filterName"], data["filterEnabled"]
+                )
+
+            case "SceneItemCreated":
+                self.add_scene_item(
+                    data["sceneName"], data["sourceName"], data["sceneItemId"]
+                )
+
+            case "SceneItemRemoved":
+                self.remove_scene_item(
+                    data["sceneName"], data["sourceName"], data["sceneItemId"]
+                )
+
+            case "SceneItemEnableStateChanged":
+                self.set_scene_item_enabled(
+                    data["sceneName"], data["sceneItemId"], data["sceneItemEnabled"]
+                )
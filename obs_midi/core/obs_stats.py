@@ -0,0 +1,163 @@
+import logging
+import queue
+import threading
+import time
+from typing import Any
+
+from .obs_client import ObsClient, ObsDisconnect
+
+logger = logging.getLogger(__name__)
+
+
+class Throttle:
+    """
+    Outbound rate limits, tightened when OBS is struggling.
+
+    Continuous updates back off first: their interval doubles at each level.
+    Discrete actions (scene switches, filters...) are only spaced out at the
+    higher levels.
+    """
+
+    MAX_LEVEL = 3
+    # Minimum seconds between action requests, by level
+    ACTION_INTERVALS = (0.0, 0.0, 0.05, 0.2)
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.level = 0
+        self._last_action_at = 0.0
+        self.throttled_actions = 0
+
+    @property
+    def update_interval_factor(self) -> int:
+        return 2**self.level
+
+    def acquire_action(self) -> float:
+        """
+        Return 0 if an action request can be sent now, or how many seconds to
+        wait before trying again.
+        """
+        interval = self.ACTION_INTERVALS[self.level]
+
+        with self._lock:
+            now = time.monotonic()
+            wait = self._last_action_at + interval - now
+
+            if wait > 0:
+                self.throttled_actions += 1
+                return wait
+
+            self._last_action_at = now
+            return 0
+
+
+class ObsStatsMonitor:
+    """
+    Follows OBS render and output health from GetStats responses, and sets
+    the throttle level accordingly.
+    """
+
+    # Above this ratio of skipped frames since the previous poll, OBS is lagging
+    MAX_SKIPPED_RATIO = 0.01
+    # Above this share of the frame interval, rendering is about to lag
+    MAX_RENDER_LOAD = 0.8
+    # Healthy polls in a row before lowering the throttle level
+    RECOVERY_POLLS = 3
+
+    def __init__(self, throttle: Throttle) -> None:
+        self.throttle = throttle
+        self._previous: dict | None = None
+        self._healthy_polls = 0
+        self.active_fps = 0.0
+        self.render_skipped_ratio = 0.0
+        self.output_skipped_ratio = 0.0
+
+    def handle_event(self, event: dict) -> None:
+        if event["op"] != 7 or event["d"]["requestType"] != "GetStats":
+            return
+
+        if (data := event["d"].get("responseData")) is not None:
+            self.update(data)
+
+    def _skipped_ratio(self, data: dict, prefix: str) -> float:
+        previous = self._previous or {}
+        skipped = data[f"{prefix}SkippedFrames"] - previous.get(
+            f"{prefix}SkippedFrames", 0
+        )
+        total = data[f"{prefix}TotalFrames"] - previous.get(f"{prefix}TotalFrames", 0)
+        # Counters are reset when outputs restart
+        return skipped / total if total > 0 and skipped >= 0 else 0.0
+
+    def update(self, data: dict) -> None:
+        # https://github.com/obsproject/obs-websocket/blob/master/docs/generated/protocol.md#getstats
+        self.active_fps = data["activeFps"]
+        self.render_skipped_ratio = self._skipped_ratio(data, "render")
+        self.output_skipped_ratio = self._skipped_ratio(data, "output")
+        self._previous = data
+
+        frame_time = 1000 / self.active_fps if self.active_fps else None
+        strained = (
+            self.render_skipped_ratio > self.MAX_SKIPPED_RATIO
+            or self.output_skipped_ratio > self.MAX_SKIPPED_RATIO
+            or (
+                frame_time is not None
+                and data["averageFrameRenderTime"] > self.MAX_RENDER_LOAD * frame_time
+            )
+        )
+        level = self.throttle.level
+
+        if strained:
+            self._healthy_polls = 0
+            level = min(level + 1, Throttle.MAX_LEVEL)
+        else:
+            self._healthy_polls += 1
+
+            if self._healthy_polls >= self.RECOVERY_POLLS:
+                self._healthy_polls = 0
+                level = max(level - 1, 0)
+
+        if level != self.throttle.level:
+            logger.warning(
+                "OBS %s, throttle level %d",
+                "lagging" if strained else "recovered",
+                level,
+            )
+            self.throttle.level = level
+
+
+class ObsStatsThread(threading.Thread):
+    def __init__(
+        self,
+        *,
+        client: ObsClient,
+        interval: float,
+        close_event: threading.Event,
+        error_bucket: queue.Queue[Exception],
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(**kwargs)
+        self._client = client
+        self._interval = interval
+        self._close_event = close_event
+        self._error_bucket = error_bucket
+
+    def run(self) -> None:
+        try:
+            # Responses are handled by the events thread (see ObsStatsMonitor)
+            while not self._close_event.wait(self._interval):
+                if not self._client.is_connected():
+                    continue
+
+                try:
+                    self._client.send_request("GetStats")
+                except ObsDisconnect:
+                    # Reconnection is handled by the events thread
+                    pass
+
+            logger.info("Stopping...")
+        except Exception as exc:
+            logger.exception(exc)
+            self._close_event.set()
+            self._error_bucket.put_nowait(exc)
+        finally:
+            logger.info("Stopped")
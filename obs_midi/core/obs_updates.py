@@ -0,0 +1,102 @@
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Hashable
+
+from .obs_client import ObsClient, ObsDisconnect
+from .obs_stats import Throttle
+
+logger = logging.getLogger(__name__)
+
+ObsUpdate = Callable[[ObsClient], None]
+
+
+class PendingUpdates:
+    """
+    Latest pending update per target (e.g. an input volume or a filter setting).
+
+    Submitting an update for a target replaces any update that has not been
+    sent yet, so that a fader sweep results in at most one request per target
+    and per tick.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._updates: dict[Hashable, ObsUpdate] = {}
+        self.submitted = 0
+        self.coalesced = 0
+
+    def submit(self, target: Hashable, update: ObsUpdate) -> None:
+        with self._lock:
+            self.submitted += 1
+            if target in self._updates:
+                self.coalesced += 1
+            self._updates[target] = update
+
+    def drain(self) -> list[ObsUpdate]:
+        with self._lock:
+            if not self._updates:
+                return []
+            updates = list(self._updates.values())
+            self._updates.clear()
+            return updates
+
+
+class ObsUpdatesThread(threading.Thread):
+    def __init__(
+        self,
+        *,
+        client: ObsClient,
+        pending_updates: PendingUpdates,
+        rate: float,
+        throttle: Throttle | None = None,
+        close_event: threading.Event,
+        error_bucket: queue.Queue[Exception],
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(**kwargs)
+        self._client = client
+        self._pending_updates = pending_updates
+        self._interval = 1 / rate
+        self._throttle = throttle
+        self._close_event = close_event
+        self._error_bucket = error_bucket
+
+    def run(self) -> None:
+        try:
+            next_tick = time.monotonic()
+
+            while True:
+                interval = self._interval
+
+                if self._throttle is not None:
+                    # Continuous updates are the first to back off
+                    interval *= self._throttle.update_interval_factor
+
+                next_tick += interval
+                # Skip ticks we missed rather than sending bursts to catch up
+                next_tick = max(next_tick, time.monotonic())
+
+                if self._close_event.wait(next_tick - time.monotonic()):
+                    logger.info("Stopping...")
+                    break
+
+                if not self._client.is_connected():
+                    # Reconnection is handled by the events thread. Updates are
+                    # kept meanwhile, the latest value per target is sent then.
+                    continue
+
+                updates = self._pending_updates.drain()
+
+                try:
+                    for update in updates:
+                        update(self._client)
+                except ObsDisconnect:
+                    logger.warning("OBS WebSocket disconnected, updates dropped")
+        except Exception as exc:
+            logger.exception(exc)
+            self._close_event.set()
+            self._error_bucket.put_nowait(exc)
+        finally:
+            logger.info("Stopped")
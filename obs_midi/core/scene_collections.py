@@ -0,0 +1,96 @@
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+
+from .obs_actions import ActionIndexBuilder
+
+logger = logging.getLogger(__name__)
+
+
+def get_scene_collections_dir() -> Path | None:
+    """
+    Return the directory where a local OBS saves scene collections, if any.
+    """
+    if sys.platform == "win32":
+        config_dirs = [Path(os.environ.get("APPDATA", "~")) / "obs-studio"]
+    elif sys.platform == "darwin":
+        config_dirs = [Path("~/Library/Application Support/obs-studio")]
+    else:
+        config_home = Path(os.environ.get("XDG_CONFIG_HOME", "~/.config"))
+        config_dirs = [
+            config_home / "obs-studio",
+            # Flatpak
+            Path("~/.var/app/com.obsproject.Studio/config/obs-studio"),
+        ]
+
+    for config_dir in config_dirs:
+        path = config_dir.expanduser() / "basic" / "scenes"
+
+        if path.is_dir():
+            return path
+
+    return None
+
+
+def read_scene_collections(directory: Path) -> dict[str, dict]:
+    """
+    Return saved scene collections, by name.
+    """
+    collections = {}
+
+    # File names are derived from collection names, the actual name is inside
+    for path in sorted(directory.glob("*.json")):
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            logger.warning("Cannot read scene collection %s: %s", path.name, exc)
+            continue
+
+        if isinstance(data, dict) and isinstance(data.get("name"), str):
+            collections[data["name"]] = data
+
+    return collections
+
+
+def index_scene_collection(data: dict) -> ActionIndexBuilder:
+    """
+    Index the actions of a saved scene collection, as discovery would.
+    """
+    builder = ActionIndexBuilder()
+    sources = {source["name"]: source for source in data.get("sources", [])}
+    scene_names = [scene["name"] for scene in data.get("scene_order", [])] or [
+        name for name, source in sources.items() if source.get("id") == "scene"
+    ]
+    filters_found: set[str] = set()
+
+    for scene_name in scene_names:
+        builder.add_scene(scene_name)
+
+    for scene_name in scene_names:
+        scene = sources.get(scene_name, {})
+
+        for item in scene.get("settings", {}).get("items", []):
+            source_name = item["name"]
+            builder.add_source(source_name)
+            builder.add_scene_item(
+                scene_name=scene_name,
+                source_name=source_name,
+                scene_item_id=item["id"],
+                # Groups are saved with another ID
+                is_scene=sources.get(source_name, {}).get("id") == "scene",
+            )
+
+            if source_name in filters_found:
+                # Sources may be used in several scenes
+                continue
+
+            filters_found.add(source_name)
+
+            for filter_data in sources.get(source_name, {}).get("filters", []):
+                builder.add_source_filter(
+                    source_name=source_name, filter_name=filter_data["name"]
+                )
+
+    return builder
@@ -0,0 +1,156 @@
+import heapq
+import itertools
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Hashable
+
+from .obs_client import ObsDisconnect
+
+logger = logging.getLogger(__name__)
+
+
+class _Timer:
+    __slots__ = ("deadline", "seq", "callback", "key", "cancelled")
+
+    def __init__(
+        self, deadline: float, seq: int, callback: Callable[[], None], key: Hashable
+    ) -> None:
+        self.deadline = deadline
+        self.seq = seq
+        self.callback = callback
+        self.key = key
+        self.cancelled = False
+
+    def __lt__(self, other: "_Timer") -> bool:
+        return (self.deadline, self.seq) < (other.deadline, other.seq)
+
+
+class Scheduler:
+    """
+    Timers with monotonic deadlines, kept in a heap and fired by a single
+    thread (see SchedulerThread).
+
+    Scheduling is cheap and never blocks on OBS, so it is safe to call from
+    the MIDI callback.
+    """
+
+    # Upper bound on waits, so that the thread notices when it should stop
+    POLL_INTERVAL = 0.2
+
+    def __init__(self) -> None:
+        self._cond = threading.Condition()
+        self._heap: list[_Timer] = []
+        self._keys: dict[Hashable, _Timer] = {}
+        self._seq = itertools.count()
+        # Lateness of fired timers, in seconds
+        self.fired = 0
+        self.max_lateness = 0.0
+        self.total_lateness = 0.0
+
+    def pending(self) -> int:
+        with self._cond:
+            return sum(1 for timer in self._heap if not timer.cancelled)
+
+    @property
+    def mean_lateness(self) -> float:
+        return self.total_lateness / self.fired if self.fired else 0.0
+
+    def schedule(
+        self, delay: float, callback: Callable[[], None], *, key: Hashable = None
+    ) -> bool:
+        """
+        Call `callback` after `delay` seconds.
+
+        If a `key` is given and a timer with the same key is pending, the
+        pending timer is kept and False is returned.
+        """
+        with self._cond:
+            if key is not None and key in self._keys:
+                return False
+
+            timer = _Timer(time.monotonic() + delay, next(self._seq), callback, key)
+            heapq.heappush(self._heap, timer)
+
+            if key is not None:
+                self._keys[key] = timer
+
+            if self._heap[0] is timer:
+                self._cond.notify()
+
+            return True
+
+    def cancel(self, key: Hashable) -> None:
+        with self._cond:
+            if (timer := self._keys.pop(key, None)) is not None:
+                # Removed from the heap lazily
+                timer.cancelled = True
+
+    def run_pending(self, timeout: float) -> None:
+        """
+        Wait for the next deadline (at most `timeout`), then fire due timers.
+        """
+        with self._cond:
+            now = time.monotonic()
+
+            if not self._heap or self._heap[0].deadline > now:
+                wait = timeout if not self._heap else self._heap[0].deadline - now
+                self._cond.wait(min(wait, timeout))
+                now = time.monotonic()
+
+            due = []
+
+            while self._heap and self._heap[0].deadline <= now:
+                timer = heapq.heappop(self._heap)
+
+                if timer.cancelled:
+                    continue
+
+                if timer.key is not None:
+                    del self._keys[timer.key]
+
+                due.append(timer)
+
+        for timer in due:
+            lateness = time.monotonic() - timer.deadline
+            self.fired += 1
+            self.total_lateness += lateness
+            self.max_lateness = max(self.max_lateness, lateness)
+
+            try:
+                timer.callback()
+            except ObsDisconnect:
+                # Reconnection is handled by the events thread
+                logger.warning("OBS WebSocket disconnected, timed action dropped")
+            except Exception:
+                # Later timers still fire
+                logger.exception("Timed action failed")
+
+
+class SchedulerThread(threading.Thread):
+    def __init__(
+        self,
+        *,
+        scheduler: Scheduler,
+        close_event: threading.Event,
+        error_bucket: queue.Queue[Exception],
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(**kwargs)
+        self._scheduler = scheduler
+        self._close_event = close_event
+        self._error_bucket = error_bucket
+
+    def run(self) -> None:
+        try:
+            while not self._close_event.is_set():
+                self._scheduler.run_pending(timeout=Scheduler.POLL_INTERVAL)
+
+            logger.info("Stopping...")
+        except Exception as exc:
+            logger.exception(exc)
+            self._close_event.set()
+            self._error_bucket.put_nowait(exc)
+        finally:
+            logger.info("Stopped")
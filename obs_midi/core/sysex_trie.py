@@ -0,0 +1,62 @@
+from typing import Generic, Sequence, TypeVar
+
+T = TypeVar("T")
+
+# A pattern byte, or None for any byte
+SysexPattern = tuple[int | None, ...]
+
+
+class _Node(Generic[T]):
+    __slots__ = ("children", "wildcard", "items")
+
+    def __init__(self) -> None:
+        self.children: dict[int, _Node[T]] = {}
+        self.wildcard: _Node[T] | None = None
+        self.items: list[T] = []
+
+
+class SysexTrie(Generic[T]):
+    """
+    Sysex patterns indexed by byte prefix.
+
+    Patterns match payloads that start with them. Matching walks the payload
+    one byte at a time, so it costs time proportional to the depth of the
+    patterns rather than their number.
+    """
+
+    def __init__(self) -> None:
+        self._root: _Node[T] = _Node()
+
+    def insert(self, pattern: SysexPattern, item: T) -> None:
+        node = self._root
+
+        for byte in pattern:
+            if byte is None:
+                if node.wildcard is None:
+                    node.wildcard = _Node()
+                node = node.wildcard
+            else:
+                node = node.children.setdefault(byte, _Node())
+
+        node.items.append(item)
+
+    def match(self, data: Sequence[int]) -> list[T]:
+        matches: list[T] = []
+        # Wildcards may lead to several paths
+        stack = [(self._root, 0)]
+        size = len(data)
+
+        while stack:
+            node, depth = stack.pop()
+            matches.extend(node.items)
+
+            if depth == size:
+                continue
+
+            if (child := node.children.get(data[depth])) is not None:
+                stack.append((child, depth + 1))
+
+            if node.wildcard is not None:
+                stack.append((node.wildcard, depth + 1))
+
+        return matches
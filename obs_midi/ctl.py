@@ -0,0 +1,56 @@
+import argparse
+import json
+import sys
+
+from .core.control_socket import ControlError, get_default_socket_path, send_command
+from .utils.argparse import EnvDefault
+
+
+def run_ctl(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="obs-midi ctl",
+        description="Manage OBS MIDI running with --daemon",
+    )
+    parser.add_argument(
+        "--socket",
+        action=EnvDefault,
+        env_var="OBS_MIDI_SOCKET",
+        required=False,
+        default=get_default_socket_path(),
+        help="Control socket path",
+    )
+
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="Show connections and discovery status")
+    commands.add_parser("stats", help="Show connection, scheduler and buffer counters")
+    commands.add_parser("triggers", help="List MIDI triggers")
+    commands.add_parser("rescan", help="Read triggers from names in OBS again")
+    commands.add_parser("pause", help="Ignore MIDI messages, OBS stays connected")
+    commands.add_parser("resume", help="Resume after pause")
+    switch_input = commands.add_parser("switch_input", help="Switch MIDI input port")
+    switch_input.add_argument("port", nargs="?", help="Port name, or a virtual port")
+    inject = commands.add_parser("inject", help="Process a test MIDI message")
+    inject.add_argument(
+        "message", help='e.g. "control_change channel=0 control=9 value=1"'
+    )
+    commands.add_parser("shutdown", help="Stop OBS MIDI")
+
+    args = parser.parse_args(argv)
+    arguments = {
+        name: value
+        for name, value in vars(args).items()
+        if name not in ("socket", "command")
+    }
+
+    try:
+        result = send_command(args.socket, args.command, **arguments)
+    except (OSError, ControlError) as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        raise SystemExit(1)
+
+    if result is not None:
+        print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    run_ctl()
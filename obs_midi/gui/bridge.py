@@ -0,0 +1,60 @@
+import queue
+import tkinter as tk
+from typing import Any, Callable, Hashable
+
+
+class Bridge:
+    """
+    Runs callbacks from worker threads on the Tk main loop.
+
+    Workers never touch Tk: they post callbacks to a queue, without blocking,
+    and the main loop drains it on a timer. Callbacks posted with the same key
+    in between are coalesced, only the last one runs (e.g. status updates
+    during reconnection storms).
+    """
+
+    POLL_INTERVAL = 50  # ms
+
+    def __init__(self, root: tk.Tk) -> None:
+        self._root = root
+        self._queue: queue.SimpleQueue[
+            tuple[Hashable | None, Callable[..., None], tuple]
+        ] = queue.SimpleQueue()
+        self._after_id = root.after(self.POLL_INTERVAL, self._drain)
+
+    def post(
+        self, cb: Callable[..., None], *args: Any, key: Hashable | None = None
+    ) -> None:
+        """
+        Run a callback on the Tk main loop. Safe to call from any thread.
+        """
+        self._queue.put((key, cb, args))
+
+    def wrap(
+        self, cb: Callable[..., None], *, key: Hashable | None = None
+    ) -> Callable[..., None]:
+        """
+        Return a function that posts the callback when called.
+        """
+        return lambda *args: self.post(cb, *args, key=key)
+
+    def _drain(self) -> None:
+        # First, so that a failing callback doesn't stop the bridge
+        self._after_id = self._root.after(self.POLL_INTERVAL, self._drain)
+        posted = []
+
+        while True:
+            try:
+                posted.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        # Index of the last callback posted for each key
+        last = {key: i for i, (key, _, _) in enumerate(posted) if key is not None}
+
+        for i, (key, cb, args) in enumerate(posted):
+            if key is None or last[key] == i:
+                cb(*args)
+
+    def close(self) -> None:
+        self._root.after_cancel(self._after_id)
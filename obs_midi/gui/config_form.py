@@ -6,6 +6,7 @@ from typing import TYPE_CHECKING
 import mido
 
 if TYPE_CHECKING:
+    from ..core.obs_init import DiscoveryProgress
     from .gui import GUI
 
 logger = logging.getLogger("obs_midi.gui")
@@ -119,6 +120,19 @@ class ConfigForm(ttk.Frame):
         self._status.set("Running")
         self._status_label.config(foreground="green")
 
+    def _set_reconnected(self) -> None:
+        # Paused until resumed by the user
+        if self._gui.is_application_running():
+            self._set_running()
+        else:
+            self._set_paused()
+
+    def _set_discovery_progress(self, progress: "DiscoveryProgress") -> None:
+        if not progress.scenes_ready or not self._gui.is_application_running():
+            return
+
+        self._status.set("Running" if progress.done else f"Running ({progress})")
+
     def _set_disconnected(self) -> None:
         self._status.set("OBS disconnected. Reconnecting...")
         self._status_label.config(foreground="darkorange")
@@ -130,6 +144,12 @@ class ConfigForm(ttk.Frame):
         self._status.set(f"Error: {exc}" if str(exc) else "Error")
         self._status_label.config(foreground="red")
 
+    def _set_paused(self) -> None:
+        self._set_disabled(False)
+        self._cta_label.set("Start")
+        self._status.set("Paused")
+        self._status_label.config(foreground="grey")
+
     def _set_stopped(self) -> None:
         self._set_disabled(False)
         self._cta_label.set("Start")
@@ -139,6 +159,7 @@ class ConfigForm(ttk.Frame):
     def _on_click_cta(self) -> None:
         if self._gui.is_application_running():
             self._gui.stop_application()
+            self._set_paused()
             return
 
         self._set_starting()
@@ -153,7 +174,10 @@ class ConfigForm(ttk.Frame):
             obs_password=self._obs_password.get(),
             on_ready=lambda: self._set_running(),
             on_obs_disconnect=lambda: self._set_disconnected(),
-            on_obs_reconnect=lambda: self._set_running(),
+            on_obs_reconnect=lambda: self._set_reconnected(),
+            on_discovery_progress=lambda progress: self._set_discovery_progress(
+                progress
+            ),
             on_error=lambda exc: self._set_error(exc),
             on_stopped=lambda: self._set_stopped(),
         )
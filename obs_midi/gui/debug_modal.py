@@ -1,12 +1,37 @@
-import functools
 import tkinter as tk
 from tkinter import ttk
+from typing import Sequence
 
 import mido
 
-from ..core.obs_actions import MIDITrigger
+from ..core.obs_actions import (
+    ControlChangeMapping,
+    ControlChangeThresholdTrigger,
+    ControlChangeTrigger,
+    HighResControlChangeTrigger,
+    MIDITrigger,
+    MTCCue,
+    NoteOnTrigger,
+    ParameterNumberTrigger,
+    ProgramChangeTrigger,
+    SysexTrigger,
+)
 from .constants import WM_CLASS_NAME
-from .utils import scrollable_frame
+from .utils import VirtualList
+
+ALL_TYPES = "All types"
+
+TRIGGER_TYPES: dict[type, str] = {
+    ProgramChangeTrigger: "Program change",
+    ControlChangeTrigger: "Control change",
+    ControlChangeThresholdTrigger: "CC threshold",
+    NoteOnTrigger: "Note",
+    ControlChangeMapping: "CC mapping",
+    HighResControlChangeTrigger: "14-bit CC",
+    ParameterNumberTrigger: "NRPN/RPN",
+    SysexTrigger: "SysEx",
+    MTCCue: "MTC cue",
+}
 
 
 class DebugModal(tk.Toplevel):
@@ -16,8 +41,17 @@ class DebugModal(tk.Toplevel):
         super().__init__(root, class_=WM_CLASS_NAME)
         self.title("OBS MIDI - Debug")
 
-        triggers = sorted(triggers, key=lambda t: t.sort_key())
-        triggers = triggers * 40
+        self._triggers = sorted(triggers, key=lambda t: t.sort_key())
+        # Rows, and lowercase text searched in, computed once
+        self._rows = [
+            (str(t), TRIGGER_TYPES.get(type(t), type(t).__name__), t.text)
+            for t in self._triggers
+        ]
+        self._search_texts = [f"{name} {text}".lower() for name, _, text in self._rows]
+        # Indexes of triggers shown, for the current query and type
+        self._shown = list(range(len(self._rows)))
+        self._query = ""
+        self._type = ALL_TYPES
 
         # Keep reference to hold port open
         self._output = mido.open_output(midi_input)
@@ -25,31 +59,89 @@ class DebugModal(tk.Toplevel):
         container = ttk.Frame(self, padding=20)
 
         trigger_list_title = ttk.Label(container, text="MIDI Triggers")
-        trigger_list_outer, trigger_list_inner = scrollable_frame(container)
-
-        for i, trigger in enumerate(triggers):
-            trigger_button = ttk.Button(
-                trigger_list_inner,
-                text="Send",
-                command=functools.partial(self._send, trigger),
-            )
-            trigger_name = ttk.Label(trigger_list_inner, text=str(trigger))
-            trigger_text = ttk.Label(trigger_list_inner, text=trigger.text)
-
-            trigger_button.grid(row=i, column=0, sticky="we", pady=2)
-            trigger_name.grid(row=i, column=1, sticky="w", pady=2, padx=10)
-            trigger_text.grid(row=i, column=2, sticky="w", pady=2)
-
-        trigger_list_inner.grid_columnconfigure(2, weight=1)
-
-        trigger_list_title.grid(row=0, column=0, sticky="nwe")
-        trigger_list_outer.grid(row=1, column=0, sticky="nswe", pady=5)
-        container.grid_rowconfigure(1, weight=1)
+
+        filters = ttk.Frame(container)
+        self._search_var = tk.StringVar()
+        self._search_var.trace_add("write", lambda *args: self._apply_filters())
+        search_entry = ttk.Entry(filters, textvariable=self._search_var)
+        self._type_var = tk.StringVar(value=ALL_TYPES)
+        type_select = ttk.Combobox(
+            filters,
+            textvariable=self._type_var,
+            values=[ALL_TYPES, *sorted({row[1] for row in self._rows})],
+            state="readonly",
+            width=16,
+        )
+        type_select.bind("<<ComboboxSelected>>", lambda *args: self._apply_filters())
+        search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        type_select.pack(side=tk.LEFT, padx=(10, 0))
+
+        self._trigger_list = VirtualList(
+            container,
+            columns={"Trigger": 140, "Type": 110, "Action": 300},
+            on_activate=self._send_shown,
+        )
+        self._trigger_list.set_rows(self._rows)
+
+        self._count_label = ttk.Label(container)
+        send_button = ttk.Button(
+            container,
+            text="Send",
+            command=lambda: self._send_selected(),
+        )
+
+        trigger_list_title.grid(row=0, column=0, columnspan=2, sticky="nwe")
+        filters.grid(row=1, column=0, columnspan=2, sticky="we", pady=5)
+        self._trigger_list.grid(row=2, column=0, columnspan=2, sticky="nswe", pady=5)
+        self._count_label.grid(row=3, column=0, sticky="w")
+        send_button.grid(row=3, column=1, sticky="e")
+        container.grid_rowconfigure(2, weight=1)
         container.grid_columnconfigure(0, weight=1)
 
         container.grid(row=0, column=0, sticky="nswe")
         self.grid_rowconfigure(0, weight=1)
         self.grid_columnconfigure(0, weight=1)
+        self.geometry("640x480")
+
+        self._update_count()
+        search_entry.focus()
+
+    def _apply_filters(self) -> None:
+        query = self._search_var.get().strip().lower()
+        trigger_type = self._type_var.get()
+
+        candidates: Sequence[int]
+
+        if trigger_type == self._type and query.startswith(self._query):
+            # Narrowing the search, only look within triggers shown
+            candidates = self._shown
+        else:
+            candidates = range(len(self._rows))
+
+        self._shown = [
+            i
+            for i in candidates
+            if query in self._search_texts[i]
+            and (trigger_type == ALL_TYPES or self._rows[i][1] == trigger_type)
+        ]
+        self._query = query
+        self._type = trigger_type
+        self._trigger_list.set_rows([self._rows[i] for i in self._shown])
+        self._update_count()
+
+    def _update_count(self) -> None:
+        self._count_label.configure(
+            text=f"{len(self._shown)} of {len(self._rows)} triggers"
+        )
+
+    def _send_selected(self) -> None:
+        if (index := self._trigger_list.get_selected()) is not None:
+            self._send_shown(index)
+
+    def _send_shown(self, index: int) -> None:
+        self._send(self._triggers[self._shown[index]])
 
     def _send(self, trigger: MIDITrigger) -> None:
-        self._output.send(trigger.get_message())
+        # e.g. MSB then LSB for 14-bit CC triggers
+        for msg in trigger.get_messages():
+            self._output.send(msg)
@@ -4,22 +4,33 @@ import tkinter as tk
 from tkinter import ttk
 from typing import Callable
 
-from ..core.main import INFO_MIDI_INPUT_PORT_NAME, INFO_MIDI_TRIGGERS, run
-from ..core.midi_in import mido_input_opener
+from ..core.engine import Engine, EngineConfig
+from ..core.engine_process import ProcessEngine
+from ..core.main import INFO_MIDI_INPUT_PORT_NAME, INFO_MONITOR
+from ..core.monitor import Monitor, SharedMonitor
+from ..core.obs_init import DiscoveryProgress
+from .bridge import Bridge
 from .config_form import ConfigForm
 from .debug_modal import DebugModal
 from .menu import Menu
+from .monitor_panel import MonitorPanel
 
 logger = logging.getLogger("obs_midi.gui")
 
 
 class GUI:
-    def __init__(self, root: tk.Tk) -> None:
+    # ms
+    CLOSE_TIMEOUT = 5000
+
+    def __init__(self, root: tk.Tk, *, engine_process: bool = False) -> None:
         self._root = root
-        self._application_thread: threading.Thread | None = None
-        self._application_info: dict | None = None
+        # Kept across Stop/Start, see Engine
+        self._engine: Engine | ProcessEngine = (
+            ProcessEngine() if engine_process else Engine()
+        )
+        self._bridge = Bridge(root)
+        self._closing = False
         self._debug_modal: DebugModal | None = None
-        self._close_event = threading.Event()
 
         root.title("OBS MIDI")
 
@@ -35,7 +46,11 @@ class GUI:
 
         config_form = ConfigForm(main_page, self)
         config_form.grid(row=0, column=0, sticky="n")
-        main_page.grid_rowconfigure(0, weight=1)
+
+        monitor_panel = MonitorPanel(main_page, get_monitor=self._get_monitor)
+        monitor_panel.grid(row=1, column=0, sticky="nswe", pady=(20, 0))
+        main_page.grid_rowconfigure(1, weight=1)
+        main_page.grid_columnconfigure(0, weight=1)
 
         root.protocol("WM_DELETE_WINDOW", self.destroy)  # Window close button
         root.bind("<Control-w>", lambda *args: self.destroy())
@@ -43,6 +58,10 @@ class GUI:
 
         logger.info("Ready")
 
+    def _get_monitor(self) -> Monitor | SharedMonitor | None:
+        info = self._engine.info
+        return None if info is None else info.get(INFO_MONITOR)
+
     def open_midi_debug_modal(self) -> None:
         if self._debug_modal is not None:
             self._debug_modal.focus()
@@ -53,12 +72,13 @@ class GUI:
             self._debug_modal.attributes("-topmost", False)
             return
 
-        assert self._application_info is not None
+        info = self._engine.info
+        assert info is not None
 
         self._debug_modal = DebugModal(
             self._root,
-            midi_input=self._application_info[INFO_MIDI_INPUT_PORT_NAME],
-            triggers=self._application_info[INFO_MIDI_TRIGGERS],
+            midi_input=info[INFO_MIDI_INPUT_PORT_NAME],
+            triggers=self._engine.get_triggers(),
         )
 
         def on_debug_modal_closed() -> None:
@@ -79,67 +99,98 @@ class GUI:
         on_ready: Callable[[], None] = lambda: None,
         on_obs_disconnect: Callable[[], None] = lambda: None,
         on_obs_reconnect: Callable[[], None] = lambda: None,
+        on_discovery_progress: Callable[[DiscoveryProgress], None] = (
+            lambda progress: None
+        ),
         on_error: Callable[[Exception], None] = lambda exc: None,
         on_stopped: Callable[[], None] = lambda: None,
     ) -> None:
         assert not self.is_application_running(), "Application is already running"
-        self._application_info = None
-
-        self._close_event.clear()
+        config = EngineConfig(
+            midi_port=midi_port, obs_port=obs_port, obs_password=obs_password
+        )
 
-        def _run() -> None:
-            logger.info("Application thread has started")
+        if self._engine.is_ready():
+            # Paused: only apply what changed in the config. Switching the MIDI
+            # input waits for the port to open, never on the main GUI thread.
+            def _reconfigure() -> None:
+                try:
+                    self._engine.reconfigure(config)
+                except Exception as exc:
+                    # Still running with the previous MIDI input, and paused
+                    logger.error("Could not apply config: %s", exc)
+                    self._bridge.post(on_error, exc)
+                    return
+
+                self._bridge.post(on_ready)
+
+            threading.Thread(target=_reconfigure, daemon=True).start()
+            return
 
-            def _on_ready(info: dict) -> None:
+        def _on_ready() -> None:
+            # Unless stopped while starting, the engine is then ready, paused
+            if not self._engine.is_paused():
                 on_ready()
-                self._application_info = info
-                self._menu.set_open_midi_debug_modal_state(tk.NORMAL)
-
-            try:
-                run(
-                    midi_input_opener=mido_input_opener(port=midi_port),
-                    obs_port=obs_port,
-                    obs_password=obs_password,
-                    on_ready=_on_ready,
-                    on_obs_disconnect=on_obs_disconnect,
-                    on_obs_reconnect=on_obs_reconnect,
-                    close_event=self._close_event,
-                )
-            except Exception as exc:
-                logger.exception("Application returned an error: %s", repr(exc))
-                on_error(exc)
-            else:
-                logger.info("Application has stopped")
-                on_stopped()
-
-        logger.info("Starting application thread")
-        t = threading.Thread(target=_run)
-        t.daemon = True
-        t.start()
-        self._application_thread = t
 
-    def is_application_running(self) -> bool:
-        return (
-            self._application_thread is not None and self._application_thread.is_alive()
+            self._set_engine_menu_state(tk.NORMAL)
+
+        def _on_error(exc: Exception) -> None:
+            self._set_engine_menu_state(tk.DISABLED)
+            on_error(exc)
+
+        def _on_stopped() -> None:
+            self._set_engine_menu_state(tk.DISABLED)
+            on_stopped()
+
+        # Callbacks come from engine threads, and are run on the Tk main loop.
+        # Status updates are coalesced, only the latest one is shown.
+        bridge = self._bridge
+        self._engine.start(
+            config,
+            on_ready=bridge.wrap(lambda info: _on_ready()),
+            on_obs_disconnect=bridge.wrap(on_obs_disconnect, key="connection"),
+            on_obs_reconnect=bridge.wrap(on_obs_reconnect, key="connection"),
+            on_discovery_progress=bridge.wrap(on_discovery_progress, key="progress"),
+            on_error=bridge.wrap(_on_error),
+            on_stopped=bridge.wrap(_on_stopped),
         )
 
-    def stop_application(self) -> None:
-        self._close_event.set()
-        self._menu.set_open_midi_debug_modal_state(tk.DISABLED)
+    def _set_engine_menu_state(self, state: str) -> None:
+        self._menu.set_open_midi_debug_modal_state(state)
+        self._menu.set_reload_triggers_state(state)
 
-        # Be careful not to block the main GUI thread
-        while (
-            self._application_thread is not None and self._application_thread.is_alive()
-        ):
-            self._application_thread.join(0.1)
-            self._root.update()
+    def reload_triggers(self) -> None:
+        self._engine.reload()
 
-        self._application_thread = None
+    def is_application_running(self) -> bool:
+        return self._engine.is_running() and not self._engine.is_paused()
+
+    def stop_application(self) -> None:
+        # MIDI messages are ignored, connections stay open
+        self._engine.pause()
+
+    def _close_application(self, on_closed: Callable[[], None]) -> None:
+        self._set_engine_menu_state(tk.DISABLED)
+        # Never wait on the main GUI thread, the engine reports when it's done
+        self._engine.close(on_closed=self._bridge.wrap(on_closed))
 
     def focus_none(self) -> None:
         # Focusing the root has the effect of unfocusing all other widgets
         self._root.focus()
 
     def destroy(self) -> None:
-        self.stop_application()
-        self._root.destroy()
+        if self._closing:
+            return
+
+        self._closing = True
+        # Gone for the user at once, while connections close
+        self._root.withdraw()
+
+        def _destroy() -> None:
+            self._root.after_cancel(timeout_id)
+            self._bridge.close()
+            self._root.destroy()
+
+        # Engine threads are daemons, don't wait on a stuck one forever
+        timeout_id = self._root.after(self.CLOSE_TIMEOUT, _destroy)
+        self._close_application(on_closed=_destroy)
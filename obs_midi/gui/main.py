@@ -17,6 +17,11 @@ TK_THEME = "yaru"
 def run_gui() -> None:
     parser = argparse.ArgumentParser(prog="obs-midi")
     parser.add_argument("--reload", action="store_true")
+    parser.add_argument(
+        "--engine-process",
+        action="store_true",
+        help="Run MIDI and OBS in a separate process, isolated from the GUI",
+    )
     args = parser.parse_args()
 
     if args.reload:
@@ -33,14 +38,15 @@ def run_gui() -> None:
             watchfiles.run_process(
                 ROOT_DIR,
                 target=_run_gui,
+                kwargs={"engine_process": args.engine_process},
                 callback=lambda changes: print("Changes detected, reloading..."),
             )
         )
 
-    _run_gui()
+    _run_gui(engine_process=args.engine_process)
 
 
-def _run_gui() -> None:
+def _run_gui(*, engine_process: bool = False) -> None:
     logging.config.dictConfig(LOGGING_CONFIG)
 
     root = ThemedTk(
@@ -49,7 +55,7 @@ def _run_gui() -> None:
         themebg=True,
     )
 
-    GUI(root)
+    GUI(root, engine_process=engine_process)
 
     try:
         root.mainloop()
@@ -29,6 +29,12 @@ class Menu:
             state=tk.DISABLED,
             underline=5,
         )
+        tools_menu.add_command(
+            label="Reload triggers",
+            command=lambda: gui.reload_triggers(),
+            state=tk.DISABLED,
+            underline=0,
+        )
         self._tools_menu = tools_menu
 
         help_menu = tk.Menu(menu, tearoff=0)
@@ -53,3 +59,6 @@ class Menu:
 
     def set_open_midi_debug_modal_state(self, state: str) -> None:
         self._tools_menu.entryconfig("Open MIDI debug window", state=state)
+
+    def set_reload_triggers_state(self, state: str) -> None:
+        self._tools_menu.entryconfig("Reload triggers", state=state)
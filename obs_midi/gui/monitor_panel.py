@@ -0,0 +1,121 @@
+import collections
+import time
+import tkinter as tk
+from tkinter import ttk
+from typing import Callable
+
+from ..core.monitor import Monitor, SharedMonitor
+from .utils import VirtualList
+
+
+class MonitorPanel(ttk.Frame):
+    """
+    Live view of incoming MIDI messages and what they matched.
+
+    The monitor is polled on a timer, at a capped rate, and new entries are
+    appended in a single batch. A MIDI flood costs at most MAX_BATCH rows
+    per frame, whatever its rate.
+    """
+
+    FRAME_INTERVAL = 100  # ms
+    MAX_ROWS = 1000
+    MAX_BATCH = 200
+
+    def __init__(
+        self,
+        parent: tk.Widget,
+        *,
+        get_monitor: Callable[[], Monitor | SharedMonitor | None],
+    ) -> None:
+        super().__init__(parent)
+        self._get_monitor = get_monitor
+        self._monitor: Monitor | SharedMonitor | None = None
+        self._read = 0
+        self._rows: collections.deque[tuple[str, str, str]] = collections.deque(
+            maxlen=self.MAX_ROWS
+        )
+        # Write count and time of the previous rate measurement
+        self._rate_mark = (0, time.monotonic())
+        self._rate = 0.0
+        self._skipped = 0
+
+        title = ttk.Label(self, text="MIDI Monitor")
+        self._counts = tk.StringVar()
+        counts_label = ttk.Label(self, textvariable=self._counts)
+        self._list = VirtualList(
+            self,
+            columns={"Time": 90, "Message": 260, "Matched": 200},
+        )
+        clear_button = ttk.Button(self, text="Clear", command=self._clear)
+
+        title.grid(row=0, column=0, sticky="w")
+        self._list.grid(row=1, column=0, columnspan=2, sticky="nswe", pady=5)
+        counts_label.grid(row=2, column=0, sticky="w")
+        clear_button.grid(row=2, column=1, sticky="e")
+        self.grid_rowconfigure(1, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        self._update_counts()
+        self.after(self.FRAME_INTERVAL, self._poll)
+
+    def _poll(self) -> None:
+        monitor = self._get_monitor()
+
+        if monitor is not self._monitor:
+            # Started again
+            self._monitor = monitor
+            self._read = 0
+            self._rate_mark = (0, time.monotonic())
+
+        if monitor is not None:
+            self._drain(monitor)
+
+        self.after(self.FRAME_INTERVAL, self._poll)
+
+    def _drain(self, monitor: Monitor | SharedMonitor) -> None:
+        written, entries, skipped = monitor.read(self._read)
+        self._read = written
+
+        if len(entries) > self.MAX_BATCH:
+            skipped += len(entries) - self.MAX_BATCH
+            entries = entries[-self.MAX_BATCH :]
+
+        self._skipped += skipped
+
+        for received_at, msg, matched in entries:
+            self._rows.append(
+                (
+                    time.strftime("%H:%M:%S", time.localtime(received_at))
+                    + f".{int(received_at * 1000) % 1000:03}",
+                    str(msg),
+                    ", ".join(matched) if matched else "-",
+                )
+            )
+
+        if entries:
+            self._list.set_rows(list(self._rows), follow=True)
+
+        marked, marked_at = self._rate_mark
+        now = time.monotonic()
+
+        if now - marked_at >= 1:
+            self._rate = (written - marked) / (now - marked_at)
+            self._rate_mark = (written, now)
+
+        self._update_counts()
+
+    def _update_counts(self) -> None:
+        monitor = self._monitor
+        matches = 0 if monitor is None else monitor.matches
+        misses = 0 if monitor is None else monitor.misses
+        text = f"{self._rate:.0f} msgs/s, {matches} matches, {misses} misses"
+
+        if self._skipped:
+            text += f" ({self._skipped} not shown)"
+
+        self._counts.set(text)
+
+    def _clear(self) -> None:
+        self._rows.clear()
+        self._skipped = 0
+        self._list.set_rows([])
@@ -1,41 +1,152 @@
 import tkinter as tk
 from tkinter import ttk
-from typing import Any
+from typing import Any, Callable, Sequence
 
 
-def scrollable_frame(
-    parent: tk.BaseWidget, **kwargs: Any
-) -> tuple[ttk.Frame, ttk.Frame]:
+class VirtualList(ttk.Frame):
     """
-    A scrollable tkinter frame implementation
+    A list of rows, of which only the visible ones exist as Tk items.
 
-    Credits
-    - https://gist.github.com/JackTheEngineer/81df334f3dcff09fd19e4169dd560c59
-    - https://sqlpey.com/python/tkinter-scrollable-frames
+    Rows are kept in Python, and a fixed set of Treeview items (one per
+    visible line) is refilled as the list is scrolled. Setting thousands of
+    rows is then as fast as setting a few.
     """
 
-    outer = ttk.Frame(parent, **kwargs)
+    SCROLL_UNITS = 3
 
-    # Canvas for scrolling
-    canvas = tk.Canvas(outer, borderwidth=0)
-    inner = ttk.Frame(canvas)
+    def __init__(
+        self,
+        parent: tk.BaseWidget,
+        *,
+        columns: dict[str, int],
+        on_activate: Callable[[int], None] = lambda index: None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(parent, **kwargs)
+        self._on_activate = on_activate
+        self._rows: Sequence[Sequence[str]] = []
+        self._top = 0
+        self._page = 1
+        self._selected: int | None = None
 
-    v_scrollbar = ttk.Scrollbar(outer, command=canvas.yview)
-    canvas.configure(yscrollcommand=v_scrollbar.set)
+        self._tree = ttk.Treeview(
+            self, columns=list(columns), show="headings", selectmode="browse"
+        )
 
-    v_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-    canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        for column, width in columns.items():
+            self._tree.heading(column, text=column, anchor="w")
+            self._tree.column(column, width=width, stretch=column == list(columns)[-1])
 
-    canvas.create_window((4, 4), window=inner, anchor="nw", tags="inner_frame")
+        self._scrollbar = ttk.Scrollbar(self, command=self._on_scrollbar)
+        self._scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self._tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
-    inner.bind(
-        "<Configure>", lambda *args: canvas.configure(scrollregion=canvas.bbox("all"))
-    )
-    canvas.bind_all(
-        "<MouseWheel>",
-        lambda event: canvas.yview_scroll(int(-1 * (event.delta / 120)), "units"),
-    )
-    canvas.bind_all("<Button-4>", lambda event: canvas.yview_scroll(-1, "units"))
-    canvas.bind_all("<Button-5>", lambda event: canvas.yview_scroll(1, "units"))
+        self._row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
 
-    return outer, inner
+        self._tree.bind("<Configure>", self._on_configure)
+        self._tree.bind("<<TreeviewSelect>>", self._on_select)
+        self._tree.bind("<Double-1>", lambda event: self._activate())
+        self._tree.bind("<Return>", lambda event: self._activate())
+        self._tree.bind("<MouseWheel>", self._on_mousewheel)
+        self._tree.bind("<Button-4>", lambda event: self._scroll(-self.SCROLL_UNITS))
+        self._tree.bind("<Button-5>", lambda event: self._scroll(self.SCROLL_UNITS))
+        self._tree.bind("<Up>", lambda event: self._move_selection(-1))
+        self._tree.bind("<Down>", lambda event: self._move_selection(1))
+        self._tree.bind("<Prior>", lambda event: self._move_selection(-self._page))
+        self._tree.bind("<Next>", lambda event: self._move_selection(self._page))
+
+    def set_rows(self, rows: Sequence[Sequence[str]], *, follow: bool = False) -> None:
+        """
+        Show these rows. With `follow`, scroll to the end if it was visible.
+        """
+        at_end = self._top + self._page >= len(self._rows)
+        self._rows = rows
+        self._selected = None
+
+        if follow and at_end:
+            self._top = len(rows) - self._page
+
+        self._refresh()
+
+    def get_selected(self) -> int | None:
+        return self._selected
+
+    def _refresh(self) -> None:
+        tree = self._tree
+        count = len(self._rows)
+        self._top = max(0, min(self._top, count - self._page))
+        items = tree.get_children()
+
+        # One item per visible line, created once
+        for i in range(len(items), self._page):
+            tree.insert("", "end", iid=str(i))
+
+        for i in range(self._page, len(items)):
+            tree.delete(str(i))
+
+        for i in range(self._page):
+            index = self._top + i
+            tree.item(str(i), values=tuple(self._rows[index]) if index < count else ())
+
+        if self._selected is not None and 0 <= self._selected - self._top < self._page:
+            tree.selection_set(str(self._selected - self._top))
+        else:
+            tree.selection_set(())
+
+        if count:
+            self._scrollbar.set(self._top / count, (self._top + self._page) / count)
+        else:
+            self._scrollbar.set(0, 1)
+
+    def _scroll(self, lines: int) -> str:
+        self._top += lines
+        self._refresh()
+        # Rows are virtual, the Treeview itself never scrolls
+        return "break"
+
+    def _on_scrollbar(self, command: str, value: str, unit: str = "") -> None:
+        if command == "moveto":
+            self._top = int(float(value) * len(self._rows))
+            self._refresh()
+        elif command == "scroll":
+            self._scroll(int(value) * (self._page if unit == "pages" else 1))
+
+    def _on_mousewheel(self, event: tk.Event) -> str:
+        return self._scroll(
+            -self.SCROLL_UNITS if event.delta > 0 else self.SCROLL_UNITS
+        )
+
+    def _on_configure(self, event: tk.Event) -> None:
+        # The heading takes about one line
+        page = max(1, event.height // self._row_height - 1)
+
+        if page != self._page:
+            self._page = page
+            self._refresh()
+
+    def _on_select(self, event: tk.Event) -> None:
+        if selection := self._tree.selection():
+            index = self._top + int(selection[0])
+
+            if index < len(self._rows):
+                self._selected = index
+
+    def _move_selection(self, lines: int) -> str:
+        if not self._rows:
+            return "break"
+
+        selected = 0 if self._selected is None else self._selected + lines
+        self._selected = max(0, min(selected, len(self._rows) - 1))
+
+        # Keep the selection visible
+        if self._selected < self._top:
+            self._top = self._selected
+        elif self._selected >= self._top + self._page:
+            self._top = self._selected - self._page + 1
+
+        self._refresh()
+        return "break"
+
+    def _activate(self) -> None:
+        if self._selected is not None:
+            self._on_activate(self._selected)
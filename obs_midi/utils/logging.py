@@ -25,9 +25,18 @@ class DefaultFormatter(logging.Formatter):
     LOGGER_COLOR = {
         "obs_midi.cli": yellow,
         "obs_midi.gui": yellow,
+        "obs_midi.core.control_socket": purple_bold,
+        "obs_midi.core.engine": purple_bold,
+        "obs_midi.core.engine_process": purple_bold,
         "obs_midi.core.obs_actions": purple_bold,
+        "obs_midi.core.obs_buffer": purple_bold,
         "obs_midi.core.obs_events": purple_bold,
         "obs_midi.core.obs_init": purple_bold,
+        "obs_midi.core.obs_state": purple_bold,
+        "obs_midi.core.obs_stats": purple_bold,
+        "obs_midi.core.obs_updates": purple_bold,
+        "obs_midi.core.scene_collections": purple_bold,
+        "obs_midi.core.scheduler": purple_bold,
         "obs_midi.core.midi_in": green_bold,
         "obs_midi.core.main": black_bold,
     }
@@ -0,0 +1,81 @@
+import queue
+import threading
+from pathlib import Path
+
+import mido
+import pytest
+
+from obs_midi.core.control_socket import ControlError, ControlServerThread, send_command
+from obs_midi.core.obs_actions import MIDITrigger, ProgramChangeTrigger
+
+
+class FakeControl:
+    def __init__(self, close_event: threading.Event) -> None:
+        self.injected: list[mido.Message] = []
+        self.reloads = 0
+        self._close_event = close_event
+
+    def get_status(self) -> dict:
+        return {"ready": True, "paused": False}
+
+    def get_triggers(self) -> list[MIDITrigger]:
+        return [
+            ProgramChangeTrigger(
+                text="PC1@1", message=mido.Message("program_change", program=1)
+            )
+        ]
+
+    def reload(self) -> None:
+        self.reloads += 1
+
+    def inject(self, msg: mido.Message) -> None:
+        self.injected.append(msg)
+
+    def shutdown(self) -> None:
+        self._close_event.set()
+
+
+def test_control_socket(tmp_path: Path) -> None:
+    path = str(tmp_path / "obs-midi.sock")
+    close_event = threading.Event()
+    error_bucket: queue.Queue[Exception] = queue.Queue()
+    control = FakeControl(close_event)
+    thread = ControlServerThread(
+        path=path,
+        control=control,  # type: ignore[arg-type]
+        close_event=close_event,
+        error_bucket=error_bucket,
+        daemon=True,
+    )
+    thread.start()
+
+    try:
+        for _ in range(50):
+            if Path(path).exists():
+                break
+            close_event.wait(0.01)
+
+        assert send_command(path, "status") == {"ready": True, "paused": False}
+        assert send_command(path, "triggers") == ["PC1@1"]
+        assert send_command(path, "rescan") is None
+        assert control.reloads == 1
+
+        send_command(path, "inject", message="program_change channel=0 program=1")
+        assert control.injected == [mido.Message("program_change", program=1)]
+
+        with pytest.raises(ControlError, match="Invalid arguments"):
+            send_command(path, "inject", message="nonsense")
+
+        with pytest.raises(ControlError, match="Unknown command"):
+            send_command(path, "nonsense")
+
+        send_command(path, "shutdown")
+        thread.join(5)
+        assert not thread.is_alive()
+    finally:
+        close_event.set()
+        thread.join(5)
+
+    assert error_bucket.empty()
+    # The socket is removed on stop
+    assert not Path(path).exists()
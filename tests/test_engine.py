@@ -0,0 +1,63 @@
+import threading
+from typing import Any, Callable
+
+import pytest
+
+from obs_midi.core import engine as engine_module
+from obs_midi.core.engine import Engine, EngineConfig
+from obs_midi.core.main import INFO_CONTROL
+
+
+class FakeControl:
+    def __init__(self) -> None:
+        self.paused = False
+
+    def pause(self) -> None:
+        self.paused = True
+
+    def resume(self) -> None:
+        self.paused = False
+
+    def is_paused(self) -> bool:
+        return self.paused
+
+
+def test_engine_pauses_once_ready(monkeypatch: pytest.MonkeyPatch) -> None:
+    control = FakeControl()
+    discovered = threading.Event()
+    ready_event = threading.Event()
+
+    def run(
+        *,
+        on_ready: Callable[[dict], None],
+        close_event: threading.Event,
+        **kwargs: Any,
+    ) -> None:
+        # Discovering scenes
+        assert discovered.wait(5)
+        on_ready({INFO_CONTROL: control})
+        close_event.wait(5)
+
+    monkeypatch.setattr(engine_module, "run", run)
+    engine = Engine()
+    engine.start(
+        EngineConfig(midi_port=None, obs_port=4455, obs_password="test"),
+        on_ready=lambda info: ready_event.set(),
+    )
+
+    try:
+        # Stopped while starting
+        engine.pause()
+        assert not engine.is_ready()
+
+        discovered.set()
+        assert ready_event.wait(5)
+        assert engine.is_paused()
+        assert control.paused
+
+        engine.resume()
+        assert not engine.is_paused()
+    finally:
+        closed_event = threading.Event()
+        engine.close(on_closed=closed_event.set)
+        assert closed_event.wait(5)
@@ -0,0 +1,34 @@
+import threading
+
+from obs_midi.core.engine import EngineConfig
+from obs_midi.core.engine_process import EngineProcessError, ProcessEngine
+
+
+def test_process_engine_reports_errors_and_closes() -> None:
+    engine = ProcessEngine()
+    errors: list[Exception] = []
+    error_event = threading.Event()
+    closed_event = threading.Event()
+
+    def on_error(exc: Exception) -> None:
+        errors.append(exc)
+        error_event.set()
+
+    # No OBS running on this port, the engine process fails to start
+    engine.start(
+        EngineConfig(midi_port=None, obs_port=3499, obs_password="test"),
+        on_error=on_error,
+    )
+    assert engine.is_running()
+    assert error_event.wait(30)
+    assert isinstance(errors[0], EngineProcessError)
+
+    engine.close(on_closed=closed_event.set)
+    assert closed_event.wait(10)
+    assert not engine.is_running()
+    assert not engine.is_ready()
+
+    # Closing a stopped engine completes at once
+    closed_again: list[bool] = []
+    engine.close(on_closed=lambda: closed_again.append(True))
+    assert closed_again == [True]
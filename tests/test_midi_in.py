@@ -0,0 +1,212 @@
+import queue
+import threading
+import time
+
+import mido
+import pytest
+
+from obs_midi.core import midi_in
+from obs_midi.core.midi_in import (
+    MIDIClock,
+    MIDITimecode,
+    ParameterDecoder,
+    timecode_to_frames,
+)
+
+
+class FakeTime:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def perf_counter(self) -> float:
+        return self.now
+
+
+def test_midi_clock(monkeypatch: pytest.MonkeyPatch) -> None:
+    fake_time = FakeTime()
+    monkeypatch.setattr(midi_in, "time", fake_time)
+    clock = MIDIClock()
+    tick = 60 / (120 * MIDIClock.TICKS_PER_BEAT)  # 120 BPM
+
+    assert clock.time_to_boundary(MIDIClock.TICKS_PER_BEAT) is None
+
+    assert not clock.process(mido.Message("start"))
+    for _ in range(MIDIClock.TICKS_PER_BEAT + 1):
+        assert clock.process(mido.Message("clock"))
+        fake_time.now += tick
+
+    assert clock.ticks == MIDIClock.TICKS_PER_BEAT
+    assert clock.bpm == pytest.approx(120)
+
+    # Half a tick after the second beat
+    fake_time.now -= tick / 2
+    to_beat = clock.time_to_boundary(MIDIClock.TICKS_PER_BEAT)
+    assert to_beat == pytest.approx(0.5 - tick / 2)
+    to_bar = clock.time_to_boundary(4 * MIDIClock.TICKS_PER_BEAT)
+    assert to_bar == pytest.approx(1.5 - tick / 2)
+    to_beat = clock.time_to_boundary(MIDIClock.TICKS_PER_BEAT, after=0.6)
+    assert to_beat == pytest.approx(1 - tick / 2)
+
+    # Song position in 16th notes, the next tick is the third bar
+    clock.process(mido.Message("songpos", pos=32))
+    assert clock.process(mido.Message("clock"))
+    assert clock.ticks == 8 * MIDIClock.TICKS_PER_BEAT
+
+    clock.process(mido.Message("stop"))
+    assert clock.time_to_boundary(MIDIClock.TICKS_PER_BEAT) is None
+
+
+def quarter_frames(timecode: tuple[int, int, int, int], rate: int = 1) -> list:
+    hours, minutes, seconds, frames = timecode
+    values = [
+        frames & 0xF,
+        frames >> 4,
+        seconds & 0xF,
+        seconds >> 4,
+        minutes & 0xF,
+        minutes >> 4,
+        hours & 0xF,
+        hours >> 4 | rate << 1,
+    ]
+    return [
+        mido.Message("quarter_frame", frame_type=piece, frame_value=value)
+        for piece, value in enumerate(values)
+    ]
+
+
+def test_midi_timecode() -> None:
+    timecode = MIDITimecode()
+
+    for msg in quarter_frames((1, 2, 3, 4)):
+        assert timecode.process(msg)
+
+    assert timecode.fps == 25
+    position = timecode_to_frames((1, 2, 3, 4), 25) * 4 + 7
+    assert timecode.position == position
+    assert timecode.running
+    generation = timecode.generation
+
+    # Next sequence, 2 frames later
+    for msg in quarter_frames((1, 2, 3, 6)):
+        timecode.process(msg)
+
+    assert timecode.position == position + 8
+    assert timecode.generation == generation
+
+    # Locate
+    assert timecode.process(
+        mido.Message("sysex", data=[0x7F, 0x7F, 1, 1, 1 << 5 | 1, 0, 0, 0])
+    )
+    assert timecode.position == timecode_to_frames((1, 0, 0, 0), 25) * 4
+    assert timecode.generation == generation + 1
+
+    assert not timecode.process(mido.Message("sysex", data=[0x43, 0x10]))
+
+
+def test_parameter_decoder() -> None:
+    decoder = ParameterDecoder()
+
+    def send(control: int, value: int, channel: int = 0) -> tuple | None:
+        msg = mido.Message(
+            "control_change", channel=channel, control=control, value=value
+        )
+        event = decoder.process(msg)
+        return None if event is None else tuple(event.dict().values())
+
+    # 14-bit CC, the MSB alone until an LSB is received
+    assert send(7, 64) == ("hr_control_change", 0, 7, 64 << 7)
+    assert send(39, 1) == ("hr_control_change", 0, 7, 64 << 7 | 1)
+    assert send(7, 65) is None
+    assert send(39, 0) == ("hr_control_change", 0, 7, 65 << 7)
+
+    # NRPN, emitted on data entry MSB then LSB
+    assert send(99, 2) is None
+    assert send(98, 44) is None
+    assert send(6, 1) == ("nrpn", 0, 2 << 7 | 44, 1 << 7)
+    assert send(38, 3) == ("nrpn", 0, 2 << 7 | 44, 1 << 7 | 3)
+    # LSB leaving the value unchanged
+    assert send(6, 5) == ("nrpn", 0, 2 << 7 | 44, 5 << 7)
+    assert send(38, 0) is None
+
+    # RPN, per channel
+    assert send(101, 0, channel=1) is None
+    assert send(100, 2, channel=1) is None
+    assert send(6, 64, channel=1) == ("rpn", 1, 2, 64 << 7)
+    assert send(6, 7) == ("nrpn", 0, 2 << 7 | 44, 7 << 7)
+
+    # Null RPN deselects, CC 6 is a plain controller again
+    assert send(101, 127, channel=1) is None
+    assert send(100, 127, channel=1) is None
+    assert send(6, 1, channel=1) == ("hr_control_change", 1, 6, 1 << 7)
+    assert send(38, 2, channel=1) == ("hr_control_change", 1, 6, 1 << 7 | 2)
+
+    # Null NRPN too
+    assert send(99, 127) is None
+    assert send(98, 127) is None
+    assert send(6, 3) == ("hr_control_change", 0, 6, 3 << 7)
+
+
+def test_message_handler_policies() -> None:
+    thread = midi_in.MIDInputThread(
+        input_opener=midi_in.mido_input_opener(port=None),
+        start_barrier=threading.Barrier(1),
+        close_event=threading.Event(),
+        error_bucket=queue.Queue(),
+        decoder=ParameterDecoder(),
+    )
+    release = threading.Event()
+    inline: list[int] = []
+    slow: list[int] = []
+    pooled: list[int] = []
+
+    def slow_handler(msg: mido.Message) -> None:
+        release.wait(5)
+        slow.append(msg.value)
+
+    inline_stats = thread.add_message_handler(
+        lambda msg: inline.append(msg.value), name="inline"
+    )
+    slow_stats = thread.add_message_handler(
+        slow_handler, policy=midi_in.HANDLER_THREAD, max_pending=4, name="slow"
+    )
+    pool_stats = thread.add_message_handler(
+        lambda msg: pooled.append(msg.value), policy=midi_in.HANDLER_POOL
+    )
+
+    try:
+        # 14-bit CC: 16 messages, and 9 decoded events reused by the decoder
+        # (the first MSB alone, then each LSB)
+        for value in range(8):
+            thread.inject(mido.Message("control_change", control=1, value=value))
+            thread.inject(mido.Message("control_change", control=33, value=value))
+
+        # The slow handler delays neither the MIDI callback nor other handlers
+        assert len(inline) == 25
+        assert inline_stats.calls == 25
+
+        for _ in range(100):
+            if pool_stats.calls == 25:
+                break
+            time.sleep(0.01)
+
+        assert pooled == inline
+
+        release.set()
+
+        for _ in range(100):
+            if slow_stats.calls + slow_stats.dropped == 25:
+                break
+            time.sleep(0.01)
+
+        # The first message was being handled, the oldest pending ones dropped
+        assert slow_stats.dropped == 20
+        assert slow == [inline[0], *inline[-4:]]
+        assert slow_stats.max_time > 0
+    finally:
+        release.set()
+        thread.stop_handlers()
+
+    assert {stats.name for stats in thread.get_handler_stats()} >= {"log", "slow"}
@@ -0,0 +1,129 @@
+import queue
+import threading
+
+import mido
+
+from obs_midi.core.midi_in import (
+    MIDInputThread,
+    ParameterDecoder,
+    ParameterEvent,
+    mido_input_opener,
+)
+from obs_midi.core.monitor import Monitor, SharedMonitor
+from obs_midi.core.obs_actions import ObsActions
+
+from .test_obs_actions import RecordingClient, cc
+
+
+def test_monitor_ring() -> None:
+    monitor = Monitor(size=4)
+    event = ParameterEvent(ParameterEvent.TYPE_NRPN, 0)
+    event.value = 1
+    monitor.record(event, ["Blur"])
+    # Events are reused by the decoder, the monitor keeps a copy
+    event.value = 2
+
+    written, entries, skipped = monitor.read(0)
+    assert (written, skipped) == (1, 0)
+    assert entries[0][1].value == 1
+    assert entries[0][2] == ["Blur"]
+
+    for program in range(6):
+        monitor.record(mido.Message("program_change", program=program), [])
+
+    # The oldest entries were overwritten before being read. The slot written
+    # next may be in use, so at most size - 1 entries are read at once.
+    written, entries, skipped = monitor.read(written)
+    assert (written, skipped) == (7, 3)
+    assert [entry[1].program for entry in entries] == [3, 4, 5]
+    assert (monitor.matches, monitor.misses) == (1, 6)
+
+    assert monitor.read(written) == (7, [], 0)
+
+
+def test_monitor_concurrent_reads() -> None:
+    monitor = Monitor(size=64)
+    done = threading.Event()
+    count = 20_000
+
+    def flood() -> None:
+        for i in range(count):
+            monitor.record(mido.Message("note_on", note=i % 128, velocity=i % 100), [])
+
+        done.set()
+
+    threading.Thread(target=flood).start()
+    seen: list[tuple] = []
+    total_skipped = 0
+    read = 0
+
+    while not done.is_set() or read < monitor.written:
+        read, entries, skipped = monitor.read(read)
+        total_skipped += skipped
+        seen.extend(entry[1].bytes() for entry in entries)
+
+    # Every entry is either seen once, in order, or reported as skipped
+    assert len(seen) + total_skipped == count
+    expected = [
+        mido.Message("note_on", note=i % 128, velocity=i % 100).bytes()
+        for i in range(count)
+    ]
+    position = 0
+
+    for entry in seen:
+        position = expected.index(entry, position) + 1
+
+
+def test_shared_monitor() -> None:
+    monitor = SharedMonitor.allocate(size=4)
+    # As attached in the engine process
+    writer = SharedMonitor(monitor.buffer)
+    writer.record(mido.Message("program_change", program=1), ["Live", "Blur"])
+
+    written, entries, skipped = monitor.read(0)
+    assert (written, skipped) == (1, 0)
+    assert entries[0][1:] == (
+        "program_change channel=0 program=1 time=0",
+        ["Live", "Blur"],
+    )
+
+    for program in range(6):
+        writer.record(mido.Message("program_change", program=program), [])
+
+    written, entries, skipped = monitor.read(written)
+    assert (written, skipped) == (7, 2)
+    assert [entry[1][-len("program=5 time=0") :] for entry in entries][-1] == (
+        "program=5 time=0"
+    )
+    assert len(entries) == 4
+    assert (monitor.matches, monitor.misses) == (1, 6)
+
+
+def test_monitor_records_plain_control_changes_once() -> None:
+    obs_actions = ObsActions()
+    monitor = Monitor()
+    client = RecordingClient()
+    thread = MIDInputThread(
+        input_opener=mido_input_opener(port=None),
+        start_barrier=threading.Barrier(1),
+        close_event=threading.Event(),
+        error_bucket=queue.Queue(),
+        decoder=ParameterDecoder(is_high_res=obs_actions.has_high_res_trigger),
+    )
+    # As in main.run()
+    thread.add_message_handler(
+        lambda msg: monitor.record(msg, obs_actions.process(msg, client))  # type: ignore[arg-type]
+    )
+
+    try:
+        for value in range(10):
+            thread.inject(cc(7, value))
+
+        # No 14-bit trigger on CC 7, it is a plain controller
+        assert (monitor.written, monitor.matches, monitor.misses) == (10, 0, 10)
+
+        obs_actions.on_scene_found(f"Fade :: HRCC7#{9 << 7}@1")
+        thread.inject(cc(7, 9))
+        assert (monitor.written, monitor.matches, monitor.misses) == (12, 1, 11)
+    finally:
+        thread.stop_handlers()
@@ -0,0 +1,913 @@
+import json
+import queue
+import threading
+import time
+from typing import Any
+
+import mido
+import pytest
+
+from obs_midi.core import midi_in
+from obs_midi.core.midi_in import MIDIClock, ParameterDecoder
+from obs_midi.core.obs_actions import (
+    ControlChangeMapping,
+    ControlChangeThresholdTrigger,
+    HighResControlChangeTrigger,
+    ObsActions,
+    ParameterNumberTrigger,
+    SysexTrigger,
+)
+from obs_midi.core.obs_buffer import OutboundBuffer
+from obs_midi.core.obs_client import ObsClient, ObsRequest
+
+from .test_midi_in import FakeTime, quarter_frames
+
+
+class RecordingClient:
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, tuple]] = []
+        self.kwargs: list[dict] = []
+        self.requests: list[ObsRequest] = []
+        self.batches: list[list[ObsRequest]] = []
+
+    latency = 0.0
+    connected = True
+
+    def is_connected(self) -> bool:
+        return self.connected
+
+    def send_requests(self, requests: list[ObsRequest]) -> None:
+        self.requests.extend(requests)
+        self.batches.append(requests)
+
+    def __getattr__(self, name: str) -> Any:
+        def record(*args: Any, **kwargs: Any) -> None:
+            self.calls.append((name, args))
+            self.kwargs.append(kwargs)
+
+        return record
+
+
+def scene(name: str) -> ObsRequest:
+    return ("SetCurrentProgramScene", {"sceneName": name})
+
+
+def filter_enabled(source: str, filter_name: str, enabled: bool) -> ObsRequest:
+    return (
+        "SetSourceFilterEnabled",
+        {"sourceName": source, "filterName": filter_name, "filterEnabled": enabled},
+    )
+
+
+def cc(control: int, value: int, channel: int = 1) -> mido.Message:
+    return mido.Message(
+        "control_change", channel=channel - 1, control=control, value=value
+    )
+
+
+def test_threshold_trigger_parse() -> None:
+    trigger = ControlChangeThresholdTrigger.parse("Pedal :: CC4>100@2")
+    assert trigger is not None
+    assert trigger.text == "Pedal"
+    assert trigger.rising
+    assert trigger.threshold == 100
+    assert trigger.hysteresis == ControlChangeThresholdTrigger.DEFAULT_HYSTERESIS
+    assert str(trigger) == "CC4>100~8@2"
+
+    trigger = ControlChangeThresholdTrigger.parse("Pedal :: CC4<20~4@2")
+    assert trigger is not None
+    assert not trigger.rising
+    assert trigger.hysteresis == 4
+
+    assert ControlChangeThresholdTrigger.parse("Pedal :: CC4#20@2") is None
+
+
+def test_threshold_trigger_fires_once_per_sweep() -> None:
+    obs_actions = ObsActions()
+    obs_actions.on_scene_found("Down :: CC4>100~10@1")
+    obs_actions.on_scene_found("Up :: CC4<20~10@1")
+    client = RecordingClient()
+
+    # Sweep up, with jitter around the threshold
+    for value in [*range(30, 128), 99, 101, 95, 127]:
+        obs_actions.process(cc(4, value), client=client)  # type: ignore[arg-type]
+
+    assert client.requests == [scene("Down :: CC4>100~10@1")]
+
+    # Sweep down, leaving the hysteresis band re-arms "Down"
+    client.requests.clear()
+    for value in range(127, -1, -1):
+        obs_actions.process(cc(4, value), client=client)  # type: ignore[arg-type]
+
+    assert client.requests == [scene("Up :: CC4<20~10@1")]
+
+    client.requests.clear()
+    obs_actions.process(cc(4, 127), client=client)  # type: ignore[arg-type]
+    obs_actions.process(cc(4, 127, channel=2), client=client)  # type: ignore[arg-type]
+    assert client.requests == [scene("Down :: CC4>100~10@1")]
+
+    # Thresholds closer to the ends of the range than the hysteresis re-arm
+    # at the ends
+    obs_actions = ObsActions(multi_match=True)
+    obs_actions.on_scene_found("Low :: CC4>4@1")
+    obs_actions.on_scene_found("High :: CC4<124@1")
+    matched: list[str] = []
+
+    for _ in range(3):
+        for value in [*range(128), *range(127, -1, -1)]:
+            matched += obs_actions.process(cc(4, value), client=client)  # type: ignore[arg-type]
+
+    # "High" starts in its band
+    assert matched == ["High", *["Low", "High"] * 3]
+
+
+def test_threshold_state_is_kept_across_publishes() -> None:
+    obs_actions = ObsActions()
+    obs_actions.on_source_filter_found(
+        source_name="Camera", filter_name="Blur :: CC1>64@1 toggle"
+    )
+    client = RecordingClient()
+
+    obs_actions.process(cc(1, 100), client=client)  # type: ignore[arg-type]
+    assert client.requests == [
+        filter_enabled("Camera", "Blur :: CC1>64@1 toggle", True)
+    ]
+
+    # Found while the pedal is held inside the band
+    obs_actions.on_scene_found("Other :: PC5@1")
+    obs_actions.begin_reload()
+    obs_actions.on_source_filter_found(
+        source_name="Camera", filter_name="Blur :: CC1>64@1 toggle"
+    )
+    obs_actions.end_reload()
+
+    client.requests.clear()
+    obs_actions.process(cc(1, 102), client=client)  # type: ignore[arg-type]
+    assert client.requests == []
+
+    # Leaving the band re-arms it
+    obs_actions.process(cc(1, 0), client=client)  # type: ignore[arg-type]
+    obs_actions.process(cc(1, 100), client=client)  # type: ignore[arg-type]
+    assert client.requests == [
+        filter_enabled("Camera", "Blur :: CC1>64@1 toggle", False)
+    ]
+
+
+def test_mapping_parse() -> None:
+    mapping = ControlChangeMapping.parse("Mic :: VOL CC7@1")
+    assert mapping is not None
+    assert mapping.param == ControlChangeMapping.PARAM_VOLUME
+    assert mapping.db
+    assert mapping.scale(0) == 0
+    assert mapping.scale(127) == 1
+    assert str(mapping) == "VOL CC7@1"
+
+    mapping = ControlChangeMapping.parse("Blur :: SET size CC8@2 0..20")
+    assert mapping is not None
+    assert mapping.setting_name == "size"
+    assert not mapping.db
+    assert mapping.scale(127) == 20
+    assert str(mapping) == "SET size CC8@2"
+
+    mapping = ControlChangeMapping.parse("Fade :: OPACITY CC9@2")
+    assert mapping is not None
+    assert mapping.setting_name == "opacity"
+
+    assert ControlChangeMapping.parse("Mic :: CC7#1@1") is None
+
+
+def test_mapping_updates_are_coalesced() -> None:
+    obs_actions = ObsActions()
+    obs_actions.on_source_found("Mic :: VOL CC7@1")
+    obs_actions.on_source_found("Mic :: VOL CC7@1")
+    obs_actions.on_source_filter_found(
+        source_name="Camera", filter_name="Fade :: OPACITY CC8@1"
+    )
+    client = RecordingClient()
+
+    for value in range(128):
+        obs_actions.process(cc(7, value), client=client)  # type: ignore[arg-type]
+        obs_actions.process(cc(8, 127 - value), client=client)  # type: ignore[arg-type]
+
+    assert client.calls == []
+
+    for update in obs_actions.pending_updates.drain():
+        update(client)  # type: ignore[arg-type]
+
+    assert client.calls == [
+        ("set_input_volume", ()),
+        ("set_filter_settings", ()),
+    ]
+    assert client.kwargs == [
+        {"name": "Mic :: VOL CC7@1", "multiplier": 1.0},
+        {
+            "source": "Camera",
+            "filtername": "Fade :: OPACITY CC8@1",
+            "settings": {"opacity": 0.0},
+        },
+    ]
+    assert obs_actions.pending_updates.drain() == []
+    assert obs_actions.pending_updates.coalesced == 2 * 127
+
+
+def test_state_mirror_elides_no_op_requests() -> None:
+    obs_actions = ObsActions()
+    obs_actions.on_scene_found("Home :: PC1@1")
+    obs_actions.on_source_filter_found(
+        source_name="Camera", filter_name="Flash :: PC2@1", filter_enabled=True
+    )
+    obs_actions.on_source_filter_found(
+        source_name="Camera", filter_name="Blur :: PC3@1 toggle", filter_enabled=False
+    )
+    obs_actions.state.set_current_program_scene("Home :: PC1@1")
+    client = RecordingClient()
+
+    def pc(program: int) -> None:
+        msg = mido.Message("program_change", channel=0, program=program)
+        obs_actions.process(msg, client=client)  # type: ignore[arg-type]
+
+    pc(1)
+    pc(2)
+    assert client.requests == []
+    assert obs_actions.state.elided == {
+        "SetCurrentProgramScene": 1,
+        "SetSourceFilterEnabled": 1,
+    }
+
+    pc(3)
+    pc(3)
+    assert client.requests == [
+        filter_enabled("Camera", "Blur :: PC3@1 toggle", True),
+        filter_enabled("Camera", "Blur :: PC3@1 toggle", False),
+    ]
+
+    client.requests.clear()
+    obs_actions.state.handle_event(
+        {
+            "op": 5,
+            "d": {
+                "eventType": "CurrentProgramSceneChanged",
+                "eventData": {"sceneName": "Other"},
+            },
+        }
+    )
+    pc(1)
+    assert client.requests == [scene("Home :: PC1@1")]
+
+
+def test_timed_actions_are_scheduled() -> None:
+    obs_actions = ObsActions()
+    obs_actions.on_scene_found("Clip :: PC1@1 delay=10ms for=20ms")
+    obs_actions.on_source_filter_found(
+        source_name="Camera", filter_name="Flash :: PC1@2 for=10ms"
+    )
+    obs_actions.state.set_current_program_scene("Home")
+    client = RecordingClient()
+
+    obs_actions.process(
+        mido.Message("program_change", channel=0, program=1),
+        client=client,  # type: ignore[arg-type]
+    )
+    obs_actions.process(
+        mido.Message("program_change", channel=1, program=1),
+        client=client,  # type: ignore[arg-type]
+    )
+    assert client.requests == [
+        filter_enabled("Camera", "Flash :: PC1@2 for=10ms", True)
+    ]
+
+    while obs_actions.scheduler.pending():
+        obs_actions.scheduler.run_pending(timeout=0.1)
+
+    assert client.requests == [
+        filter_enabled("Camera", "Flash :: PC1@2 for=10ms", True),
+        scene("Clip :: PC1@1 delay=10ms for=20ms"),
+        filter_enabled("Camera", "Flash :: PC1@2 for=10ms", False),
+        scene("Home"),
+    ]
+
+
+def test_timed_actions_only_revert_changes() -> None:
+    obs_actions = ObsActions(multi_match=True)
+    obs_actions.on_source_filter_found(
+        source_name="Camera",
+        filter_name="Flash :: PC1@1 on for=10ms",
+        filter_enabled=True,
+    )
+    obs_actions.on_scene_item_found(
+        scene_name="Main",
+        source_name="Logo :: PC1@1 on for=10ms",
+        scene_item_id=1,
+        scene_item_enabled=True,
+    )
+    obs_actions.on_scene_item_found(
+        scene_name="Other",
+        source_name="Logo :: PC1@1 on for=10ms",
+        scene_item_id=2,
+        scene_item_enabled=False,
+    )
+    client = RecordingClient()
+
+    obs_actions.process(
+        mido.Message("program_change", channel=0, program=1),
+        client=client,  # type: ignore[arg-type]
+    )
+
+    while obs_actions.scheduler.pending():
+        obs_actions.scheduler.run_pending(timeout=0.1)
+
+    # Already on, the filter and the first item stay on
+    assert [data for _, data in client.requests] == [
+        {"sceneName": "Other", "sceneItemId": 2, "sceneItemEnabled": True},
+        {"sceneName": "Other", "sceneItemId": 2, "sceneItemEnabled": False},
+    ]
+
+
+def test_quantized_actions_wait_for_the_next_boundary(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    fake_time = FakeTime()
+    monkeypatch.setattr(midi_in, "time", fake_time)
+    obs_actions = ObsActions()
+    obs_actions.on_scene_found("Drop :: PC1@1 q=beat")
+    obs_actions.on_scene_found("Break :: PC2@1 q=bar delay=100ms")
+    client = RecordingClient()
+    delays: list[float] = []
+    monkeypatch.setattr(
+        obs_actions.scheduler,
+        "schedule",
+        lambda delay, callback, key=None: delays.append(delay),
+    )
+    clock = obs_actions.clock
+    tick = 60 / (120 * MIDIClock.TICKS_PER_BEAT)  # 120 BPM
+
+    def pc(program: int) -> None:
+        msg = mido.Message("program_change", channel=0, program=program)
+        obs_actions.process(msg, client=client)  # type: ignore[arg-type]
+
+    # Without a running clock, at once
+    pc(1)
+    assert client.requests == [scene("Drop :: PC1@1 q=beat")]
+
+    clock.process(mido.Message("start"))
+    for _ in range(MIDIClock.TICKS_PER_BEAT + 1):
+        fake_time.now += tick
+        clock.process(mido.Message("clock"))
+
+    # Right on the second beat: the next one
+    obs_actions.state.set_current_program_scene("Home")
+    pc(1)
+    assert delays == [pytest.approx(0.5)]
+
+    # Half a tick later, the boundaries stay in place. The delay counts
+    # before quantizing, and OBS latency is sent ahead.
+    fake_time.now += tick / 2
+    monkeypatch.setattr(client, "latency", 0.05)
+    pc(1)
+    pc(2)
+    assert delays[1:] == [
+        pytest.approx(0.5 - tick / 2 - 0.05),
+        pytest.approx(1.5 - tick / 2 - 0.05),
+    ]
+    assert client.requests == [scene("Drop :: PC1@1 q=beat")]
+
+
+def test_mtc_cues() -> None:
+    obs_actions = ObsActions()
+    obs_actions.on_scene_found("Intro :: MTC 00:00:00:00")
+    obs_actions.on_scene_found("Chorus :: MTC 00:00:01:00")
+    client = RecordingClient()
+    timecode = obs_actions.timecode
+
+    def play(frames: int) -> None:
+        for _ in range(frames * 4):
+            msg = mido.Message("quarter_frame", frame_type=0, frame_value=0)
+            # Only the position matters here
+            timecode.position += 1
+            obs_actions.process(msg, client=client)  # type: ignore[arg-type]
+
+    def locate(seconds: int) -> None:
+        msg = mido.Message("sysex", data=[0x7F, 0x7F, 1, 1, 3 << 5, 0, 0, seconds])
+        timecode.process(msg)
+        obs_actions.process(msg, client=client)  # type: ignore[arg-type]
+
+    locate(0)
+    assert client.requests == [scene("Intro :: MTC 00:00:00:00")]
+
+    play(29)
+    assert len(client.requests) == 1
+    play(1)
+    assert client.requests[1:] == [scene("Chorus :: MTC 00:00:01:00")]
+
+    # Loop back
+    client.requests.clear()
+    locate(0)
+    play(30)
+    assert client.requests == [
+        scene("Intro :: MTC 00:00:00:00"),
+        scene("Chorus :: MTC 00:00:01:00"),
+    ]
+
+
+def test_mtc_cues_after_stop(monkeypatch: pytest.MonkeyPatch) -> None:
+    fake_time = FakeTime()
+    monkeypatch.setattr(midi_in, "time", fake_time)
+    obs_actions = ObsActions()
+    for seconds, name in enumerate(["One", "Two", "Three", "Four"], start=1):
+        obs_actions.on_scene_found(f"{name} :: MTC 00:00:0{seconds}:00")
+    client = RecordingClient()
+    thread = midi_in.MIDInputThread(
+        input_opener=midi_in.mido_input_opener(port=None),
+        start_barrier=threading.Barrier(1),
+        close_event=threading.Event(),
+        error_bucket=queue.Queue(),
+        timecode=obs_actions.timecode,
+    )
+    thread.add_message_handler(
+        lambda msg: obs_actions.process(msg, client=client)  # type: ignore[arg-type]
+    )
+
+    def play(start: int, frames: int) -> None:
+        # 30 fps, a quarter frame sequence every 2 frames
+        for frame in range(start, start + frames, 2):
+            for msg in quarter_frames((0, 0, frame // 30, frame % 30), rate=3):
+                fake_time.now += 1 / 120
+                thread.inject(msg)
+
+    play(0, 40)
+    assert client.requests == [scene("One :: MTC 00:00:01:00")]
+
+    # Stopped, then resumed further
+    fake_time.now += 1
+    play(70, 30)
+    assert client.requests[1:] == [scene("Three :: MTC 00:00:03:00")]
+
+    # Cues passed while paused are not fired on resume
+    thread.pause()
+    play(100, 30)
+    thread.resume()
+    play(130, 10)
+    assert len(client.requests) == 2
+
+
+def test_parameter_triggers() -> None:
+    obs_actions = ObsActions()
+    obs_actions.on_scene_found("Verse :: NRPN300#1@2")
+    obs_actions.on_scene_found("Chorus :: HRCC7#8192@2")
+    client = RecordingClient()
+    decoder = ParameterDecoder()
+
+    for trigger in obs_actions.get_triggers():
+        assert isinstance(
+            trigger, (HighResControlChangeTrigger, ParameterNumberTrigger)
+        )
+        for msg in trigger.get_messages():
+            obs_actions.process(msg, client=client)  # type: ignore[arg-type]
+            if (event := decoder.process(msg)) is not None:
+                obs_actions.process(event, client=client)  # type: ignore[arg-type]
+
+    assert client.requests == [
+        scene("Verse :: NRPN300#1@2"),
+        scene("Chorus :: HRCC7#8192@2"),
+    ]
+
+
+def test_sysex_triggers() -> None:
+    trigger = SysexTrigger.parse("Loop :: SXF043??7F")
+    assert trigger is not None
+    assert trigger.pattern == (0x43, None, 0x7F)
+    assert str(trigger) == "SX43??7F"
+    assert SysexTrigger.parse("Loop :: SX4") is None
+
+    obs_actions = ObsActions()
+    obs_actions.on_source_filter_found(source_name="Camera", filter_name="Rec :: SX43")
+    obs_actions.on_scene_found("Loop :: SX43??7F")
+    obs_actions.on_scene_found("Other :: SX4310")
+    client = RecordingClient()
+
+    def sysex(*data: int) -> None:
+        msg = mido.Message("sysex", data=data)
+        obs_actions.process(msg, client=client)  # type: ignore[arg-type]
+
+    sysex(0x43, 0x01, 0x7F, 0x00, 0x00)
+    sysex(0x43, 0x01, 0x00)
+    sysex(0x44)
+    sysex(0x43, 0x10, 0x7F)
+
+    assert client.requests == [
+        scene("Loop :: SX43??7F"),
+        filter_enabled("Camera", "Rec :: SX43", True),
+    ]
+    # Scenes take priority, and "Loop" was found first
+    assert obs_actions.state.elided == {"SetCurrentProgramScene": 1}
+
+
+def test_multi_match_sends_one_batch() -> None:
+    obs_actions = ObsActions(multi_match=True)
+    obs_actions.on_scene_found("Verse :: PC1@1")
+    obs_actions.on_scene_found("Verse 2 :: PC1@1")
+    for name in ("Warm :: PC1@1 group=look", "Cold :: PC2@1 group=look"):
+        obs_actions.on_source_filter_found(
+            source_name="Camera", filter_name=name, filter_enabled=False
+        )
+    obs_actions.on_source_filter_found(
+        source_name="Slides", filter_name="Blur :: PC1@1", filter_enabled=False
+    )
+    client = RecordingClient()
+
+    def pc(program: int) -> None:
+        msg = mido.Message("program_change", channel=0, program=program)
+        obs_actions.process(msg, client=client)  # type: ignore[arg-type]
+
+    pc(1)
+    assert client.batches == [
+        [
+            scene("Verse :: PC1@1"),
+            filter_enabled("Camera", "Warm :: PC1@1 group=look", True),
+            filter_enabled("Slides", "Blur :: PC1@1", True),
+        ]
+    ]
+
+    # Enabling a filter of the group disables its siblings in the same batch
+    client.batches.clear()
+    pc(2)
+    assert client.batches == [
+        [
+            filter_enabled("Camera", "Cold :: PC2@1 group=look", True),
+            filter_enabled("Camera", "Warm :: PC1@1 group=look", False),
+        ]
+    ]
+
+    # Without multi-match, only the first action is performed
+    obs_actions = ObsActions()
+    obs_actions.on_scene_found("Verse :: PC1@1")
+    obs_actions.on_source_filter_found(
+        source_name="Slides", filter_name="Blur :: PC1@1"
+    )
+    client = RecordingClient()
+    pc(1)
+    assert client.batches == [[scene("Verse :: PC1@1")]]
+
+
+def test_filter_groups_survive_publishes_before_execution() -> None:
+    obs_actions = ObsActions()
+    warm = "Warm :: CC1>64@1 on group=look delay=10ms"
+    cold = "Cold :: PC2@1 group=look"
+    obs_actions.on_source_filter_found(
+        source_name="Camera", filter_name=warm, filter_enabled=False
+    )
+    obs_actions.on_source_filter_found(
+        source_name="Camera", filter_name=cold, filter_enabled=True
+    )
+    client = RecordingClient()
+
+    obs_actions.process(cc(1, 100), client=client)  # type: ignore[arg-type]
+    # Published between the match and the delayed execution
+    obs_actions.on_scene_found("Other :: PC5@1")
+
+    while obs_actions.scheduler.pending():
+        obs_actions.scheduler.run_pending(timeout=0.1)
+
+    # The filter is not taken for one of its siblings
+    assert client.batches == [
+        [
+            filter_enabled("Camera", warm, True),
+            filter_enabled("Camera", cold, False),
+        ]
+    ]
+    assert obs_actions.state.is_filter_enabled("Camera", warm)
+
+
+def test_scene_item_actions_use_indexed_ids() -> None:
+    obs_actions = ObsActions()
+    source_name = "Logo :: PC4@1 toggle"
+    obs_actions.on_scene_item_found(
+        scene_name="Home", source_name=source_name, scene_item_id=3
+    )
+    obs_actions.on_scene_item_found(
+        scene_name="Live",
+        source_name=source_name,
+        scene_item_id=7,
+        scene_item_enabled=True,
+    )
+    client = RecordingClient()
+
+    def pc() -> None:
+        msg = mido.Message("program_change", channel=0, program=4)
+        obs_actions.process(msg, client=client)  # type: ignore[arg-type]
+
+    def item_enabled(scene_name: str, item_id: int, enabled: bool) -> ObsRequest:
+        return (
+            "SetSceneItemEnabled",
+            {
+                "sceneName": scene_name,
+                "sceneItemId": item_id,
+                "sceneItemEnabled": enabled,
+            },
+        )
+
+    pc()
+    assert client.batches == [
+        [item_enabled("Home", 3, True), item_enabled("Live", 7, False)]
+    ]
+
+    # Index kept current from events
+    for event_type, item_id in [("SceneItemRemoved", 3), ("SceneItemCreated", 9)]:
+        obs_actions.state.handle_event(
+            {
+                "op": 5,
+                "d": {
+                    "eventType": event_type,
+                    "eventData": {
+                        "sceneName": "Home",
+                        "sourceName": source_name,
+                        "sceneItemId": item_id,
+                    },
+                },
+            }
+        )
+
+    client.batches.clear()
+    pc()
+    assert client.batches == [
+        [item_enabled("Live", 7, True), item_enabled("Home", 9, True)]
+    ]
+
+
+def test_scene_item_actions_skip_nested_scenes() -> None:
+    obs_actions = ObsActions(multi_match=True)
+    obs_actions.on_scene_found("Intro :: PC1@1")
+    obs_actions.on_scene_item_found(
+        scene_name="Main",
+        source_name="Intro :: PC1@1",
+        scene_item_id=1,
+        is_scene=True,
+    )
+    # Shown twice in the same scene
+    for scene_item_id in [2, 3]:
+        obs_actions.on_scene_item_found(
+            scene_name="Main", source_name="Logo :: PC2@1", scene_item_id=scene_item_id
+        )
+    client = RecordingClient()
+
+    for program in [1, 2]:
+        msg = mido.Message("program_change", channel=0, program=program)
+        obs_actions.process(msg, client=client)  # type: ignore[arg-type]
+
+    assert client.requests == [
+        scene("Intro :: PC1@1"),
+        (
+            "SetSceneItemEnabled",
+            {"sceneName": "Main", "sceneItemId": 2, "sceneItemEnabled": True},
+        ),
+        (
+            "SetSceneItemEnabled",
+            {"sceneName": "Main", "sceneItemId": 3, "sceneItemEnabled": True},
+        ),
+    ]
+
+
+def test_media_actions() -> None:
+    obs_actions = ObsActions(multi_match=True)
+    input_name = "Clip :: PC5@1 seek=1.5s play"
+    obs_actions.on_scene_item_found(
+        scene_name="Home", source_name=input_name, scene_item_id=1
+    )
+    client = RecordingClient()
+
+    msg = mido.Message("program_change", channel=0, program=5)
+    obs_actions.process(msg, client=client)  # type: ignore[arg-type]
+
+    assert client.batches == [
+        [
+            (
+                "SetMediaInputCursor",
+                {"inputName": input_name, "mediaCursor": 1500},
+            ),
+            (
+                "TriggerMediaInputAction",
+                {
+                    "inputName": input_name,
+                    "mediaAction": "OBS_WEBSOCKET_MEDIA_INPUT_ACTION_PLAY",
+                },
+            ),
+        ]
+    ]
+
+
+class FakeConnection:
+    def __init__(self) -> None:
+        self.sent: list[str] = []
+
+    def send(self, msg: str) -> None:
+        self.sent.append(msg)
+
+
+def test_media_actions_are_sent_pre_encoded() -> None:
+    obs_actions = ObsActions()
+    obs_actions.on_scene_item_found(
+        scene_name="Verse", source_name="Clip :: PC3@1 restart", scene_item_id=1
+    )
+    obs_actions.on_scene_item_found(
+        scene_name="Verse", source_name="Intro :: PC4@1 seek=10s play", scene_item_id=2
+    )
+    client = ObsClient(port=0, password="")
+    connection = FakeConnection()
+    client._ws = connection  # type: ignore[assignment]
+
+    for program in [3, 4]:
+        msg = mido.Message("program_change", channel=0, program=program)
+        obs_actions.process(msg, client=client)
+
+    request, batch = map(json.loads, connection.sent)
+    assert request["op"] == 6
+    assert request["d"]["requestType"] == "TriggerMediaInputAction"
+    assert request["d"]["requestId"]
+    assert batch["op"] == 8
+    assert batch["d"]["requestId"]
+    assert batch["d"]["requests"] == [
+        {
+            "requestType": "SetMediaInputCursor",
+            "requestData": {
+                "inputName": "Intro :: PC4@1 seek=10s play",
+                "mediaCursor": 10000,
+            },
+        },
+        {
+            "requestType": "TriggerMediaInputAction",
+            "requestData": {
+                "inputName": "Intro :: PC4@1 seek=10s play",
+                "mediaAction": "OBS_WEBSOCKET_MEDIA_INPUT_ACTION_PLAY",
+            },
+        },
+    ]
+
+
+def test_actions_are_buffered_while_disconnected() -> None:
+    obs_actions = ObsActions()
+    obs_actions.on_scene_found("Verse :: PC1@1")
+    obs_actions.on_scene_found("Chorus :: PC2@1")
+    obs_actions.on_source_filter_found(
+        source_name="Camera", filter_name="Blur :: PC3@1 toggle"
+    )
+    obs_actions.on_scene_item_found(
+        scene_name="Verse", source_name="Clip :: PC4@1 restart", scene_item_id=1
+    )
+    client = RecordingClient()
+    client.connected = False
+
+    for program in [1, 3, 2, 3, 4, 3]:
+        msg = mido.Message("program_change", channel=0, program=program)
+        obs_actions.process(msg, client=client)  # type: ignore[arg-type]
+
+    assert client.requests == []
+    assert len(obs_actions.buffer) == 2
+    assert obs_actions.buffer.dropped == 1  # Media restart
+
+    client.connected = True
+    obs_actions.replay(client)  # type: ignore[arg-type]
+
+    # Latest scene, final filter state, in one batch
+    assert client.batches == [
+        [
+            scene("Chorus :: PC2@1"),
+            filter_enabled("Camera", "Blur :: PC3@1 toggle", True),
+        ]
+    ]
+    assert obs_actions.buffer.replayed == 2
+    assert len(obs_actions.buffer) == 0
+
+
+def test_outbound_buffer_bounds() -> None:
+    buffer = OutboundBuffer(max_size=2)
+    buffer.add([filter_enabled("Camera", f"Filter {i}", True) for i in range(3)])
+    assert buffer.drain() == [
+        filter_enabled("Camera", "Filter 1", True),
+        filter_enabled("Camera", "Filter 2", True),
+    ]
+
+    buffer = OutboundBuffer(max_age=0)
+    buffer.add([scene("Verse")])
+    time.sleep(0.01)
+    assert buffer.drain() == []
+    assert buffer.dropped == 1
+
+
+def test_actions_are_throttled() -> None:
+    obs_actions = ObsActions()
+    obs_actions.on_scene_found("Verse :: PC1@1")
+    obs_actions.on_scene_found("Chorus :: PC2@1")
+    obs_actions.throttle.level = obs_actions.throttle.MAX_LEVEL
+    client = RecordingClient()
+
+    for program in [1, 2, 1, 2]:
+        msg = mido.Message("program_change", channel=0, program=program)
+        obs_actions.process(msg, client=client)  # type: ignore[arg-type]
+
+    # The first one goes through, the end state of the others is sent later
+    assert client.requests == [scene("Verse :: PC1@1")]
+
+    while obs_actions.scheduler.pending():
+        obs_actions.scheduler.run_pending(timeout=0.5)
+
+    assert client.requests == [scene("Verse :: PC1@1"), scene("Chorus :: PC2@1")]
+    assert obs_actions.throttle.throttled_actions == 3
+
+
+def test_media_actions_are_not_dropped_when_throttled() -> None:
+    obs_actions = ObsActions()
+    obs_actions.on_scene_item_found(
+        scene_name="Main", source_name="Clip :: PC5@1 restart", scene_item_id=1
+    )
+    obs_actions.throttle.level = obs_actions.throttle.MAX_LEVEL
+    client = RecordingClient()
+    msg = mido.Message("program_change", channel=0, program=5)
+
+    for _ in range(3):
+        obs_actions.process(msg, client=client)  # type: ignore[arg-type]
+
+    assert [request_type for request_type, _ in client.requests] == [
+        "TriggerMediaInputAction"
+    ] * 3
+    assert obs_actions.buffer.dropped == 0
+    assert not obs_actions.scheduler.pending()
+
+
+def test_reset_forgets_actions_and_state() -> None:
+    obs_actions = ObsActions()
+    obs_actions.set_scene_collection("Show")
+    obs_actions.on_scene_found("Verse :: PC1@1")
+    obs_actions.on_scene_item_found(
+        scene_name="Verse :: PC1@1",
+        source_name="Logo :: PC2@1",
+        scene_item_id=1,
+        scene_item_enabled=True,
+    )
+    assert len(obs_actions.get_triggers()) == 2
+
+    # e.g. connected to another OBS
+    obs_actions.reset()
+    assert obs_actions.get_triggers() == []
+    assert obs_actions.state.get_scene_items("Logo :: PC2@1") == []
+
+    client = RecordingClient()
+    obs_actions.process(
+        mido.Message("program_change", channel=0, program=1),
+        client=client,  # type: ignore[arg-type]
+    )
+    assert client.requests == []
+
+    obs_actions.set_scene_collection("Show")
+    obs_actions.on_scene_found("Chorus :: PC1@1")
+    obs_actions.process(
+        mido.Message("program_change", channel=0, program=1),
+        client=client,  # type: ignore[arg-type]
+    )
+    assert client.requests == [scene("Chorus :: PC1@1")]
+
+
+def test_dispatch_during_continuous_reloads() -> None:
+    obs_actions = ObsActions(multi_match=True)
+    client = RecordingClient()
+    stop_event = threading.Event()
+    processed = 0
+
+    def reload() -> None:
+        generation = 0
+
+        while not stop_event.is_set():
+            generation += 1
+            obs_actions.begin_reload()
+            obs_actions.on_scene_found(f"Scene {generation} :: CC1#1@1")
+            obs_actions.on_source_filter_found(
+                source_name="Cam", filter_name=f"Blur {generation} :: CC1#1@1 toggle"
+            )
+            obs_actions.end_reload()
+
+    obs_actions.on_scene_found("Scene 0 :: CC1#1@1")
+    obs_actions.on_source_filter_found(
+        source_name="Cam", filter_name="Blur 0 :: CC1#1@1"
+    )
+    thread = threading.Thread(target=reload)
+    thread.start()
+
+    try:
+        deadline = time.monotonic() + 0.5
+
+        while time.monotonic() < deadline:
+            obs_actions.process(cc(1, 1), client)  # type: ignore[arg-type]
+            processed += 1
+    finally:
+        stop_event.set()
+        thread.join()
+
+    # Every message saw a complete index, from a single reload
+    assert len(client.batches) == processed
+
+    for batch in client.batches:
+        generations = {
+            (data.get("sceneName") or data["filterName"]).split()[1]
+            for _, data in batch
+        }
+        assert len(generations) == 1
+        assert batch[-1][0] == "SetSourceFilterEnabled"
@@ -0,0 +1,69 @@
+import queue
+import threading
+from typing import Iterator
+
+import websockets
+
+from obs_midi.core.obs_client import ConnectionStats, ObsDisconnect
+from obs_midi.core.obs_events import ObsEventsThread
+
+
+class FlakyClient:
+    name = "events"
+
+    def __init__(self, failures: list[Exception]) -> None:
+        self.stats = ConnectionStats(time_to_detect=0.0, time_to_recover=0.0)
+        self.reconnects = 0
+        self._failures = failures
+        self._disconnected = False
+
+    def connect(self) -> None:
+        pass
+
+    def reconnect(self) -> None:
+        self.reconnects += 1
+
+        if self._failures:
+            raise self._failures.pop(0)
+
+    def iter_events(self, poll_interval: float) -> Iterator[dict | None]:
+        if not self._disconnected:
+            self._disconnected = True
+            raise ObsDisconnect(websockets.CloseCode.ABNORMAL_CLOSURE)
+
+        yield None
+
+    def check_liveness(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+def test_reconnection_retries_failed_handshakes() -> None:
+    client = FlakyClient(
+        [
+            ConnectionRefusedError(),
+            websockets.InvalidHandshake("OBS is starting"),
+            # Authentication failed, e.g. before OBS loaded its settings
+            ObsDisconnect(4009),
+        ]
+    )
+    close_event = threading.Event()
+    error_bucket: queue.Queue[Exception] = queue.Queue()
+    thread = ObsEventsThread(
+        client=client,  # type: ignore[arg-type]
+        open_event=threading.Event(),
+        start_barrier=threading.Barrier(1),
+        close_event=close_event,
+        error_bucket=error_bucket,
+        on_disconnect=lambda: None,
+        on_reconnect=close_event.set,
+        reconnect_delay=0.01,
+    )
+    thread.start()
+    thread.join(5)
+
+    assert not thread.is_alive()
+    assert error_bucket.empty()
+    assert client.reconnects == 4
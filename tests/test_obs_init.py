@@ -0,0 +1,214 @@
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from obs_midi.core.obs_actions import ObsActions
+from obs_midi.core.obs_init import DiscoveryProgress, ObsInitThread
+
+
+class FakeClient:
+    def __init__(self) -> None:
+        self.requests: dict[str, tuple[str, dict]] = {}
+
+    def send_request(self, request_type: str, request_data: dict | None = None) -> str:
+        request_id = str(len(self.requests))
+        self.requests[request_id] = (request_type, request_data or {})
+        return request_id
+
+    def get_request_data(self, request_id: str) -> dict:
+        return self.requests[request_id][1]
+
+    def is_request_response(self, event: dict) -> bool:
+        return event["op"] == 7
+
+    def respond(self, request_id: str, response_data: dict) -> dict:
+        return {
+            "op": 7,
+            "d": {
+                "requestId": request_id,
+                "requestType": self.requests[request_id][0],
+                "requestStatus": {"result": True},
+                "responseData": response_data,
+            },
+        }
+
+
+def test_progressive_discovery() -> None:
+    client = FakeClient()
+    obs_actions = ObsActions()
+    progress_reports: list[str] = []
+    thread = ObsInitThread(
+        client,  # type: ignore[arg-type]
+        obs_actions=obs_actions,
+        ws_open_event=threading.Event(),
+        close_event=threading.Event(),
+        on_progress=lambda progress: progress_reports.append(str(progress)),
+    )
+
+    def handle(request_id: str, **response_data: Any) -> None:
+        thread.handle_event(client.respond(request_id, response_data))
+
+    client.send_request("GetSceneList", {})
+    thread._request_ids.add("0")
+    handle("0", scenes=[{"sceneName": "Home :: PC1@1"}, {"sceneName": "Live"}])
+
+    # Scene triggers are live before scene items and filters are known
+    assert [str(t) for t in obs_actions.get_triggers()] == ["PC1@1"]
+    assert progress_reports == ["Scenes ready / filters 0/0"]
+
+    items = [{"sourceName": "Camera", "sceneItemId": 1}]
+    handle("1", sceneItems=items)
+    handle("2", sceneItems=[*items, {"sourceName": "Mic", "sceneItemId": 2}])
+    # Each source is asked for its filters once
+    assert [request[0] for request in client.requests.values()] == [
+        "GetSceneList",
+        "GetSceneItemList",
+        "GetSceneItemList",
+        "GetSourceFilterList",
+        "GetSourceFilterList",
+    ]
+
+    # Responses to actions are ignored
+    thread.handle_event({"op": 7, "d": {"requestId": "other", "requestType": "X"}})
+
+    handle("3", filters=[{"filterName": "Blur :: PC2@1"}])
+    assert progress_reports[-1] == "Scenes ready / filters 1/2"
+    assert len(obs_actions.get_triggers()) == 2
+
+    handle("4", filters=[])
+    assert progress_reports[-1] == "Scenes ready / filters ready"
+    assert thread.progress.done
+    assert isinstance(thread.progress.scenes_ready_after, float)
+
+
+def test_discovery_progress() -> None:
+    progress = DiscoveryProgress()
+    assert str(progress) == "Discovering scenes"
+    assert not progress.scenes_ready
+
+
+def test_reload_on_obs_changes() -> None:
+    client = FakeClient()
+    obs_actions = ObsActions()
+    thread = ObsInitThread(
+        client,  # type: ignore[arg-type]
+        obs_actions=obs_actions,
+        ws_open_event=threading.Event(),
+        close_event=threading.Event(),
+    )
+
+    def respond(request_type: str, **response_data: Any) -> None:
+        request_id = max(
+            (
+                request_id
+                for request_id, request in client.requests.items()
+                if request[0] == request_type
+            ),
+            key=int,
+        )
+        thread.handle_event(client.respond(request_id, response_data))
+
+    def reload(scene: str) -> None:
+        thread.reload()
+        respond(
+            "GetSceneCollectionList",
+            currentSceneCollectionName="Show",
+            sceneCollections=["Show"],
+        )
+        respond("GetSceneList", scenes=[{"sceneName": scene}])
+
+    reload("Home :: PC1@1")
+    respond("GetSceneItemList", sceneItems=[])
+    assert [str(t) for t in obs_actions.get_triggers()] == ["PC1@1"]
+
+    # Renames are coalesced into a single reload
+    for _ in range(3):
+        thread.handle_event(
+            {"op": 5, "d": {"eventType": "SceneNameChanged", "eventData": {}}}
+        )
+
+    assert obs_actions.scheduler.pending() == 1
+
+    reload("Home :: PC2@1")
+    # Previous triggers stay live until the reload is complete
+    assert [str(t) for t in obs_actions.get_triggers()] == ["PC1@1"]
+
+    respond("GetSceneItemList", sceneItems=[])
+    assert [str(t) for t in obs_actions.get_triggers()] == ["PC2@1"]
+
+    # Sources created or removed, and items removed, also reload triggers
+    for event_type in ["InputCreated", "InputRemoved", "SceneItemRemoved"]:
+        obs_actions.scheduler.cancel("reload")
+        thread.handle_event({"op": 5, "d": {"eventType": event_type, "eventData": {}}})
+        assert obs_actions.scheduler.pending() == 1
+
+
+def test_scene_collections_are_indexed_after_each_discovery(tmp_path: Path) -> None:
+    client = FakeClient()
+    obs_actions = ObsActions()
+    ws_open_event = threading.Event()
+    close_event = threading.Event()
+    thread = ObsInitThread(
+        client,  # type: ignore[arg-type]
+        obs_actions=obs_actions,
+        ws_open_event=ws_open_event,
+        close_event=close_event,
+        scene_collections_dir=tmp_path,
+        daemon=True,
+    )
+
+    def save(scene: str) -> None:
+        saved = {"name": "Show B", "sources": [{"id": "scene", "name": scene}]}
+        (tmp_path / "Show_B.json").write_text(json.dumps(saved))
+
+    def respond(request_type: str, **response_data: Any) -> None:
+        deadline = time.monotonic() + 5
+
+        while not (
+            request_ids := [
+                request_id
+                for request_id, request in client.requests.items()
+                if request[0] == request_type and request_id in thread._request_ids
+            ]
+        ):
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+
+        thread.handle_event(client.respond(request_ids[-1], response_data))
+
+    def discover() -> None:
+        builder = obs_actions._builders.get("Show B")
+        respond(
+            "GetSceneCollectionList",
+            currentSceneCollectionName="Show A",
+            sceneCollections=["Show A", "Show B"],
+        )
+        respond("GetSceneList", scenes=[{"sceneName": "Home"}])
+        respond("GetSceneItemList", sceneItems=[])
+        deadline = time.monotonic() + 5
+
+        while obs_actions._builders.get("Show B") is builder:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+
+    save("Intro :: PC1@1")
+    thread.start()
+    ws_open_event.set()
+
+    try:
+        discover()
+        # Saved since, e.g. when switching collections in OBS
+        save("Intro :: PC2@1")
+        thread.rediscover()
+        discover()
+    finally:
+        close_event.set()
+        thread.join()
+
+    # The current collection is left to discovery
+    assert not obs_actions.add_scene_collection_index("Show A", obs_actions._builder)
+
+    obs_actions.set_scene_collection("Show B")
+    assert [str(t) for t in obs_actions.get_triggers()] == ["PC2@1"]
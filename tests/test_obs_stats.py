@@ -0,0 +1,44 @@
+from obs_midi.core.obs_stats import ObsStatsMonitor, Throttle
+
+
+def stats(render_skipped: int, render_total: int, render_time: float = 5) -> dict:
+    return {
+        "op": 7,
+        "d": {
+            "requestType": "GetStats",
+            "responseData": {
+                "activeFps": 60.0,
+                "averageFrameRenderTime": render_time,
+                "renderSkippedFrames": render_skipped,
+                "renderTotalFrames": render_total,
+                "outputSkippedFrames": 0,
+                "outputTotalFrames": render_total,
+            },
+        },
+    }
+
+
+def test_stats_monitor_sets_throttle_level() -> None:
+    throttle = Throttle()
+    monitor = ObsStatsMonitor(throttle)
+
+    monitor.handle_event(stats(0, 1000))
+    assert throttle.level == 0
+
+    # 5% of frames skipped since the previous poll
+    monitor.handle_event(stats(10, 1200))
+    assert monitor.render_skipped_ratio == 0.05
+    assert throttle.level == 1
+    assert throttle.update_interval_factor == 2
+
+    # Render time close to the frame interval (16.7 ms at 60 FPS)
+    monitor.handle_event(stats(10, 1400, render_time=15))
+    monitor.handle_event(stats(10, 1600, render_time=15))
+    assert throttle.level == 3
+    assert throttle.acquire_action() == 0
+    assert throttle.acquire_action() > 0
+
+    # Healthy for a while
+    for i in range(ObsStatsMonitor.RECOVERY_POLLS):
+        monitor.handle_event(stats(10, 1800 + i * 200))
+    assert throttle.level == 2
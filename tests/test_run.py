@@ -2,6 +2,7 @@ import contextlib
 import json
 import queue
 import threading
+from pathlib import Path
 from typing import Callable, Iterator
 
 import mido
@@ -10,9 +11,15 @@ import websockets
 from websockets.sync.connection import Connection
 from websockets.sync.server import Server, serve
 
-from obs_midi.core.main import run
+from obs_midi.core.control_socket import ControlError, send_command
+from obs_midi.core.main import (
+    INFO_CONTROL,
+    INFO_OBS_CONNECTION_STATS,
+    run,
+)
 from obs_midi.core.midi_in import INFO_PORT_NAME, MIDICallback
 from obs_midi.core.obs_client import ObsDisconnect
+from obs_midi.core.obs_init import DiscoveryProgress
 
 
 @contextlib.contextmanager
@@ -40,16 +47,60 @@ def serve_ws(port: int, handler: Callable) -> Iterator[None]:
             raise error_bucket.get()
 
 
+def respond(ws: Connection, request_type: str, response_data: dict) -> dict:
+    msg = json.loads(ws.recv())
+    assert msg["op"] == 6
+    assert msg["d"]["requestType"] == request_type
+    ws.send(
+        json.dumps(
+            {
+                "op": 7,
+                "d": {
+                    "requestId": msg["d"]["requestId"],
+                    "requestStatus": {"result": True},
+                    "requestType": request_type,
+                    "responseData": response_data,
+                },
+            }
+        )
+    )
+    return msg
+
+
+def respond_scene_collection_list(ws: Connection) -> None:
+    msg = json.loads(ws.recv())
+    assert msg["op"] == 6
+    assert msg["d"]["requestType"] == "GetSceneCollectionList"
+    ws.send(
+        json.dumps(
+            {
+                "op": 7,
+                "d": {
+                    "requestId": msg["d"]["requestId"],
+                    "requestStatus": {"result": True},
+                    "requestType": "GetSceneCollectionList",
+                    "responseData": {
+                        "currentSceneCollectionName": "Show",
+                        "sceneCollections": ["Show"],
+                    },
+                },
+            }
+        )
+    )
+
+
 def test_run_full() -> None:
     close_event = threading.Event()
     close_barrier = threading.Barrier(2)
     ready_event = threading.Event()
+    discovered_event = threading.Event()
     server_error_bucket: queue.Queue[Exception] = queue.Queue(maxsize=1)
 
     @contextlib.contextmanager
     def open_dummy_input(callback: MIDICallback) -> Iterator[dict]:
         def midi_stream() -> None:
-            ready_event.wait()
+            # Filter triggers are armed once discovery is done
+            discovered_event.wait()
 
             # NOTE: mido channels are 0-based
 
@@ -98,6 +149,7 @@ def test_run_full() -> None:
             assert msg["d"]["rpcVersion"] == 1
             assert msg["d"]["authentication"]
             ws.send(json.dumps({"d": {"msg": "ok"}}))
+            respond_scene_collection_list(ws)
 
             # Application asks for scene list
             msg = json.loads(ws.recv())
@@ -150,7 +202,9 @@ def test_run_full() -> None:
                                 "requestStatus": {"result": True},
                                 "requestType": "GetSceneItemList",
                                 "responseData": {
-                                    "sceneItems": [{"sourceName": "Flash Effect"}]
+                                    "sceneItems": [
+                                        {"sourceName": "Flash Effect", "sceneItemId": 1}
+                                    ]
                                     if i == 0
                                     else []
                                 },
@@ -243,6 +297,10 @@ def test_run_full() -> None:
     obs_disconnect_event = threading.Event()
     obs_reconnect_event = threading.Event()
 
+    def on_discovery_progress(progress: DiscoveryProgress) -> None:
+        if progress.done:
+            discovered_event.set()
+
     with serve_ws(3456, handler):
         run(
             midi_input_opener=open_dummy_input,
@@ -251,6 +309,7 @@ def test_run_full() -> None:
             on_ready=lambda info: ready_event.set(),
             on_obs_disconnect=lambda: obs_disconnect_event.set(),
             on_obs_reconnect=lambda: obs_reconnect_event.set(),
+            on_discovery_progress=on_discovery_progress,
             close_event=close_event,
         )
 
@@ -336,6 +395,7 @@ def test_run_obs_auth_error() -> None:
 
 def test_run_obs_reconnect() -> None:
     obs_reconnect_event = threading.Event()
+    rediscovered_event = threading.Event()
     close_event = threading.Event()
     close_barrier = threading.Barrier(2)
     server_error_bucket: queue.Queue[Exception] = queue.Queue(maxsize=1)
@@ -346,6 +406,7 @@ def test_run_obs_reconnect() -> None:
             ready_event.wait()
 
             obs_reconnect_event.wait()
+            rediscovered_event.wait()
 
             # First scene
             callback(mido.Message("control_change", channel=0, control=9, value=1))
@@ -377,6 +438,7 @@ def test_run_obs_reconnect() -> None:
                 assert msg["d"]["rpcVersion"] == 1
                 assert msg["d"]["authentication"]
                 ws.send(json.dumps({"d": {"msg": "ok"}}))
+                respond_scene_collection_list(ws)
 
                 # Application asks for scene list
                 msg = json.loads(ws.recv())
@@ -435,6 +497,19 @@ def test_run_obs_reconnect() -> None:
                 assert msg["d"]["authentication"]
                 ws.send(json.dumps({"d": {"msg": "ok"}}))
 
+                # Discovered again, which seeds the state anew
+                respond_scene_collection_list(ws)
+                respond(
+                    ws,
+                    "GetSceneList",
+                    {
+                        "currentProgramSceneName": "Home",
+                        "scenes": [{"sceneName": scene}],
+                    },
+                )
+                respond(ws, "GetSceneItemList", {"sceneItems": []})
+                rediscovered_event.set()
+
                 # MIDI message requests switching to Scene1
                 msg = json.loads(ws.recv())
                 assert msg["op"] == 6
@@ -477,3 +552,295 @@ def test_run_obs_reconnect() -> None:
     assert close_event.is_set()
     if not server_error_bucket.empty():
         raise server_error_bucket.get()
+
+
+def test_run_obs_command_connection() -> None:
+    close_event = threading.Event()
+    close_barrier = threading.Barrier(2, timeout=5)
+    ready_event = threading.Event()
+    server_error_bucket: queue.Queue[Exception] = queue.Queue(maxsize=2)
+    scene = "Scene1 :: CC9#1@1"
+    info: dict = {}
+
+    @contextlib.contextmanager
+    def open_dummy_input(callback: MIDICallback) -> Iterator[dict]:
+        def midi_stream() -> None:
+            ready_event.wait()
+            callback(mido.Message("control_change", channel=0, control=9, value=1))
+            close_barrier.wait()
+            close_event.set()
+
+        threading.Thread(target=midi_stream, daemon=True).start()
+        yield {INFO_PORT_NAME: "dummy"}
+
+    def handler(ws: Connection) -> None:
+        try:
+            ws.send(
+                json.dumps(
+                    {"d": {"authentication": {"salt": "test", "challenge": "test"}}}
+                )
+            )
+            msg = json.loads(ws.recv())
+            assert msg["op"] == 1
+            ws.send(json.dumps({"d": {"msg": "ok"}}))
+
+            if msg["d"]["eventSubscriptions"] == 0:
+                # Command connection, only used for actions
+                respond(ws, "SetCurrentProgramScene", {})
+                close_barrier.wait()
+            else:
+                respond_scene_collection_list(ws)
+                respond(ws, "GetSceneList", {"scenes": [{"sceneName": scene}]})
+                respond(ws, "GetSceneItemList", {"sceneItems": []})
+
+            close_event.wait()
+
+            try:
+                ws.recv()
+            except websockets.ConnectionClosedOK:
+                pass
+        except Exception as exc:
+            server_error_bucket.put(exc)
+            close_event.set()
+
+    def on_ready(ready_info: dict) -> None:
+        info.update(ready_info)
+        ready_event.set()
+
+    with serve_ws(3456, handler):
+        run(
+            midi_input_opener=open_dummy_input,
+            obs_port=3456,
+            obs_password="test",
+            on_ready=on_ready,
+            obs_command_connection=True,
+            close_event=close_event,
+        )
+
+    if not server_error_bucket.empty():
+        raise server_error_bucket.get()
+
+    stats = info[INFO_OBS_CONNECTION_STATS]
+    # Identify, then the action
+    assert stats["commands"].messages_sent == 2
+    # Identify, then discovery
+    assert stats["events"].messages_sent == 4
+
+
+def test_run_obs_heartbeat_timeout() -> None:
+    heartbeat_interval = 0.1
+    heartbeat_timeout = 0.3
+    close_event = threading.Event()
+    release_event = threading.Event()
+    obs_reconnect_event = threading.Event()
+    server_error_bucket: queue.Queue[Exception] = queue.Queue(maxsize=2)
+    info: dict = {}
+    connections = 0
+
+    @contextlib.contextmanager
+    def open_dummy_input(callback: MIDICallback) -> Iterator[dict]:
+        yield {INFO_PORT_NAME: "dummy"}
+
+    def handler(ws: Connection) -> None:
+        nonlocal connections
+        connections += 1
+
+        try:
+            ws.send(
+                json.dumps(
+                    {"d": {"authentication": {"salt": "test", "challenge": "test"}}}
+                )
+            )
+            ws.recv()
+            ws.send(json.dumps({"d": {"msg": "ok"}}))
+
+            if connections == 1:
+                respond_scene_collection_list(ws)
+                msg = json.loads(ws.recv())
+                ws.send(
+                    json.dumps(
+                        {
+                            "op": 7,
+                            "d": {
+                                "requestId": msg["d"]["requestId"],
+                                "requestStatus": {"result": True},
+                                "requestType": "GetSceneList",
+                                "responseData": {"scenes": []},
+                            },
+                        }
+                    )
+                )
+                # Half-open: the connection stays up, but nothing comes back
+                release_event.wait()
+                return
+
+            # Heartbeats and rediscovery are answered, in any order
+            responses = {
+                "GetVersion": {},
+                "GetSceneCollectionList": {
+                    "currentSceneCollectionName": "Show",
+                    "sceneCollections": ["Show"],
+                },
+                "GetSceneList": {"scenes": []},
+            }
+
+            while True:
+                msg = json.loads(ws.recv())
+                request_type = msg["d"]["requestType"]
+                ws.send(
+                    json.dumps(
+                        {
+                            "op": 7,
+                            "d": {
+                                "requestId": msg["d"]["requestId"],
+                                "requestStatus": {"result": True},
+                                "requestType": request_type,
+                                "responseData": responses[request_type],
+                            },
+                        }
+                    )
+                )
+        except websockets.ConnectionClosedOK:
+            pass
+        except Exception as exc:
+            server_error_bucket.put(exc)
+
+    def on_obs_reconnect() -> None:
+        obs_reconnect_event.set()
+        # Let a heartbeat go through the new connection
+        threading.Timer(0.3, close_event.set).start()
+
+    with serve_ws(3456, handler):
+        try:
+            run(
+                midi_input_opener=open_dummy_input,
+                obs_port=3456,
+                obs_password="test",
+                on_ready=info.update,
+                on_obs_reconnect=on_obs_reconnect,
+                obs_heartbeat_interval=heartbeat_interval,
+                obs_heartbeat_timeout=heartbeat_timeout,
+                close_event=close_event,
+            )
+        finally:
+            release_event.set()
+
+    if not server_error_bucket.empty():
+        raise server_error_bucket.get()
+
+    assert obs_reconnect_event.is_set()
+    stats = info[INFO_OBS_CONNECTION_STATS]["main"]
+    assert stats.disconnects == 1
+    assert stats.reconnects == 1
+    # Not before the timeout, and well before the test would have timed out.
+    # Loose bounds, as timings vary between machines.
+    assert heartbeat_timeout <= stats.time_to_detect < 10 * heartbeat_timeout
+    assert 0 < stats.time_to_recover < 10 * heartbeat_timeout
+
+
+def test_run_control(tmp_path: Path) -> None:
+    socket_path = str(tmp_path / "obs-midi.sock")
+    close_event = threading.Event()
+    ready_event = threading.Event()
+    switched_event = threading.Event()
+    server_error_bucket: queue.Queue[Exception] = queue.Queue(maxsize=1)
+    callbacks: dict[str, MIDICallback] = {}
+    closed_inputs: list[str] = []
+    info: dict = {}
+    msg = mido.Message("control_change", channel=0, control=9, value=1)
+
+    def input_opener(port: str) -> Callable:
+        @contextlib.contextmanager
+        def open_dummy_input(callback: MIDICallback) -> Iterator[dict]:
+            if port == "broken":
+                raise OSError(f"No such port: {port}")
+
+            callbacks[port] = callback
+
+            if port == "second":
+                switched_event.set()
+
+            yield {INFO_PORT_NAME: port}
+            closed_inputs.append(port)
+
+        return open_dummy_input
+
+    def handler(ws: Connection) -> None:
+        try:
+            ws.send(
+                json.dumps(
+                    {"d": {"authentication": {"salt": "test", "challenge": "test"}}}
+                )
+            )
+            ws.recv()
+            ws.send(json.dumps({"d": {"msg": "ok"}}))
+            respond_scene_collection_list(ws)
+            respond(ws, "GetSceneList", {"scenes": [{"sceneName": "S :: CC9#1@1"}]})
+            respond(ws, "GetSceneItemList", {"sceneItems": []})
+
+            # Only the message received after resuming is performed
+            msg = json.loads(ws.recv())
+            assert msg["d"]["requestType"] == "SetCurrentProgramScene"
+            close_event.set()
+
+            try:
+                ws.recv()
+            except websockets.ConnectionClosedOK:
+                pass
+        except Exception as exc:
+            server_error_bucket.put(exc)
+            close_event.set()
+
+    def on_ready(ready_info: dict) -> None:
+        info.update(ready_info)
+        ready_event.set()
+
+    def drive() -> None:
+        try:
+            assert ready_event.wait(5)
+            status = send_command(socket_path, "status")
+            assert status["ready"] and status["midi_input_port"] == "first"
+            stats = send_command(socket_path, "stats")
+            assert stats["obs_connections"]["main"]["reconnects"] == 0
+            assert send_command(socket_path, "triggers") == ["CC9#1@1"]
+
+            control = info[INFO_CONTROL]
+            control.pause()
+            callbacks["first"](msg)
+
+            # Failing to switch is reported, the previous input is kept
+            with pytest.raises(OSError):
+                control.set_midi_input(input_opener("broken"))
+
+            with pytest.raises(ControlError):
+                send_command(socket_path, "switch_input", port="No such port")
+
+            assert send_command(socket_path, "status")["midi_input_port"] == "first"
+
+            # The OBS connection is kept while switching MIDI inputs
+            assert control.set_midi_input(input_opener("second")) == "second"
+            assert switched_event.wait(5)
+            control.resume()
+            callbacks["second"](msg)
+        except Exception as exc:
+            server_error_bucket.put(exc)
+            close_event.set()
+
+    threading.Thread(target=drive, daemon=True).start()
+
+    with serve_ws(3456, handler):
+        run(
+            midi_input_opener=input_opener("first"),
+            obs_port=3456,
+            obs_password="test",
+            on_ready=on_ready,
+            obs_heartbeat_interval=None,
+            control_socket_path=socket_path,
+            close_event=close_event,
+        )
+
+    if not server_error_bucket.empty():
+        raise server_error_bucket.get()
+
+    assert closed_inputs == ["first", "first", "first", "second"]
+    assert info[INFO_OBS_CONNECTION_STATS]["main"].reconnects == 0
@@ -0,0 +1,83 @@
+import json
+from pathlib import Path
+
+from obs_midi.core.obs_actions import ObsActions
+from obs_midi.core.scene_collections import (
+    index_scene_collection,
+    read_scene_collections,
+)
+
+from .test_obs_actions import RecordingClient, cc, scene
+
+
+def test_scene_collections_are_indexed_ahead_of_time(tmp_path: Path) -> None:
+    saved = {
+        "name": "Show B",
+        "scene_order": [{"name": "Intro :: CC1#1@1"}],
+        "sources": [
+            {
+                "id": "scene",
+                "name": "Intro :: CC1#1@1",
+                "settings": {"items": [{"name": "Logo :: CC3#1@1", "id": 7}]},
+            },
+            {
+                "id": "image_source",
+                "name": "Logo :: CC3#1@1",
+                "filters": [{"name": "Glow :: CC4#1@1", "enabled": False}],
+            },
+        ],
+    }
+    (tmp_path / "Show_B.json").write_text(json.dumps(saved))
+    (tmp_path / "broken.json").write_text("{")
+    collections = read_scene_collections(tmp_path)
+    assert list(collections) == ["Show B"]
+
+    client = RecordingClient()
+    obs_actions = ObsActions()
+    obs_actions.on_scene_collection_found("Show A")
+    obs_actions.on_scene_collection_found("Show B :: CC9#2@1")
+    obs_actions.set_scene_collection("Show A")
+    obs_actions.on_scene_found("Home :: CC1#1@1")
+    obs_actions.add_scene_collection_index(
+        "Show B :: CC9#2@1", index_scene_collection(collections["Show B"])
+    )
+
+    obs_actions.process(cc(1, 1), client)  # type: ignore[arg-type]
+    assert client.requests == [scene("Home :: CC1#1@1")]
+
+    # Collection switches are available from every collection
+    obs_actions.process(cc(9, 2), client)  # type: ignore[arg-type]
+    assert client.requests[-1] == (
+        "SetCurrentSceneCollection",
+        {"sceneCollectionName": "Show B :: CC9#2@1"},
+    )
+
+    # Actions of the new collection are live at once, item IDs included
+    obs_actions.set_scene_collection("Show B :: CC9#2@1")
+    assert [str(t) for t in obs_actions.get_triggers()] == [
+        "CC1#1@1",
+        "CC4#1@1",
+        "CC3#1@1",
+        "CC9#2@1",
+    ]
+    obs_actions.process(cc(1, 1), client)  # type: ignore[arg-type]
+    obs_actions.process(cc(3, 1), client)  # type: ignore[arg-type]
+    assert client.requests[-2:] == [
+        scene("Intro :: CC1#1@1"),
+        (
+            "SetSceneItemEnabled",
+            {
+                "sceneName": "Intro :: CC1#1@1",
+                "sceneItemId": 7,
+                "sceneItemEnabled": True,
+            },
+        ),
+    ]
+
+    # Already current
+    obs_actions.process(cc(9, 2), client)  # type: ignore[arg-type]
+    assert obs_actions.state.elided["SetCurrentSceneCollection"] == 1
+
+    # Discovery of a collection indexed ahead of time adds nothing twice
+    obs_actions.on_scene_found("Intro :: CC1#1@1")
+    assert len(obs_actions.get_triggers()) == 4
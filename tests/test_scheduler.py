@@ -0,0 +1,73 @@
+import queue
+import threading
+import time
+
+from obs_midi.core.scheduler import Scheduler, SchedulerThread
+
+
+def test_scheduler_fires_in_deadline_order() -> None:
+    scheduler = Scheduler()
+    fired: list[str] = []
+
+    scheduler.schedule(0.02, lambda: fired.append("b"))
+    scheduler.schedule(0.01, lambda: fired.append("a"))
+    assert scheduler.schedule(0.03, lambda: fired.append("c"), key="c")
+    assert not scheduler.schedule(0.01, lambda: fired.append("c"), key="c")
+    scheduler.schedule(0.01, lambda: fired.append("cancelled"), key="d")
+    scheduler.cancel("d")
+    assert scheduler.pending() == 3
+
+    deadline = time.monotonic() + 1
+    while scheduler.pending() and time.monotonic() < deadline:
+        scheduler.run_pending(timeout=0.1)
+
+    assert fired == ["a", "b", "c"]
+    assert scheduler.fired == 3
+
+
+def test_scheduler_survives_failing_callbacks() -> None:
+    scheduler = Scheduler()
+    fired: list[str] = []
+
+    def fail() -> None:
+        raise KeyError("gone")
+
+    scheduler.schedule(0.01, fail)
+    scheduler.schedule(0.01, lambda: fired.append("a"))
+    scheduler.schedule(0.02, lambda: fired.append("b"))
+
+    deadline = time.monotonic() + 1
+    while scheduler.pending() and time.monotonic() < deadline:
+        scheduler.run_pending(timeout=0.1)
+
+    assert fired == ["a", "b"]
+
+
+def test_scheduler_lateness_with_many_pending_timers() -> None:
+    scheduler = Scheduler()
+    close_event = threading.Event()
+    error_bucket: queue.Queue[Exception] = queue.Queue()
+    thread = SchedulerThread(
+        scheduler=scheduler, close_event=close_event, error_bucket=error_bucket
+    )
+    thread.start()
+
+    try:
+        # Far in the future, never fired
+        for i in range(5000):
+            scheduler.schedule(60 + i / 1000, lambda: None)
+
+        done = threading.Event()
+        for i in range(50):
+            scheduler.schedule(i / 1000, lambda: None)
+        scheduler.schedule(0.06, done.set)
+
+        assert done.wait(5)
+    finally:
+        close_event.set()
+        thread.join()
+
+    assert error_bucket.empty()
+    assert scheduler.fired == 51
+    # Loose bound, as wall-clock scheduling varies between machines
+    assert scheduler.mean_lateness < 0.05